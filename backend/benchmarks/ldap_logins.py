@@ -0,0 +1,166 @@
+"""
+LDAP login throughput.
+
+Runs the LDAP half of a login (find the user with the service account, then
+bind as the user) against an in-process ldap3 MOCK_SYNC directory. It compares
+the previous per-login implementation with the pooled `LDAPClient`. The
+previous implementation built a new Server that read DSA/schema info, opened
+a new service connection and ran everything on the event loop. --latency-ms
+adds a blocking delay to every simulated round trip (connect, bind, search),
+the way a real network does. The event loop lag shows what a login costs
+everyone else. The mock scans every entry on search, so keep --users small.
+
+    uv run python -m benchmarks.ldap_logins --logins 2000 --concurrency 32
+    uv run python -m benchmarks.ldap_logins --latency-ms 2
+"""
+
+import argparse
+import asyncio
+import functools
+import time
+
+from ldap3 import ALL, MOCK_SYNC, SUBTREE, Connection, Server
+from ldap3.strategy.mockSync import MockSyncStrategy
+
+from src.core.ldap import LDAPClient
+
+BASE = "dc=bench,dc=invalid"
+SERVICE_DN = f"cn=service,{BASE}"
+SERVICE_PASSWORD = "service-password"
+PASSWORD = "user-password"
+ATTRIBUTES = ["mail", "givenName", "sn", "cn"]
+
+
+def add_latency(seconds: float) -> None:
+    """Make every mock round trip block like a network call would."""
+    for name in ("send", "_start_listen"):
+        original = getattr(MockSyncStrategy, name)
+
+        @functools.wraps(original)
+        def delayed(*args, __original=original, **kwargs):
+            time.sleep(seconds)
+            return __original(*args, **kwargs)
+
+        setattr(MockSyncStrategy, name, delayed)
+
+
+def build_directory(users: int) -> Server:
+    server = Server("ldap-bench.invalid", get_info=ALL)
+    seed = Connection(server, client_strategy=MOCK_SYNC)
+    seed.strategy.add_entry(
+        SERVICE_DN, {"objectClass": ["person"], "sn": "service", "userPassword": SERVICE_PASSWORD}
+    )
+    for i in range(users):
+        seed.strategy.add_entry(
+            f"uid=user{i},ou=people,{BASE}",
+            {
+                "objectClass": ["inetOrgPerson"],
+                "uid": f"user{i}",
+                "mail": f"user{i}@bench.invalid",
+                "givenName": "User",
+                "sn": str(i),
+                "cn": f"User {i}",
+                "userPassword": PASSWORD,
+            },
+        )
+    return server
+
+
+def legacy_login(directory: Server, username: str, password: str) -> bool:
+    """The login path before LDAPClient, blocking the caller throughout."""
+    server = Server("ldap-bench.invalid", get_info=ALL)
+    # A new mock Server starts empty, share the seeded entries
+    server.dit = directory.dit
+    server.dit_lock = directory.dit_lock
+    # auto_bind=True as before; the mock strategy closes auto-bound connections
+    conn = Connection(
+        server, user=SERVICE_DN, password=SERVICE_PASSWORD, client_strategy=MOCK_SYNC
+    )
+    conn.bind()
+    conn.search(BASE, f"(uid={username})", SUBTREE, attributes=ATTRIBUTES)
+    if not conn.entries:
+        return False
+    auth_conn = Connection(
+        server, user=conn.entries[0].entry_dn, password=password, client_strategy=MOCK_SYNC
+    )
+    bound = auth_conn.bind()
+    auth_conn.unbind()
+    conn.unbind()
+    return bound
+
+
+async def client_login(client: LDAPClient, username: str, password: str) -> bool:
+    found = await client.search_user(username, ATTRIBUTES)
+    if found is None:
+        return False
+    dn, _ = found
+    return await client.bind_user(dn, password)
+
+
+async def measure(login, args: argparse.Namespace) -> tuple[float, float]:
+    """Returns (logins per second, worst event loop lag in ms)."""
+    max_lag = 0.0
+    running = True
+
+    async def watch_loop() -> None:
+        nonlocal max_lag
+        interval = 0.005
+        while running:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            max_lag = max(max_lag, time.perf_counter() - start - interval)
+
+    slots = asyncio.Semaphore(args.concurrency)
+
+    async def one(i: int) -> None:
+        async with slots:
+            if not await login(f"user{i % args.users}", PASSWORD):
+                raise RuntimeError(f"login of user{i % args.users} failed")
+
+    watcher = asyncio.create_task(watch_loop())
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.logins)))
+    elapsed = time.perf_counter() - start
+    running = False
+    await watcher
+    return args.logins / elapsed, max_lag * 1000
+
+
+async def main(args: argparse.Namespace) -> None:
+    directory = build_directory(args.users)
+    if args.latency_ms:
+        add_latency(args.latency_ms / 1000)
+    client = LDAPClient(
+        directory,
+        search_base=BASE,
+        user_filter="(uid={username})",
+        bind_dn=SERVICE_DN,
+        bind_password=SERVICE_PASSWORD,
+        pool_size=args.pool_size,
+        client_strategy=MOCK_SYNC,
+    )
+    await client.open()
+    assert not await client_login(client, "user0", "wrong-password")
+
+    async def legacy(username: str, password: str) -> bool:
+        return legacy_login(directory, username, password)
+
+    print(f"{'implementation':<16} {'logins/s':>10} {'max loop lag ms':>16}")
+    for name, login in (
+        ("per-login", legacy),
+        ("pooled client", functools.partial(client_login, client)),
+    ):
+        rate, lag = await measure(login, args)
+        print(f"{name:<16} {rate:10.0f} {lag:16.1f}")
+    await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--logins", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,20 @@
+"""
+HTTP load test of a running server with a mix of realistic scenarios.
+
+Virtual users (--concurrency) loop for --duration seconds over weighted
+scenarios: logging in, listing items on first and deep pages, searching items,
+creating, reading, updating and deleting an item, listing users as the admin
+and signing up. Before the run, --users accounts with --items-per-user items
+each are made through the API as the first superuser, and they are deleted
+afterwards unless --keep.
+
+Reports throughput and latency percentiles per operation, writes them as JSON
+with --output and, given a --baseline results file, exits with 1 if any
+operation got slower or failed more than --tolerance allows.
+
+Start the server with the rate limits off, or logins and signups get 429s:
+
+    RATE_LIMIT_ENABLED=false uv run fastapi run src/main.py
+    uv run python -m benchmarks.loadtest --duration 60 --output before.json
+    uv run python -m benchmarks.loadtest --duration 60 --baseline before.json
+"""
@@ -0,0 +1,134 @@
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from benchmarks.loadtest import __doc__ as doc
+from benchmarks.loadtest.scenarios import (
+    SCENARIOS,
+    Account,
+    Context,
+    cleanup,
+    login,
+    pick_scenario,
+    setup,
+)
+from benchmarks.loadtest.stats import build_results, compare, print_results, save_results
+from src.config import settings
+
+
+async def virtual_user(ctx: Context, deadline: float) -> None:
+    while time.monotonic() < deadline:
+        await pick_scenario(ctx.rng)(ctx)
+
+
+async def main(args: argparse.Namespace) -> int:
+    base_url = args.base_url.rstrip("/") + settings.API_V1_STR
+    limits = httpx.Limits(
+        max_connections=args.concurrency, max_keepalive_connections=args.concurrency
+    )
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=args.timeout
+    ) as client:
+        ctx = Context(
+            client=client,
+            admin=Account(id="", email=args.admin_email),
+            accounts=[],
+            operations={},
+            rng=random.Random(args.seed),
+            items_per_user=args.items_per_user,
+            run_id=uuid.uuid4().hex[:8],
+        )
+        token = await login(ctx, args.admin_email, args.admin_password)
+        if token is None:
+            print(f"Could not log in as {args.admin_email}", file=sys.stderr)
+            return 2
+        ctx.admin.token = token
+        print(f"Setting up {args.users} users with {args.items_per_user} items each")
+        try:
+            await setup(ctx, args.users)
+            print(f"Running {args.concurrency} virtual users for {args.duration}s")
+            start = time.monotonic()
+            await asyncio.gather(
+                *(
+                    virtual_user(ctx, start + args.duration)
+                    for _ in range(args.concurrency)
+                )
+            )
+            elapsed = time.monotonic() - start
+        finally:
+            if not args.keep:
+                await cleanup(ctx)
+
+    results = build_results(
+        ctx.operations,
+        elapsed,
+        {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "base_url": args.base_url,
+            "concurrency": args.concurrency,
+            "users": args.users,
+            "items_per_user": args.items_per_user,
+            "seed": args.seed,
+            "scenarios": {name: weight for name, (_, weight) in SCENARIOS.items()},
+            "python": platform.python_version(),
+        },
+    )
+    print_results(results)
+    rate_limited = sum(op.rate_limited for op in ctx.operations.values())
+    if rate_limited:
+        print(f"{rate_limited} responses were 429, run the server with RATE_LIMIT_ENABLED=false")
+    if args.output:
+        save_results(results, args.output)
+        print(f"Results written to {args.output}")
+
+    if args.baseline is None:
+        return 0
+    regressions = compare(
+        results,
+        json.loads(args.baseline.read_text()),
+        tolerance=args.tolerance,
+        min_delta_ms=args.min_delta_ms,
+        min_count=args.min_count,
+    )
+    if not regressions:
+        print(f"No regression against {args.baseline} (tolerance {args.tolerance:.0%})")
+        return 0
+    print(f"Regressions against {args.baseline} (tolerance {args.tolerance:.0%}):")
+    for regression in regressions:
+        print(f"  {regression}")
+    return 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=doc.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds")
+    parser.add_argument("--concurrency", type=int, default=20, help="virtual users")
+    parser.add_argument("--users", type=int, default=20, help="accounts to set up")
+    parser.add_argument("--items-per-user", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=30.0, help="per request, seconds")
+    parser.add_argument("--admin-email", default=settings.FIRST_SUPERUSER)
+    parser.add_argument("--admin-password", default=settings.FIRST_SUPERUSER_PASSWORD)
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    parser.add_argument("--baseline", type=Path, help="results JSON to compare with")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.1, help="allowed fraction of change, 0.1 for 10%%"
+    )
+    parser.add_argument(
+        "--min-delta-ms", type=float, default=2.0, help="ignore smaller p95 increases"
+    )
+    parser.add_argument(
+        "--min-count", type=int, default=20, help="skip operations with fewer requests"
+    )
+    parser.add_argument("--keep", action="store_true", help="keep the users and items")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,216 @@
+"""
+The scenario mix: what a virtual user does on each iteration, and the data
+the run sets up and removes.
+
+Every request is timed and recorded under an operation name, the scenario
+picked on each iteration is drawn by weight from `SCENARIOS`.
+"""
+
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+
+from benchmarks.loadtest.stats import Operation
+
+EMAIL_DOMAIN = "loadtest.example.com"
+PASSWORD = "loadtest-password"
+SEARCH_TERMS = ("report", "invoice", "draft", "notes", "plan", "zzz-no-match")
+TITLE_WORDS = ("report", "invoice", "draft", "notes", "plan", "summary", "budget", "review")
+SORT_FIELDS = ("created_at", "updated_at", "title")
+
+
+@dataclass
+class Account:
+    id: str
+    email: str
+    token: str = ""
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+@dataclass
+class Context:
+    client: httpx.AsyncClient
+    admin: Account
+    accounts: list[Account]
+    operations: dict[str, Operation]
+    rng: random.Random
+    items_per_user: int
+    # Unique per run, deleted users linger until purged
+    run_id: str
+    # Users made by the signup scenario, removed at cleanup
+    signed_up: list[str] = field(default_factory=list)
+
+    async def request(
+        self, operation: str, method: str, url: str, **kwargs: Any
+    ) -> httpx.Response | None:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        elapsed = time.perf_counter() - start
+        self.operations.setdefault(operation, Operation()).record(
+            elapsed, response.status_code if response is not None else None
+        )
+        return response
+
+
+def item_title(rng: random.Random) -> str:
+    return " ".join(rng.choices(TITLE_WORDS, k=3))
+
+
+async def login(ctx: Context, email: str, password: str = PASSWORD) -> str | None:
+    response = await ctx.request(
+        "login",
+        "POST",
+        "/auth/access-token",
+        data={"username": email, "password": password},
+    )
+    if response is None or response.status_code != 200:
+        return None
+    return response.json()["access_token"]
+
+
+async def scenario_login(ctx: Context) -> None:
+    await login(ctx, ctx.rng.choice(ctx.accounts).email)
+
+
+async def scenario_list_items(ctx: Context) -> None:
+    account = ctx.rng.choice(ctx.accounts)
+    size = ctx.rng.choice((10, 20, 50))
+    pages = max(ctx.items_per_user // size, 1)
+    # Mostly the first page, like a UI would, sometimes far into the list
+    if ctx.rng.random() < 0.7:
+        operation, page = "list_items_first", 1
+    else:
+        operation, page = "list_items_deep", ctx.rng.randint(max(pages // 2, 1), pages)
+    await ctx.request(
+        operation,
+        "GET",
+        "/items/",
+        params={
+            "page": page,
+            "size": size,
+            "sort_by": ctx.rng.choice(SORT_FIELDS),
+            "sort_order": ctx.rng.choice(("asc", "desc")),
+        },
+        headers=account.headers,
+    )
+
+
+async def scenario_search_items(ctx: Context) -> None:
+    account = ctx.rng.choice(ctx.accounts)
+    await ctx.request(
+        "search_items",
+        "GET",
+        "/items/",
+        params={"search": ctx.rng.choice(SEARCH_TERMS), "size": 20},
+        headers=account.headers,
+    )
+
+
+async def scenario_item_crud(ctx: Context) -> None:
+    account = ctx.rng.choice(ctx.accounts)
+    response = await ctx.request(
+        "item_create",
+        "POST",
+        "/items/",
+        json={"title": item_title(ctx.rng), "description": "load test"},
+        headers=account.headers,
+    )
+    if response is None or response.status_code != 200:
+        return
+    item_id = response.json()["id"]
+    await ctx.request("item_read", "GET", f"/items/{item_id}", headers=account.headers)
+    await ctx.request(
+        "item_update",
+        "PUT",
+        f"/items/{item_id}",
+        json={"title": item_title(ctx.rng)},
+        headers=account.headers,
+    )
+    await ctx.request("item_delete", "DELETE", f"/items/{item_id}", headers=account.headers)
+
+
+async def scenario_admin_users(ctx: Context) -> None:
+    params: dict[str, Any] = {"page": ctx.rng.randint(1, 3), "size": 20}
+    if ctx.rng.random() < 0.5:
+        params["search"] = "loadtest"
+    await ctx.request("admin_users", "GET", "/users/", params=params, headers=ctx.admin.headers)
+
+
+async def scenario_signup(ctx: Context) -> None:
+    email = f"signup-{ctx.run_id}-{ctx.rng.getrandbits(48):012x}@{EMAIL_DOMAIN}"
+    response = await ctx.request(
+        "signup",
+        "POST",
+        "/users/signup",
+        json={"email": email, "password": PASSWORD, "full_name": "Load Test"},
+    )
+    if response is not None and response.status_code == 200:
+        ctx.signed_up.append(response.json()["id"])
+
+
+# name -> (scenario, weight)
+SCENARIOS: dict[str, tuple[Callable[[Context], Awaitable[None]], int]] = {
+    "login": (scenario_login, 10),
+    "list_items": (scenario_list_items, 40),
+    "search_items": (scenario_search_items, 20),
+    "item_crud": (scenario_item_crud, 15),
+    "admin_users": (scenario_admin_users, 10),
+    "signup": (scenario_signup, 5),
+}
+
+
+def pick_scenario(rng: random.Random) -> Callable[[Context], Awaitable[None]]:
+    scenarios, weights = zip(*SCENARIOS.values())
+    return rng.choices(scenarios, weights)[0]
+
+
+async def setup(ctx: Context, users: int) -> None:
+    """Create `users` accounts through the admin API, log them in and give each their items."""
+    semaphore = asyncio.Semaphore(10)
+
+    async def create_account(index: int) -> None:
+        async with semaphore:
+            email = f"user-{ctx.run_id}-{index}@{EMAIL_DOMAIN}"
+            response = await ctx.client.post(
+                "/users/",
+                json={"email": email, "password": PASSWORD, "full_name": "Load Test"},
+                headers=ctx.admin.headers,
+            )
+            response.raise_for_status()
+            account = Account(id=response.json()["id"], email=email)
+            token = await login(ctx, email)
+            if token is None:
+                raise RuntimeError(f"Could not log in as {email}")
+            account.token = token
+            for _ in range(ctx.items_per_user):
+                response = await ctx.client.post(
+                    "/items/",
+                    json={"title": item_title(ctx.rng), "description": "load test"},
+                    headers=account.headers,
+                )
+                response.raise_for_status()
+            ctx.accounts.append(account)
+
+    await asyncio.gather(*(create_account(index) for index in range(users)))
+    # Creation order varies, picks from the list must not
+    ctx.accounts.sort(key=lambda account: account.email)
+    # The setup logins are not part of the measured run
+    ctx.operations.clear()
+
+
+async def cleanup(ctx: Context) -> None:
+    """Delete the accounts made by the run, the server purges their items in the background."""
+    user_ids = [account.id for account in ctx.accounts] + ctx.signed_up
+    for user_id in user_ids:
+        await ctx.client.delete(f"/users/{user_id}", headers=ctx.admin.headers)
@@ -0,0 +1,117 @@
+"""Latency recording, the results file and the comparison with a baseline."""
+
+import json
+import math
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+@dataclass
+class Operation:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    rate_limited: int = 0
+
+    def record(self, seconds: float, status: int | None) -> None:
+        self.latencies.append(seconds)
+        if status == 429:
+            self.rate_limited += 1
+        if status is None or status >= 400:
+            self.errors += 1
+
+
+def percentile(ordered: list[float], p: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    if not ordered:
+        return 0.0
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict[str, Any]:
+    ordered = sorted(latencies)
+    count = len(ordered)
+    summary: dict[str, Any] = {
+        "count": count,
+        "errors": errors,
+        "error_rate": errors / count if count else 0.0,
+        "rps": count / elapsed if elapsed else 0.0,
+        "mean_ms": sum(ordered) / count * 1000 if count else 0.0,
+    }
+    for p in PERCENTILES:
+        summary[f"p{p}_ms"] = percentile(ordered, p) * 1000
+    summary["max_ms"] = ordered[-1] * 1000 if ordered else 0.0
+    return summary
+
+
+def build_results(
+    operations: dict[str, Operation], elapsed: float, meta: dict[str, Any]
+) -> dict[str, Any]:
+    return {
+        "meta": {**meta, "elapsed_seconds": elapsed},
+        "total": summarize(
+            [latency for op in operations.values() for latency in op.latencies],
+            sum(op.errors for op in operations.values()),
+            elapsed,
+        ),
+        "operations": {
+            name: summarize(op.latencies, op.errors, elapsed)
+            for name, op in sorted(operations.items())
+        },
+    }
+
+
+def print_results(results: dict[str, Any]) -> None:
+    header = f"{'operation':<22} {'count':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"
+    print(header)
+    print("-" * len(header))
+    rows = [*results["operations"].items(), ("total", results["total"])]
+    for name, s in rows:
+        print(
+            f"{name:<22} {s['count']:>7} {s['errors']:>5} {s['rps']:>8.1f}"
+            f" {s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} {s['p99_ms']:>8.1f} {s['max_ms']:>8.1f}"
+        )
+    print("(latencies in ms)")
+
+
+def save_results(results: dict[str, Any], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2) + "\n")
+
+
+def compare(
+    results: dict[str, Any],
+    baseline: dict[str, Any],
+    *,
+    tolerance: float,
+    min_delta_ms: float,
+    min_count: int,
+) -> list[str]:
+    """
+    Regressions against the baseline: p95 latency up or throughput down by more
+    than `tolerance` (a fraction), or the error rate up by more than one point.
+    Latency changes under `min_delta_ms` are noise for fast operations, and
+    operations with fewer than `min_count` requests in the baseline too few to tell.
+    """
+    regressions = []
+    current_ops = {**results["operations"], "total": results["total"]}
+    baseline_ops = {**baseline["operations"], "total": baseline["total"]}
+    for name, base in baseline_ops.items():
+        current = current_ops.get(name)
+        if current is None:
+            regressions.append(f"{name}: missing from this run")
+            continue
+        if base["count"] < min_count:
+            continue
+        p95, base_p95 = current["p95_ms"], base["p95_ms"]
+        if p95 > base_p95 * (1 + tolerance) and p95 - base_p95 >= min_delta_ms:
+            regressions.append(f"{name}: p95 {base_p95:.1f} -> {p95:.1f} ms")
+        if current["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {base['rps']:.1f} -> {current['rps']:.1f} rps")
+        if current["error_rate"] > base["error_rate"] + 0.01:
+            regressions.append(
+                f"{name}: error rate {base['error_rate']:.1%} -> {current['error_rate']:.1%}"
+            )
+    return regressions
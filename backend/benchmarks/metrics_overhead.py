@@ -0,0 +1,101 @@
+"""
+Per-request cost of the Prometheus instrumentation and the Server-Timing header.
+
+Calls a minimal FastAPI app directly through ASGI (no server, no HTTP client)
+without instrumentation, with `MetricsMiddleware`, and with
+`ServerTimingMiddleware` and `TimedRoute`, alternating, and reports the best of
+--rounds and the difference per request. Also times a scrape of /metrics.
+No database needed.
+
+    uv run python -m benchmarks.metrics_overhead [--number 20000]
+"""
+
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from prometheus_client import REGISTRY, generate_latest
+
+from src.core.metrics import MetricsMiddleware
+from src.core.timing import ServerTimingMiddleware, TimedRoute
+
+
+def make_app(instrumentation: str | None) -> FastAPI:
+    app = FastAPI(generate_unique_id_function=lambda route: f"bench-{route.name}")
+    if instrumentation == "server_timing":
+        app.router.route_class = TimedRoute
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int) -> dict:
+        return {"id": item_id}
+
+    if instrumentation == "metrics":
+        app.add_middleware(MetricsMiddleware)
+    elif instrumentation == "server_timing":
+        app.add_middleware(ServerTimingMiddleware)
+    assert isinstance(app.routes[-1], APIRoute)
+    return app
+
+
+async def measure(app: FastAPI, number: int) -> float:
+    """Returns microseconds per request."""
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        pass
+
+    def scope(i: int) -> dict:
+        return {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": f"/items/{i}",
+            "raw_path": f"/items/{i}".encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [],
+            "client": ("127.0.0.1", 1234),
+            "server": ("test", 80),
+            "app": app,
+        }
+
+    for i in range(1000):
+        await app(scope(i), receive, send)
+    start = time.perf_counter()
+    for i in range(number):
+        await app(scope(i), receive, send)
+    return (time.perf_counter() - start) / number * 1e6
+
+
+async def main(number: int, rounds: int) -> None:
+    apps = make_app(None), make_app("metrics"), make_app("server_timing")
+    timings: tuple[list[float], ...] = ([], [], [])
+    for _ in range(rounds):
+        for app, timing in zip(apps, timings):
+            timing.append(await measure(app, number))
+    plain, metrics, server_timing = (min(timing) for timing in timings)
+    print(f"{'uninstrumented':<20} {plain:8.1f} us/request")
+    print(f"{'with metrics':<20} {metrics:8.1f} us/request (+{metrics - plain:.1f})")
+    print(
+        f"{'with server timing':<20} {server_timing:8.1f} us/request"
+        f" (+{server_timing - plain:.1f})"
+    )
+
+    start = time.perf_counter()
+    for _ in range(100):
+        generate_latest(REGISTRY)
+    print(f"{'/metrics scrape':<20} {(time.perf_counter() - start) * 10:8.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=20_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.number, args.rounds))
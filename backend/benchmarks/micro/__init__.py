@@ -0,0 +1,16 @@
+"""
+Micro-benchmarks of the functions that run on every request or login, with
+pytest-benchmark.
+
+Every run is saved under `.benchmarks/` (one JSON file per run, named after the
+commit), so the history of each function can be listed and compared:
+
+    uv run pytest benchmarks/micro
+    uv run pytest benchmarks/micro --benchmark-compare --benchmark-compare-fail=median:10%
+    uv run pytest-benchmark compare --group-by=name --columns=median,ops
+
+`--benchmark-compare` compares with the latest saved run, or the one given, and
+`--benchmark-compare-fail` makes the run fail when a function got slower. Keep
+`.benchmarks/` between CI runs (cache or artifact) to track the trend per
+function before deploying.
+"""
@@ -0,0 +1,15 @@
+import pytest
+
+from src.config import parse_cors
+
+ORIGINS = "http://localhost, http://localhost:5173, https://example.com, https://app.example.com"
+
+
+@pytest.mark.benchmark(group="config")
+def bench_parse_cors_string(benchmark):
+    assert len(benchmark(parse_cors, ORIGINS)) == 4
+
+
+@pytest.mark.benchmark(group="config")
+def bench_parse_cors_list(benchmark):
+    benchmark(parse_cors, '["http://localhost", "https://example.com"]')
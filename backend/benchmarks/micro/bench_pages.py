@@ -0,0 +1,35 @@
+import pytest
+
+from benchmarks.micro.conftest import make_items, make_users
+from src.routes.items.models import ItemsPublic
+from src.routes.users.models import UsersPublic
+
+SIZES = [10, 100]
+
+
+@pytest.mark.benchmark(group="pages")
+@pytest.mark.parametrize("size", SIZES)
+def bench_items_public(benchmark, now, size):
+    items = make_items(size, now)
+    benchmark(ItemsPublic, data=items, page=1, size=size, total=10_000, pages=100)
+
+
+@pytest.mark.benchmark(group="pages")
+@pytest.mark.parametrize("size", SIZES)
+def bench_items_public_json(benchmark, now, size):
+    page = ItemsPublic(data=make_items(size, now), page=1, size=size, total=10_000, pages=100)
+    benchmark(page.model_dump_json)
+
+
+@pytest.mark.benchmark(group="pages")
+@pytest.mark.parametrize("size", SIZES)
+def bench_users_public(benchmark, now, size):
+    users = make_users(size, now)
+    benchmark(UsersPublic, data=users, page=1, size=size, total=10_000, pages=100)
+
+
+@pytest.mark.benchmark(group="pages")
+@pytest.mark.parametrize("size", SIZES)
+def bench_users_public_json(benchmark, now, size):
+    page = UsersPublic(data=make_users(size, now), page=1, size=size, total=10_000, pages=100)
+    benchmark(page.model_dump_json)
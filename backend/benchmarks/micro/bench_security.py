@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+import pytest
+
+from src.core.security import create_access_token, get_password_hash, verify_password
+from src.routes.deps import decode_access_token
+
+SUBJECT = "6f1c4f6e-3c1b-4b7e-9a51-2d5d0f6e8a10"
+PASSWORD = "correct horse battery staple"
+
+
+@pytest.mark.benchmark(group="jwt")
+def bench_create_access_token(benchmark):
+    benchmark(create_access_token, SUBJECT, timedelta(minutes=30))
+
+
+@pytest.mark.benchmark(group="jwt")
+def bench_decode_access_token(benchmark):
+    token = create_access_token(SUBJECT, timedelta(minutes=30))
+    assert benchmark(decode_access_token, token).sub == SUBJECT
+
+
+# bcrypt takes tens to hundreds of milliseconds per call, a few rounds are enough
+@pytest.mark.benchmark(group="password")
+def bench_get_password_hash(benchmark):
+    benchmark.pedantic(get_password_hash, args=(PASSWORD,), rounds=10, warmup_rounds=1)
+
+
+@pytest.mark.benchmark(group="password")
+def bench_verify_password(benchmark):
+    hashed = get_password_hash(PASSWORD)
+    assert benchmark.pedantic(
+        verify_password, args=(PASSWORD, hashed), rounds=10, warmup_rounds=1
+    )
@@ -0,0 +1,35 @@
+import itertools
+import uuid
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.routes.items.models import ItemSortField, SortOrder
+from src.routes.items.service import read_items_statements
+
+DIALECT = postgresql.asyncpg.dialect()
+
+
+def build_and_compile(**kwargs) -> None:
+    for statement in read_items_statements(**kwargs):
+        statement.compile(dialect=DIALECT)
+
+
+# Building both statements and compiling them, as done for a cache miss of the
+# compiled statement cache. Each combination is a separate cache entry.
+@pytest.mark.benchmark(group="read_items statements")
+@pytest.mark.parametrize(
+    "sort_by, sort_order, search",
+    list(itertools.product(ItemSortField, SortOrder, [None, "report"])),
+    ids=lambda value: getattr(value, "value", value) or "no-search",
+)
+def bench_read_items_statements(benchmark, sort_by, sort_order, search):
+    benchmark(
+        build_and_compile,
+        owner_id=uuid.uuid4(),
+        search=search,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        offset=40,
+        limit=20,
+    )
@@ -0,0 +1,43 @@
+import uuid
+from datetime import datetime
+
+import pytest
+
+from src.main import app  # noqa: F401  (configures the mappers)
+from src.routes.items.models import Item
+from src.routes.users.models import User
+
+
+@pytest.fixture(scope="session")
+def now() -> datetime:
+    return datetime.utcnow()
+
+
+def make_items(size: int, now: datetime) -> list[Item]:
+    owner_id = uuid.uuid4()
+    return [
+        Item(
+            id=uuid.uuid4(),
+            owner_id=owner_id,
+            title=f"Item {i}",
+            description="Lorem ipsum dolor sit amet, consectetur adipiscing elit " * 2,
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(size)
+    ]
+
+
+def make_users(size: int, now: datetime) -> list[User]:
+    return [
+        User(
+            id=uuid.uuid4(),
+            email=f"user{i}@example.com",
+            username=f"user{i}",
+            full_name=f"User Number {i}",
+            hashed_password="x",
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(size)
+    ]
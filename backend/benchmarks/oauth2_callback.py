@@ -0,0 +1,210 @@
+"""
+OAuth2 callback provider round trips.
+
+Starts a stub provider on a local port, each endpoint answering after
+--latency-ms, and runs the provider half of the callbacks against it:
+
+- GitHub (token, /user, /user/emails): the previous implementation (blocking
+  calls, a new connection each, /user/emails after /user) versus
+  `fetch_github_user` on the shared pool. The stub serves a profile without a
+  public email, the case that needs both calls.
+- Google (OIDC discovery, JWKS, token, userinfo): token exchange plus the
+  userinfo call versus `fetch_google_user`, which verifies the signed ID token
+  of the token response against the cached JWKS.
+
+Reports logins per second, mean latency and how many TCP connections the
+provider saw. No database needed.
+
+    uv run python -m benchmarks.oauth2_callback --logins 200 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import jwt
+import uvicorn
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import FastAPI, Request
+
+from src.config import settings
+from src.core.http import close_http_transport, oauth2_client
+from src.routes.oauth2.service import fetch_github_user, fetch_google_user
+
+CLIENT_ID = "bench"
+GOOGLE_ISSUER = "https://accounts.google.com"
+
+
+def stub_provider(latency: float) -> tuple[FastAPI, set]:
+    provider = FastAPI()
+    connections: set = set()
+    signing_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    public_jwk = jwt.algorithms.RSAAlgorithm.to_jwk(signing_key.public_key(), as_dict=True)
+
+    @provider.middleware("http")
+    async def delay(request: Request, call_next):
+        connections.add(request.scope["client"])
+        await asyncio.sleep(latency)
+        return await call_next(request)
+
+    @provider.post("/login/oauth/access_token")
+    async def token() -> dict:
+        return {"access_token": "stub-token", "token_type": "bearer", "scope": "user:email"}
+
+    @provider.get("/user")
+    async def user() -> dict:
+        return {"id": 1, "login": "octocat", "name": "Octo Cat", "email": None}
+
+    @provider.get("/user/emails")
+    async def emails() -> list:
+        return [{"email": "octocat@bench.invalid", "primary": True, "verified": True}]
+
+    @provider.get("/.well-known/openid-configuration")
+    async def discovery(request: Request) -> dict:
+        base_url = str(request.base_url).rstrip("/")
+        return {
+            "issuer": GOOGLE_ISSUER,
+            "token_endpoint": f"{base_url}/token",
+            "userinfo_endpoint": f"{base_url}/oauth2/v2/userinfo",
+            "jwks_uri": f"{base_url}/oauth2/v3/certs",
+            "id_token_signing_alg_values_supported": ["RS256"],
+        }
+
+    @provider.get("/oauth2/v3/certs")
+    async def certs() -> dict:
+        return {"keys": [{**public_jwk, "kid": "bench", "use": "sig", "alg": "RS256"}]}
+
+    @provider.post("/token")
+    async def google_token() -> dict:
+        now = datetime.now(timezone.utc)
+        claims = {
+            "iss": GOOGLE_ISSUER,
+            "aud": CLIENT_ID,
+            "sub": "1",
+            "email": "googler@bench.invalid",
+            "email_verified": True,
+            "name": "Goo Gler",
+            "iat": now,
+            "exp": now + timedelta(hours=1),
+        }
+        id_token = jwt.encode(claims, signing_key, algorithm="RS256", headers={"kid": "bench"})
+        return {"access_token": "stub-token", "token_type": "Bearer", "id_token": id_token}
+
+    @provider.get("/oauth2/v2/userinfo")
+    async def userinfo() -> dict:
+        return {"id": "1", "email": "googler@bench.invalid", "name": "Goo Gler"}
+
+    return provider, connections
+
+
+def serve_in_thread(app: FastAPI, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def legacy_fetch_github_user(code: str) -> str:
+    """The provider calls before the shared client, blocking the caller."""
+    with httpx.Client() as client:
+        token = client.post(
+            settings.GITHUB_TOKEN_URL,
+            data={"code": code, "client_id": "bench", "client_secret": "bench"},
+            headers={"Accept": "application/json"},
+        ).json()
+    headers = {"Authorization": f"token {token['access_token']}"}
+    with httpx.Client() as client:
+        user_info = client.get(f"{settings.GITHUB_API_URL}/user", headers=headers).json()
+    email = user_info.get("email")
+    if not email:
+        with httpx.Client() as client:
+            emails = client.get(
+                f"{settings.GITHUB_API_URL}/user/emails", headers=headers
+            ).json()
+        email = emails[0]["email"]
+    return email
+
+
+async def userinfo_fetch_google_user(code: str) -> str:
+    """The Google calls before local ID token verification."""
+    async with oauth2_client(
+        client_id=CLIENT_ID, client_secret=CLIENT_ID, token_endpoint_auth_method="client_secret_post"
+    ) as client:
+        await client.fetch_token(settings.GOOGLE_TOKEN_URL, code=code)
+        response = await client.get(settings.GOOGLE_USERINFO_URL)
+        return response.json()["email"]
+
+
+async def measure(login, args: argparse.Namespace, connections: set) -> tuple[float, float, int]:
+    """Returns (logins per second, mean latency in ms, connections opened)."""
+    connections.clear()
+    slots = asyncio.Semaphore(args.concurrency)
+    latencies: list[float] = []
+
+    async def one() -> None:
+        async with slots:
+            start = time.perf_counter()
+            await login()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.logins)))
+    elapsed = time.perf_counter() - start
+    return args.logins / elapsed, sum(latencies) / len(latencies) * 1000, len(connections)
+
+
+async def main(args: argparse.Namespace) -> None:
+    provider, connections = stub_provider(args.latency_ms / 1000)
+    server = serve_in_thread(provider, args.port)
+    base_url = f"http://127.0.0.1:{args.port}"
+    settings.GITHUB_CLIENT_ID = settings.GITHUB_CLIENT_SECRET = CLIENT_ID
+    settings.GITHUB_TOKEN_URL = f"{base_url}/login/oauth/access_token"
+    settings.GITHUB_API_URL = base_url
+    settings.GOOGLE_CLIENT_ID = settings.GOOGLE_CLIENT_SECRET = CLIENT_ID
+    settings.GOOGLE_TOKEN_URL = f"{base_url}/token"
+    settings.GOOGLE_USERINFO_URL = f"{base_url}/oauth2/v2/userinfo"
+    settings.GOOGLE_DISCOVERY_URL = f"{base_url}/.well-known/openid-configuration"
+
+    async def legacy() -> None:
+        legacy_fetch_github_user("stub-code")
+
+    async def github() -> None:
+        await fetch_github_user("stub-code")
+
+    async def userinfo() -> None:
+        await userinfo_fetch_google_user("stub-code")
+
+    async def google() -> None:
+        await fetch_google_user("stub-code")
+
+    # The first Google login fetches discovery and JWKS, as the lifespan
+    # warm up would
+    await google()
+
+    print(f"{'implementation':<22} {'logins/s':>9} {'mean ms':>8} {'connections':>12}")
+    for name, login in (
+        ("github per-call", legacy),
+        ("github shared pool", github),
+        ("google userinfo", userinfo),
+        ("google id_token", google),
+    ):
+        rate, mean, opened = await measure(login, args, connections)
+        print(f"{name:<22} {rate:9.1f} {mean:8.1f} {opened:12d}")
+
+    await close_http_transport()
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--port", type=int, default=8765)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,73 @@
+"""
+Per-request overhead of the login rate limits.
+
+Times `enforce_rate_limit` with the login rules (per IP and per login) against
+the memory store, spread over --keys distinct clients so requests stay under
+the limits, and against the postgres store with --postgres (needs the
+database, the counters are removed afterwards).
+
+    uv run python -m benchmarks.rate_limit [--number 100000] [--postgres]
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlmodel import col, delete
+from starlette.requests import Request
+
+from src.config import settings
+from src.core import ratelimit
+from src.database import async_session, engine
+from src.routes.models import RateLimitCounter
+
+
+def make_requests(keys: int) -> list[Request]:
+    return [
+        Request({"type": "http", "client": (f"10.{i // 65536}.{i // 256 % 256}.{i % 256}", 1)})
+        for i in range(keys)
+    ]
+
+
+async def measure(requests: list[Request], number: int) -> float:
+    """Returns microseconds per request."""
+    start = time.perf_counter()
+    for i in range(number):
+        await ratelimit.enforce_rate_limit(
+            requests[i % len(requests)],
+            "bench",
+            per_ip=settings.RATE_LIMIT_LOGIN_PER_IP,
+            per_identifier=settings.RATE_LIMIT_LOGIN_PER_IDENTIFIER,
+            identifier=f"user{i % len(requests)}@example.com",
+        )
+    return (time.perf_counter() - start) / number * 1e6
+
+
+async def main(args: argparse.Namespace) -> None:
+    # Stay under the per client limits, the point is the cost of counting
+    settings.RATE_LIMIT_LOGIN_PER_IP = settings.RATE_LIMIT_LOGIN_PER_IDENTIFIER = "1000000/minute"
+    requests = make_requests(args.keys)
+
+    settings.RATE_LIMIT_BACKEND = "memory"
+    ratelimit._store = None
+    print(f"{'memory store':<16} {await measure(requests, args.number):10.2f} us/request")
+
+    if args.postgres:
+        engine.echo = False
+        settings.RATE_LIMIT_BACKEND = "postgres"
+        ratelimit._store = None
+        number = min(args.number, 5000)
+        print(f"{'postgres store':<16} {await measure(requests, number):10.2f} us/request")
+        async with async_session() as session:
+            await session.exec(
+                delete(RateLimitCounter).where(col(RateLimitCounter.key).startswith("bench:"))
+            )
+            await session.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=100_000)
+    parser.add_argument("--keys", type=int, default=10_000)
+    parser.add_argument("--postgres", action="store_true")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,246 @@
+"""
+Synthetic users and items at scale, for performance work on realistic volumes.
+
+Generates --users users and --items items and loads them with COPY. Items are
+spread over owners with a Zipf distribution (--skew, 0 for uniform), so a few
+heavy users own most of them, like in production. Titles and descriptions are
+drawn from a vocabulary with Zipf word frequencies, within --title-words and
+--description-words, and timestamps fall within the --days before --until,
+items after their owner's creation.
+
+The data only depends on --seed and the options: ids are derived from the row
+number, and users and items come from separate random streams, so changing
+--items keeps the same users. --reset first removes the previously seeded data,
+which puts the database back into a known state. Seeded emails are under
+@seed.example.com and every seeded user has the password --password, hashed once.
+
+    uv run python -m benchmarks.seed --users 1000000 --items 50000000 --reset
+    uv run python -m benchmarks.seed --cleanup
+"""
+
+import argparse
+import asyncio
+import bisect
+import itertools
+import logging
+import random
+import time
+from array import array
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+from typing import Any
+
+from passlib.utils.binary import bcrypt64
+
+from benchmarks.user_search import FIRST_NAMES, LAST_NAMES
+from src.config import settings
+from src.core.security import pwd_context
+from src.database import engine
+
+SEED_DOMAIN = "seed.example.com"
+EPOCH = datetime(1970, 1, 1)
+MAX_TEXT_LENGTH = 255
+# Texts are slices of one stream of words drawn up front, a random call per
+# text instead of a weighted draw per word
+WORD_STREAM_LENGTH = 1 << 20
+# Odd multiplier, makes i -> i * K mod 2**62 a permutation of the row numbers
+ID_MULTIPLIER = 0x2545F4914F6CDD1D
+ID_MASK = (1 << 62) - 1
+
+WORDS = (
+    "report invoice meeting notes plan draft budget review summary project task "
+    "order customer contract proposal design release bug feature roadmap sprint "
+    "backlog estimate quote payment receipt shipment delivery supplier inventory "
+    "audit policy training onboarding hiring interview feedback survey research "
+    "analysis forecast target metric dashboard incident outage postmortem deploy "
+    "migration backup restore archive license renewal warranty support ticket "
+    "request approval signature template checklist agenda minutes presentation "
+    "workshop conference travel expense reimbursement schedule deadline milestone "
+    "launch campaign newsletter webinar partner vendor catalog pricing discount "
+    "refund complaint escalation quarterly annual monthly weekly internal external "
+    "urgent pending final revised"
+).split()
+
+USER_COLUMNS = (
+    "id", "email", "username", "full_name", "is_active", "is_superuser",
+    "hashed_password", "auth_source", "created_at", "updated_at",
+)
+ITEM_COLUMNS = ("id", "owner_id", "title", "description", "created_at", "updated_at")
+
+
+def zipf_cum_weights(n: int, skew: float) -> array:
+    """Cumulative weights of ranks 1..n with weight 1/rank**skew."""
+    return array("d", itertools.accumulate(1 / rank**skew for rank in range(1, n + 1)))
+
+
+def password_hash(password: str, seed: int) -> str:
+    """bcrypt hash shared by the seeded users, salted from the seed so reruns match."""
+    salt = bcrypt64.encode_bytes(random.Random(f"{seed}-password").randbytes(16)).decode()
+    return pwd_context.handler().using(salt=salt).hash(password)
+
+
+def row_id(prefix: int, number: int) -> str:
+    """A version 4 looking uuid, unique per row number, without storing any."""
+    low = (number * ID_MULTIPLIER) & ID_MASK | (1 << 63)
+    high = prefix & ~(0xF << 12) | (4 << 12)
+    return f"{(high << 64 | low):032x}"
+
+
+class Generator:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        id_rng = random.Random(f"{args.seed}-ids")
+        self.user_prefix = id_rng.getrandbits(64)
+        self.item_prefix = id_rng.getrandbits(64)
+        self.until = (args.until - EPOCH).total_seconds()
+        self.since = self.until - args.days * 86400
+        word_rng = random.Random(f"{args.seed}-words")
+        self.word_stream = word_rng.choices(
+            WORDS, cum_weights=zipf_cum_weights(len(WORDS), 1.0), k=WORD_STREAM_LENGTH
+        )
+        # Owner creation times, items must not be older than their owner
+        self.user_created = array("d")
+
+    def words(self, rng: random.Random, low: int, high: int) -> str | None:
+        # Scaling random() is several times faster than randint/randrange
+        count = low + int(rng.random() * (high - low + 1))
+        if not count:
+            return None
+        start = int(rng.random() * (WORD_STREAM_LENGTH - count))
+        return " ".join(self.word_stream[start : start + count])[:MAX_TEXT_LENGTH]
+
+    def timestamps(self, rng: random.Random, since: float) -> tuple[datetime, datetime]:
+        created = since + rng.random() * (self.until - since)
+        updated = created
+        if rng.random() < self.args.updated_fraction:
+            updated += rng.random() * (self.until - created)
+        return EPOCH + timedelta(seconds=created), EPOCH + timedelta(seconds=updated)
+
+    def users(self, hashed_password: str) -> Iterator[tuple[Any, ...]]:
+        rng = random.Random(f"{self.args.seed}-users")
+        for number in range(self.args.users):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            created, updated = self.timestamps(rng, self.since)
+            self.user_created.append((created - EPOCH).total_seconds())
+            yield (
+                row_id(self.user_prefix, number),
+                f"{first}.{last}{number}@{SEED_DOMAIN}".lower(),
+                f"{first[0]}{last}{number}".lower(),
+                f"{first} {last}",
+                rng.random() >= self.args.inactive_fraction,
+                False,
+                hashed_password,
+                "local",
+                created,
+                updated,
+            )
+
+    def items(self) -> Iterator[tuple[Any, ...]]:
+        rng = random.Random(f"{self.args.seed}-items")
+        owner_weights = zipf_cum_weights(self.args.users, self.args.skew)
+        total = owner_weights[-1]
+        last_owner = self.args.users - 1
+        for number in range(self.args.items):
+            owner = bisect.bisect(owner_weights, rng.random() * total, 0, last_owner)
+            created, updated = self.timestamps(rng, self.user_created[owner])
+            yield (
+                row_id(self.item_prefix, number),
+                row_id(self.user_prefix, owner),
+                self.words(rng, *self.args.title_words) or "untitled",
+                self.words(rng, *self.args.description_words),
+                created,
+                updated,
+            )
+
+
+async def copy(
+    conn: Any, table: str, columns: tuple[str, ...], rows: Iterator, chunk: int
+) -> None:
+    """
+    COPY `rows` in batches of `chunk`, generating the next batch in a thread
+    while the database ingests the current one.
+    """
+    loaded = 0
+    start = time.perf_counter()
+    batch = list(itertools.islice(rows, chunk))
+    while batch:
+        next_batch = asyncio.ensure_future(
+            asyncio.to_thread(lambda: list(itertools.islice(rows, chunk)))
+        )
+        await conn.copy_records_to_table(table, records=batch, columns=columns)
+        loaded += len(batch)
+        print(f"{table}: {loaded} rows, {loaded / (time.perf_counter() - start):.0f}/s")
+        batch = await next_batch
+
+
+async def delete_seeded(conn: Any) -> None:
+    pattern = f"%@{SEED_DOMAIN}"
+    await conn.execute(
+        'DELETE FROM item WHERE owner_id IN (SELECT id FROM "user" WHERE email LIKE $1)',
+        pattern,
+    )
+    deleted = await conn.execute('DELETE FROM "user" WHERE email LIKE $1', pattern)
+    print(f"Removed the seeded data ({deleted.split()[-1]} users)")
+
+
+async def main(args: argparse.Namespace) -> None:
+    if settings.ENVIRONMENT == "production":
+        raise SystemExit("Refusing to seed a production database")
+    engine.echo = False
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+    async with engine.connect() as sa_conn:
+        raw = await sa_conn.get_raw_connection()
+        conn = raw.driver_connection
+        async with conn.transaction():
+            if args.reset or args.cleanup:
+                await delete_seeded(conn)
+            if not args.cleanup:
+                existing = await conn.fetchval(
+                    'SELECT count(*) FROM "user" WHERE email LIKE $1', f"%@{SEED_DOMAIN}"
+                )
+                if existing:
+                    raise SystemExit("Seeded data already present, rerun with --reset")
+                generator = Generator(args)
+                # One bcrypt hash for everyone instead of one per user
+                users = generator.users(password_hash(args.password, args.seed))
+                await copy(conn, "user", USER_COLUMNS, users, args.chunk)
+                if args.users:
+                    await copy(conn, "item", ITEM_COLUMNS, generator.items(), args.chunk)
+        await conn.execute('ANALYZE "user"')
+        await conn.execute("ANALYZE item")
+    await engine.dispose()
+
+
+def word_range(value: str) -> tuple[int, int]:
+    low, _, high = value.partition("-")
+    return int(low), int(high or low)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--skew", type=float, default=1.0, help="Zipf exponent of items per owner, 0: uniform"
+    )
+    parser.add_argument("--inactive-fraction", type=float, default=0.02)
+    parser.add_argument("--title-words", type=word_range, default=(1, 6), help="e.g. 1-6")
+    parser.add_argument(
+        "--description-words", type=word_range, default=(0, 30), help="0 for no description"
+    )
+    parser.add_argument("--days", type=int, default=730, help="time span of the timestamps")
+    parser.add_argument(
+        "--until",
+        type=datetime.fromisoformat,
+        default=datetime(2025, 1, 1),
+        help="newest timestamp",
+    )
+    parser.add_argument(
+        "--updated-fraction", type=float, default=0.3, help="rows updated after creation"
+    )
+    parser.add_argument("--password", default="seeded-password")
+    parser.add_argument("--chunk", type=int, default=50_000, help="rows per COPY")
+    parser.add_argument("--reset", action="store_true", help="remove the seeded data first")
+    parser.add_argument("--cleanup", action="store_true", help="only remove the seeded data")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,86 @@
+"""
+Serialization cost of a 100-item `ItemsPublic` page.
+
+Compares FastAPI's default response path (validate against response_model,
+dump to python, encode with stdlib json) with the single-pass fast path of
+`FastJSONRoute` (`model_dump_json`), and orjson when it is installed.
+
+    uv run python -m benchmarks.serialization [--size 100] [--number 2000]
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from src.main import app  # noqa: F401  (configures the mappers)
+from src.routes.items.models import Item, ItemsPublic
+
+
+def make_items(size: int) -> list[Item]:
+    owner_id = uuid.uuid4()
+    now = datetime.utcnow()
+    return [
+        Item(
+            id=uuid.uuid4(),
+            owner_id=owner_id,
+            title=f"Item {i}",
+            description="Lorem ipsum dolor sit amet, consectetur adipiscing elit " * 2,
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(size)
+    ]
+
+
+def make_page(items: list[Item]) -> ItemsPublic:
+    return ItemsPublic(data=items, page=1, size=len(items), total=10_000, pages=100)
+
+
+def report(name: str, seconds: float, number: int) -> None:
+    per_call = seconds / number * 1e6
+    print(f"{name:<40} {per_call:10.1f} us/page  {number / seconds:10.0f} pages/s")
+
+
+async def main(size: int, number: int) -> None:
+    items = make_items(size)
+    field = create_model_field(name="Response", type_=ItemsPublic, mode="serialization")
+
+    start = time.perf_counter()
+    for _ in range(number):
+        make_page(items)
+    report("ItemsPublic construction (both paths)", time.perf_counter() - start, number)
+
+    page = make_page(items)
+    start = time.perf_counter()
+    for _ in range(number):
+        content = await serialize_response(field=field, response_content=page)
+        JSONResponse(content).body
+    report("response_model validation + json", time.perf_counter() - start, number)
+
+    start = time.perf_counter()
+    for _ in range(number):
+        page.model_dump_json()
+    report("model_dump_json (FastJSONRoute)", time.perf_counter() - start, number)
+
+    try:
+        import orjson
+    except ImportError:
+        return
+    start = time.perf_counter()
+    for _ in range(number):
+        orjson.dumps(page.model_dump(mode="json"))
+    report("model_dump + orjson", time.perf_counter() - start, number)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=100)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.size, args.number))
@@ -0,0 +1,77 @@
+"""
+Per-request cost of the OpenTelemetry tracing.
+
+Calls a minimal FastAPI app through ASGI, like `metrics_overhead`, whose
+endpoint opens three client spans as stand-ins for queries and upstream calls.
+Compares tracing disabled with `TracingMiddleware` at 0% head sampling, 0% with
+tail sampling (every span recorded, none kept) and 100%, exporting to an
+in-memory exporter through the regular batch processor. Reports the best of
+--rounds. No database or collector needed.
+
+    uv run python -m benchmarks.tracing_overhead [--number 20000]
+"""
+
+import argparse
+import asyncio
+
+from fastapi import FastAPI
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from benchmarks.metrics_overhead import measure
+from src.config import settings
+from src.core import tracing
+
+# name -> (TRACING_SAMPLE_RATE, TRACING_TAIL_SAMPLING), None for disabled
+CONFIGS: dict[str, tuple[float, bool] | None] = {
+    "disabled": None,
+    "0%": (0.0, False),
+    "0% + tail": (0.0, True),
+    "100%": (1.0, False),
+}
+
+
+def make_app(traced: bool) -> FastAPI:
+    app = FastAPI(generate_unique_id_function=lambda route: f"bench-{route.name}")
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int) -> dict:
+        for operation in ("SELECT", "SELECT", "UPDATE"):
+            with tracing.client_span(operation):
+                pass
+        return {"id": item_id}
+
+    if traced:
+        app.add_middleware(tracing.TracingMiddleware)
+    return app
+
+
+async def main(number: int, rounds: int) -> None:
+    apps = {traced: make_app(traced) for traced in (False, True)}
+    timings: dict[str, list[float]] = {name: [] for name in CONFIGS}
+    exported: dict[str, int] = {}
+    for _ in range(rounds):
+        for name, config in CONFIGS.items():
+            # Shutting tracing down also shuts the exporter
+            exporter = InMemorySpanExporter()
+            if config is not None:
+                settings.TRACING_SAMPLE_RATE, settings.TRACING_TAIL_SAMPLING = config
+                tracing.open_tracing(exporter)
+            timings[name].append(await measure(apps[config is not None], number))
+            tracing.close_tracing()
+            exported[name] = len(exporter.get_finished_spans())
+
+    disabled = min(timings["disabled"])
+    for name, timing in timings.items():
+        best = min(timing)
+        print(
+            f"{name:<12} {best:8.1f} us/request (+{best - disabled:5.1f})"
+            f"  {exported[name]:>7} spans exported"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=20_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.number, args.rounds))
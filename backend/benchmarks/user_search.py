@@ -0,0 +1,162 @@
+"""
+Admin user search at scale.
+
+Seeds synthetic users (emails under @bench.invalid, so they are easy to tell
+apart and remove) up to --users, then times the statements `read_users`
+issues for each search mode: the bounded count and the first page. The
+unbounded count the endpoint used to run is timed as well for comparison.
+Run it against a scratch database with the migrations applied.
+
+    uv run python -m benchmarks.user_search --users 1000000
+    uv run python -m benchmarks.user_search --cleanup
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from sqlalchemy import text
+from sqlmodel import asc, desc, func, select
+
+from src.config import settings
+from src.database import async_session, engine
+from src.main import app  # noqa: F401  (configures the mappers)
+from src.routes.users import service as user_service
+from src.routes.users.models import User, UserSearchMode
+
+BENCH_DOMAIN = "bench.invalid"
+
+FIRST_NAMES = [
+    "Alice", "Bruno", "Chloe", "Daniel", "Emma", "Felix", "Grace", "Hugo",
+    "Ines", "Jonas", "Karin", "Louis", "Maria", "Nils", "Olivia", "Pablo",
+    "Quentin", "Rosa", "Sven", "Tara", "Ugo", "Vera", "Willem", "Yuki", "Zoe",
+]
+LAST_NAMES = [
+    "Andersen", "Bianchi", "Costa", "Dubois", "Eriksen", "Fischer", "Garcia",
+    "Hansen", "Ivanova", "Jansen", "Kowalski", "Lambert", "Moreau", "Novak",
+    "Olsen", "Petit", "Quinn", "Rossi", "Schmidt", "Tanaka", "Urban", "Virtanen",
+    "Weber", "Xu", "Young", "Zimmermann",
+]
+
+SEED_STATEMENT = text(
+    """
+    WITH names AS (
+        SELECT CAST(:first_names AS text[]) AS first, CAST(:last_names AS text[]) AS last
+    )
+    INSERT INTO "user" (id, email, username, full_name, is_active, is_superuser,
+                        hashed_password, created_at, updated_at)
+    SELECT gen_random_uuid(),
+           lower(first_name || '.' || last_name) || g || '@' || CAST(:domain AS text),
+           lower(left(first_name, 1) || last_name) || g,
+           first_name || ' ' || last_name,
+           true, false, '!', now(), now()
+    FROM generate_series(CAST(:start AS integer), CAST(:stop AS integer)) AS g,
+         names,
+         LATERAL (
+             SELECT names.first[1 + abs(hashtext(g::text)) % cardinality(names.first)] AS first_name,
+                    names.last[1 + abs(hashtext(g || 'l')) % cardinality(names.last)] AS last_name
+         ) AS picked
+    """
+)
+
+
+async def seed(users: int, chunk: int = 100_000) -> None:
+    async with async_session() as session:
+        existing = (
+            await session.exec(
+                select(func.count())
+                .select_from(User)
+                .where(User.email.endswith(f"@{BENCH_DOMAIN}"))
+            )
+        ).one()
+        for start in range(existing + 1, users + 1, chunk):
+            stop = min(start + chunk - 1, users)
+            await session.exec(
+                SEED_STATEMENT,
+                params={
+                    "start": start,
+                    "stop": stop,
+                    "domain": BENCH_DOMAIN,
+                    "first_names": FIRST_NAMES,
+                    "last_names": LAST_NAMES,
+                },
+            )
+            await session.commit()
+            print(f"seeded users {start}..{stop}")
+        await session.exec(text('ANALYZE "user"'))
+        await session.commit()
+
+
+async def cleanup() -> None:
+    async with async_session() as session:
+        await session.exec(
+            text('DELETE FROM "user" WHERE email LIKE :pattern'),
+            params={"pattern": f"%@{BENCH_DOMAIN}"},
+        )
+        await session.commit()
+
+
+async def timed(statement, repeat: int) -> tuple[float, object]:
+    best = float("inf")
+    result = None
+    async with async_session() as session:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = (await session.exec(statement)).all()
+            best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+async def run(terms: list[str], size: int, repeat: int) -> None:
+    print(
+        f"{'mode':<9} {'term':<12} {'count ms':>9} {'page ms':>9} "
+        f"{'unbounded ms':>13} {'total':>7}"
+    )
+    for mode in UserSearchMode:
+        for term in terms:
+            search_filter = user_service.user_search_filter(term, mode)
+            matches = (
+                select(User.id)
+                .where(search_filter)
+                .limit(settings.USER_SEARCH_MAX_RESULTS)
+                .subquery()
+            )
+            count_ms, count = await timed(
+                select(func.count()).select_from(matches), repeat
+            )
+            page = select(User).where(search_filter)
+            if mode == UserSearchMode.similar:
+                page = page.order_by(desc(user_service.user_search_rank(term)))
+            page = page.order_by(asc(User.email)).limit(size)
+            page_ms, _ = await timed(page, repeat)
+            unbounded_ms, _ = await timed(
+                select(func.count()).select_from(User).where(search_filter), repeat
+            )
+            print(
+                f"{mode.value:<9} {term:<12} {count_ms:9.1f} {page_ms:9.1f} "
+                f"{unbounded_ms:13.1f} {count[0]:7d}"
+            )
+
+
+async def main(args: argparse.Namespace) -> None:
+    engine.echo = False
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+    if args.cleanup:
+        await cleanup()
+        return
+    await seed(args.users)
+    await run(args.terms, args.size, args.repeat)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--size", type=int, default=10, help="page size")
+    parser.add_argument("--repeat", type=int, default=5, help="best of N runs")
+    parser.add_argument(
+        "--terms", nargs="+", default=["ali", "schmidt", "emma.weber", "zzqx"]
+    )
+    parser.add_argument("--cleanup", action="store_true", help="remove seeded users")
+    asyncio.run(main(parser.parse_args()))
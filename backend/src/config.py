@@ -6,6 +6,7 @@ from pydantic import (
     AnyUrl,
     BeforeValidator,
     EmailStr,
+    Field,
     HttpUrl,
     PostgresDsn,
     computed_field,
@@ -24,6 +25,10 @@ def parse_cors(v: Any) -> list[str] | str:
     raise ValueError(v)
 
 
+# "<requests>/<period>", see src/core/ratelimit.py
+RateLimit = Annotated[str, Field(pattern=r"^\d+/(second|minute|hour|day)$")]
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         # Use top level .env file (one level above ./backend/)
@@ -37,6 +42,13 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
     FRONTEND_HOST: str = "http://localhost:5173"
     ENVIRONMENT: Literal["local", "staging", "production"] = "local"
+    # Serialize response models returned by handlers in a single pass,
+    # see src/core/responses.py
+    FAST_JSON_RESPONSES: bool = True
+    # Maximum number of ids accepted by the items multi-get endpoint
+    ITEMS_BATCH_MAX_IDS: int = 100
+    # Admin user search stops counting matches past this many results
+    USER_SEARCH_MAX_RESULTS: int = 1000
 
     BACKEND_CORS_ORIGINS: Annotated[
         list[AnyUrl] | str, BeforeValidator(parse_cors)
@@ -51,6 +63,8 @@ class Settings(BaseSettings):
 
     PROJECT_NAME: str
     SENTRY_DSN: HttpUrl | None = None
+    # Share of transactions sent to Sentry, OpenTelemetry is configured apart
+    SENTRY_TRACES_SAMPLE_RATE: float = Field(default=1.0, ge=0.0, le=1.0)
     POSTGRES_SERVER: str
     POSTGRES_PORT: int = 5432
     POSTGRES_USER: str
@@ -77,6 +91,7 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str | None = None
     EMAILS_FROM_EMAIL: EmailStr | None = None
     EMAILS_FROM_NAME: EmailStr | None = None
+    SMTP_TIMEOUT_SECONDS: float = 30.0
 
     @model_validator(mode="after")
     def _set_default_emails_from(self) -> Self:
@@ -85,6 +100,8 @@ class Settings(BaseSettings):
         return self
 
     EMAIL_RESET_TOKEN_EXPIRE_HOURS: int = 48
+    # Directory for compiled email templates, shared by restarts and workers
+    EMAIL_TEMPLATES_BYTECODE_CACHE_DIR: str | None = None
 
     @computed_field  # type: ignore[prop-decorator]
     @property
@@ -110,22 +127,153 @@ class Settings(BaseSettings):
     LDAP_FIRST_NAME_ATTRIBUTE: str = "givenName"
     LDAP_LAST_NAME_ATTRIBUTE: str = "sn"
     LDAP_CONFLICT_STRATEGY: Literal["fail", "merge", "create_new"] = "fail"
+    # Service-account connections kept bound for user searches
+    LDAP_POOL_SIZE: int = 4
+    # Seconds to wait for a pooled connection when all are busy
+    LDAP_POOL_TIMEOUT: float = 10.0
+    LDAP_CONNECT_TIMEOUT: float = 5.0
+    LDAP_RECEIVE_TIMEOUT: float = 10.0
+    LDAP_USERNAME_ATTRIBUTE: str = "uid"
+    # Cache of successful binds (salted hashes), per process. Repeat logins
+    # within the TTL skip the bind; during a directory outage entries are
+    # still accepted for LDAP_CREDENTIAL_CACHE_STALE_SECONDS more.
+    LDAP_CREDENTIAL_CACHE_ENABLED: bool = False
+    LDAP_CREDENTIAL_CACHE_TTL_SECONDS: float = 300.0
+    LDAP_CREDENTIAL_CACHE_STALE_SECONDS: float = 3600.0
+    LDAP_CREDENTIAL_CACHE_MAX_ENTRIES: int = 10000
+    # Periodic import of the directory into the user table
+    # (see src/workers/ldap_sync.py)
+    LDAP_SYNC_ENABLED: bool = False
+    LDAP_SYNC_INTERVAL_SECONDS: float = 900.0
+    LDAP_SYNC_PAGE_SIZE: int = 500
+    LDAP_SYNC_LEASE_SECONDS: int = 600
+
+    # Background user purge (see src/workers/user_purge.py)
+    USER_PURGE_ENABLED: bool = True
+    USER_PURGE_BATCH_SIZE: int = 5000
+    USER_PURGE_BATCH_DELAY_SECONDS: float = 0.05
+    USER_PURGE_POLL_INTERVAL_SECONDS: float = 10.0
+    USER_PURGE_LEASE_SECONDS: int = 300
+
+    # Transactional email outbox (see src/workers/email_outbox.py)
+    EMAIL_OUTBOX_ENABLED: bool = True
+    EMAIL_OUTBOX_BATCH_SIZE: int = 50
+    EMAIL_OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0
+    EMAIL_OUTBOX_LEASE_SECONDS: int = 300
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 8
+    # Retry delay doubles per attempt, starting at the base
+    EMAIL_OUTBOX_RETRY_BASE_SECONDS: float = 30.0
+    EMAIL_OUTBOX_RETRY_MAX_SECONDS: float = 3600.0
+    # The SMTP connection is kept open between batches and closed once idle
+    EMAIL_OUTBOX_SMTP_IDLE_SECONDS: float = 60.0
+
+    # Sliding window rate limits (see src/core/ratelimit.py); the postgres
+    # backend shares the counters between workers
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: Literal["memory", "postgres"] = "memory"
+    RATE_LIMIT_LOGIN_PER_IP: RateLimit = "30/minute"
+    RATE_LIMIT_LOGIN_PER_IDENTIFIER: RateLimit = "10/minute"
+    RATE_LIMIT_SIGNUP_PER_IP: RateLimit = "10/hour"
+    RATE_LIMIT_PASSWORD_RECOVERY_PER_IP: RateLimit = "10/hour"
+    RATE_LIMIT_PASSWORD_RECOVERY_PER_IDENTIFIER: RateLimit = "3/hour"
+    RATE_LIMIT_MEMORY_MAX_KEYS: int = 100_000
+
+    # Prometheus metrics at /metrics (see src/core/metrics.py), only for
+    # scrapers sending "Authorization: Bearer <METRICS_TOKEN>"; the token is
+    # required unless local
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: str | None = None
+
+    # Server-Timing header with the auth, db, hash, upstream and serialize time
+    # of each request (see src/core/timing.py), by default only when local
+    SERVER_TIMING_ENABLED: bool | None = None
+
+    @model_validator(mode="after")
+    def _set_default_server_timing(self) -> Self:
+        if self.SERVER_TIMING_ENABLED is None:
+            self.SERVER_TIMING_ENABLED = self.ENVIRONMENT == "local"
+        return self
+
+    # Sampling CPU profiles (see src/core/profiling.py): superusers get the
+    # profile of a request sent with "X-Profile: speedscope" or "html"
+    PROFILING_ENABLED: bool = True
+    PROFILING_INTERVAL_SECONDS: float = 0.001
+    # Fraction of all requests profiled in the background, keeping the
+    # PROFILING_SLOWEST_PER_ROUTE slowest of each route in PROFILING_DIR
+    PROFILING_SAMPLE_RATE: float = Field(default=0.0, ge=0.0, le=1.0)
+    PROFILING_SLOWEST_PER_ROUTE: int = 5
+    PROFILING_DIR: str = "profiles"
+
+    # Event loop watchdog (see src/core/loopwatch.py), logging the stack of
+    # whatever blocks the loop for LOOP_WATCHDOG_THRESHOLD_SECONDS or more
+    LOOP_WATCHDOG_ENABLED: bool = True
+    LOOP_WATCHDOG_INTERVAL_SECONDS: float = 0.05
+    LOOP_WATCHDOG_THRESHOLD_SECONDS: float = 0.1
+    # For test runs, shutting down raises if the loop was blocked at all
+    LOOP_WATCHDOG_FAIL_ON_BLOCK: bool = False
+
+    # Superuser memory diagnostics under /diagnostics (tracemalloc, object census)
+    DIAGNOSTICS_ENABLED: bool = True
+
+    # OpenTelemetry tracing (see src/core/tracing.py), exported over OTLP/HTTP
+    # as configured by the standard OTEL_EXPORTER_OTLP_* variables
+    TRACING_ENABLED: bool = False
+    # Share of traces kept whatever happens, decided when they start
+    TRACING_SAMPLE_RATE: float = Field(default=0.05, ge=0.0, le=1.0)
+    # Also keep the slow and the failed traces, recording every span until
+    # its trace ends to decide
+    TRACING_TAIL_SAMPLING: bool = True
+    TRACING_TAIL_SLOW_SECONDS: float = 1.0
+    TRACING_TAIL_MAX_TRACES: int = 10_000
+
+    # Readiness probe at /health/ready (see src/core/health.py), its checks
+    # are cached for HEALTH_CACHE_SECONDS
+    HEALTH_CACHE_SECONDS: float = 2.0
+    HEALTH_DB_TIMEOUT_SECONDS: float = 1.0
+    HEALTH_POOL_MAX_SATURATION: float = Field(default=0.9, gt=0.0, le=1.0)
+    HEALTH_MAX_LOOP_LAG_SECONDS: float = 0.5
+    HEALTH_CHECK_MIGRATIONS: bool = True
+    # Time between SIGTERM, from which the probe reports not ready, and the
+    # server shutting down; 0 shuts down right away
+    HEALTH_SHUTDOWN_DRAIN_SECONDS: float = 0.0
+
+    # Threads hashing and verifying passwords off the event loop
+    PASSWORD_HASH_WORKERS: int = 4
+
+    # Outbound HTTP to identity providers (see src/core/http.py)
+    HTTP_CLIENT_TIMEOUT_SECONDS: float = 10.0
+    HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    HTTP_CLIENT_RETRIES: int = 2
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 100
 
     # OAuth2 Configuration
     GOOGLE_CLIENT_ID: str | None = None
     GOOGLE_CLIENT_SECRET: str | None = None
     GOOGLE_REDIRECT_URI: str = "http://localhost:8000/api/v1/auth/oauth2/google/callback"
+    GOOGLE_AUTHORIZE_URL: str = "https://accounts.google.com/o/oauth2/v2/auth"
+    GOOGLE_TOKEN_URL: str = "https://oauth2.googleapis.com/token"
+    GOOGLE_USERINFO_URL: str = "https://www.googleapis.com/oauth2/v2/userinfo"
+    GOOGLE_DISCOVERY_URL: str = "https://accounts.google.com/.well-known/openid-configuration"
     
     APPLE_CLIENT_ID: str | None = None
     APPLE_CLIENT_SECRET: str | None = None
     APPLE_REDIRECT_URI: str = "http://localhost:8000/api/v1/auth/oauth2/apple/callback"
+    APPLE_AUTHORIZE_URL: str = "https://appleid.apple.com/auth/authorize"
     
     GITHUB_CLIENT_ID: str | None = None
     GITHUB_CLIENT_SECRET: str | None = None
     GITHUB_REDIRECT_URI: str = "http://localhost:8000/api/v1/auth/oauth2/github/callback"
+    GITHUB_AUTHORIZE_URL: str = "https://github.com/login/oauth/authorize"
+    GITHUB_TOKEN_URL: str = "https://github.com/login/oauth/access_token"
+    GITHUB_API_URL: str = "https://api.github.com"
     
     FRONTEND_URL: str = "http://localhost:3000"
 
+    # OpenID Connect discovery/JWKS cache (see src/core/oidc.py)
+    OIDC_CACHE_TTL_SECONDS: float = 3600.0
+    OIDC_MIN_REFRESH_INTERVAL_SECONDS: float = 60.0
+    OIDC_CLOCK_SKEW_SECONDS: int = 60
+
     # OAuth2 Provider Enable Flags
     GOOGLE_OAUTH_ENABLED: bool = False
     APPLE_OAUTH_ENABLED: bool = False
@@ -149,6 +297,16 @@ class Settings(BaseSettings):
         self._check_default_secret(
             "FIRST_SUPERUSER_PASSWORD", self.FIRST_SUPERUSER_PASSWORD
         )
+        self._check_default_secret("METRICS_TOKEN", self.METRICS_TOKEN)
+        if (
+            self.METRICS_ENABLED
+            and not self.METRICS_TOKEN
+            and self.ENVIRONMENT != "local"
+        ):
+            raise ValueError(
+                "METRICS_TOKEN is not set, /metrics would be public, "
+                "set it or METRICS_ENABLED=false for deployments."
+            )
 
         return self
 
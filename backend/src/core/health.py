@@ -0,0 +1,189 @@
+"""
+Liveness and readiness of this worker, for load balancer and orchestrator probes.
+
+Liveness only tells the process still answers. Readiness also says whether it
+should get traffic: not before the lifespan startup is done, not once
+shutting down, and not while a dependency check fails:
+
+- database: `SELECT 1` answers within HEALTH_DB_TIMEOUT_SECONDS
+- pool: less than HEALTH_POOL_MAX_SATURATION of the connections are in use
+- event_loop: the loop watchdog saw no lag over HEALTH_MAX_LOOP_LAG_SECONDS
+  in about the last second
+- migrations: the database is at the latest alembic revision
+
+The checks run at most once per HEALTH_CACHE_SECONDS, concurrent probes share
+the run in progress. On SIGTERM the worker reports not ready right away and
+only starts shutting down HEALTH_SHUTDOWN_DRAIN_SECONDS later, so the load
+balancer stops routing to it before it stops accepting connections.
+"""
+
+import asyncio
+import functools
+import logging
+import signal
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+
+from src.config import settings
+from src.core.loopwatch import get_loop_watchdog
+from src.database import engine
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[1] / "migrations"
+
+
+@dataclass
+class Check:
+    name: str
+    ok: bool
+    detail: str
+
+
+@functools.cache
+def migration_heads() -> frozenset[str]:
+    """Head revisions of the migration scripts, read once per process."""
+    return frozenset(ScriptDirectory(str(MIGRATIONS_DIR)).get_heads())
+
+
+async def check_database() -> Check:
+    try:
+        async with asyncio.timeout(settings.HEALTH_DB_TIMEOUT_SECONDS):
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+    except TimeoutError:
+        return Check("database", False, "no answer within the timeout")
+    except Exception as e:
+        return Check("database", False, f"{type(e).__name__}: {e}")
+    return Check("database", True, "reachable")
+
+
+def check_pool() -> Check:
+    pool: Any = engine.sync_engine.pool
+    in_use = pool.checkedout()
+    max_overflow = getattr(pool, "_max_overflow", -1)
+    if max_overflow < 0:
+        return Check("pool", True, f"{in_use} connections in use, no limit")
+    capacity = pool.size() + max_overflow
+    saturation = in_use / capacity if capacity else 1.0
+    return Check(
+        "pool",
+        saturation < settings.HEALTH_POOL_MAX_SATURATION,
+        f"{in_use} of {capacity} connections in use",
+    )
+
+
+def check_event_loop() -> Check:
+    watchdog = get_loop_watchdog()
+    if watchdog is None:
+        return Check("event_loop", True, "not watched (LOOP_WATCHDOG_ENABLED is off)")
+    lag = watchdog.recent_max_lag()
+    return Check(
+        "event_loop",
+        lag < settings.HEALTH_MAX_LOOP_LAG_SECONDS,
+        f"{lag * 1000:.0f} ms lag",
+    )
+
+
+async def check_migrations() -> Check:
+    try:
+        async with asyncio.timeout(settings.HEALTH_DB_TIMEOUT_SECONDS):
+            async with engine.connect() as conn:
+                result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+                current = frozenset(result.scalars().all())
+    except Exception as e:
+        return Check("migrations", False, f"{type(e).__name__}: {e}")
+    heads = migration_heads()
+    if current != heads:
+        return Check(
+            "migrations",
+            False,
+            f"database at {', '.join(sorted(current)) or 'no revision'}, "
+            f"expected {', '.join(sorted(heads))}",
+        )
+    return Check("migrations", True, f"at {', '.join(sorted(heads))}")
+
+
+class Readiness:
+    def __init__(self) -> None:
+        self.started = False
+        self.draining = False
+        self._checks: list[Check] = []
+        self._checked_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def checks(self) -> list[Check]:
+        if time.monotonic() - self._checked_at < settings.HEALTH_CACHE_SECONDS:
+            return self._checks
+        async with self._lock:
+            if time.monotonic() - self._checked_at < settings.HEALTH_CACHE_SECONDS:
+                return self._checks
+            checks = [check_pool(), check_event_loop(), await check_database()]
+            if settings.HEALTH_CHECK_MIGRATIONS and checks[-1].ok:
+                checks.append(await check_migrations())
+            self._checks = checks
+            self._checked_at = time.monotonic()
+            failed = [check.name for check in checks if not check.ok]
+            if failed:
+                logger.warning(f"Not ready, failed checks: {', '.join(failed)}")
+            return checks
+
+    async def status(self) -> tuple[bool, str, list[Check]]:
+        """Whether ready, the lifecycle state and the dependency checks."""
+        if not self.started:
+            return False, "starting", []
+        if self.draining:
+            return False, "shutting down", []
+        checks = await self.checks()
+        return all(check.ok for check in checks), "serving", checks
+
+
+readiness = Readiness()
+
+
+def _drain_on_sigterm() -> None:
+    """
+    Report not ready as soon as SIGTERM arrives, then hand the signal to the
+    server's own handler (uvicorn's) after HEALTH_SHUTDOWN_DRAIN_SECONDS.
+    """
+    previous = signal.getsignal(signal.SIGTERM)
+    if not callable(previous):
+        return
+    loop = asyncio.get_running_loop()
+
+    def handle_sigterm(signum: int, frame: Any) -> None:
+        if readiness.draining:
+            previous(signum, frame)
+            return
+        readiness.draining = True
+        logger.info(
+            f"SIGTERM received, draining for {settings.HEALTH_SHUTDOWN_DRAIN_SECONDS}s"
+        )
+        loop.call_soon_threadsafe(
+            loop.call_later, settings.HEALTH_SHUTDOWN_DRAIN_SECONDS, previous, signum, frame
+        )
+
+    try:
+        signal.signal(signal.SIGTERM, handle_sigterm)
+    except ValueError:
+        # Not the main thread, e.g. under a test client
+        logger.warning("Could not install the SIGTERM handler, not draining on shutdown")
+
+
+def mark_started() -> None:
+    """Called at the end of the lifespan startup."""
+    if settings.HEALTH_CHECK_MIGRATIONS:
+        migration_heads()
+    readiness.started = True
+    if settings.HEALTH_SHUTDOWN_DRAIN_SECONDS > 0:
+        _drain_on_sigterm()
+
+
+def mark_stopping() -> None:
+    """Called first thing in the lifespan shutdown."""
+    readiness.draining = True
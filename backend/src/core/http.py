@@ -0,0 +1,131 @@
+"""
+Shared outbound HTTP for calls to identity providers.
+
+One httpx transport, and so one connection pool, is opened in the application
+lifespan and shared by every client, including the per-request authlib
+`AsyncOAuth2Client`s, which only carry the token state of their request.
+Connection failures are retried whatever the method, nothing was sent yet;
+idempotent requests are also retried on read errors and 502/503/504 responses.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+import httpx
+from opentelemetry.trace import Status, StatusCode
+from authlib.integrations.httpx_client import AsyncOAuth2Client
+
+from src.config import settings
+from src.core.metrics import UPSTREAM_DURATION
+from src.core.timing import add_timing
+from src.core.tracing import client_span, inject_trace_context
+
+logger = logging.getLogger(__name__)
+
+RETRY_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+RETRY_STATUS_CODES = frozenset({502, 503, 504})
+
+
+class SharedTransport(httpx.AsyncBaseTransport):
+    """
+    Wraps the pooled transport so closing a client does not close the pool,
+    which belongs to the lifespan.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, retries: int):
+        self._transport = transport
+        self._retries = retries
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        idempotent = request.method in RETRY_METHODS
+        for attempt in range(self._retries):
+            try:
+                response = await self._send(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                logger.warning(f"{request.method} {request.url} failed ({e!r}), retrying")
+            except httpx.TransportError as e:
+                if not idempotent:
+                    raise
+                logger.warning(f"{request.method} {request.url} failed ({e!r}), retrying")
+            else:
+                if not idempotent or response.status_code not in RETRY_STATUS_CODES:
+                    return response
+                await response.aclose()
+                logger.warning(f"{request.method} {request.url} returned {response.status_code}, retrying")
+            await asyncio.sleep(0.1 * 2**attempt)
+        return await self._send(request)
+
+    async def _send(self, request: httpx.Request) -> httpx.Response:
+        # Timed until the response headers, the caller reads the body
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            with client_span(
+                f"{request.method} {request.url.host}",
+                {
+                    "http.request.method": request.method,
+                    "server.address": request.url.host,
+                    "url.full": str(request.url.copy_with(query=None)),
+                },
+            ) as span:
+                inject_trace_context(request.headers)
+                response = await self._transport.handle_async_request(request)
+                span.set_attribute("http.response.status_code", response.status_code)
+                if response.status_code >= 500:
+                    span.set_status(Status(StatusCode.ERROR))
+                else:
+                    outcome = "ok"
+            return response
+        finally:
+            elapsed = time.perf_counter() - start
+            UPSTREAM_DURATION.labels(request.url.host, request.method, outcome).observe(elapsed)
+            add_timing("upstream", elapsed)
+
+    async def aclose(self) -> None:
+        pass
+
+
+_transport: httpx.AsyncHTTPTransport | None = None
+
+
+def get_http_transport() -> SharedTransport:
+    global _transport
+    if _transport is None:
+        _transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+            ),
+        )
+    return SharedTransport(_transport, settings.HTTP_CLIENT_RETRIES)
+
+
+def http_timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        settings.HTTP_CLIENT_TIMEOUT_SECONDS,
+        connect=settings.HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS,
+    )
+
+
+def http_client(**kwargs: Any) -> httpx.AsyncClient:
+    """A client on the shared pool, cheap to create per request."""
+    return httpx.AsyncClient(transport=get_http_transport(), timeout=http_timeout(), **kwargs)
+
+
+def oauth2_client(**kwargs: Any) -> AsyncOAuth2Client:
+    """An authlib OAuth2 client on the shared pool, cheap to create per request."""
+    return AsyncOAuth2Client(transport=get_http_transport(), timeout=http_timeout(), **kwargs)
+
+
+def open_http_transport() -> None:
+    """Called from the application lifespan."""
+    get_http_transport()
+
+
+async def close_http_transport() -> None:
+    global _transport
+    if _transport is not None:
+        await _transport.aclose()
+        _transport = None
@@ -0,0 +1,375 @@
+"""
+Long-lived LDAP client.
+
+ldap3 is blocking, so every directory operation runs in the threadpool. The
+Server is created once and its DSA/schema info is read on the first
+connection only. User searches go through a pool of connections bound with
+the service account (anonymous if none is configured), reused across logins.
+User binds need their own connection, opened against the same Server without
+re-reading its info.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, TypeVar
+
+from fastapi.concurrency import run_in_threadpool
+from ldap3 import ALL, NONE, SUBTREE, SYNC, Connection, Server
+from ldap3.core.exceptions import (
+    LDAPBindError,
+    LDAPCommunicationError,
+    LDAPStartTLSError,
+)
+from ldap3.utils.conv import escape_filter_chars
+
+from src.config import settings
+from src.core.metrics import observe_upstream, register_ldap_credential_cache
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+PAGED_RESULTS_CONTROL = "1.2.840.113556.1.4.319"
+
+# The directory could not be reached or did not answer in time
+LDAP_OUTAGE_ERRORS = (LDAPCommunicationError, LDAPStartTLSError, TimeoutError)
+
+# Cost of the cached password hashes, roughly 40ms per hash
+CREDENTIAL_HASH_ITERATIONS = 100_000
+
+
+def _unbind_quietly(conn: Connection) -> None:
+    try:
+        conn.unbind()
+    except Exception:
+        pass
+
+
+class LDAPClient:
+    def __init__(
+        self,
+        server: Server,
+        *,
+        search_base: str,
+        user_filter: str,
+        bind_dn: str | None = None,
+        bind_password: str | None = None,
+        use_tls: bool = False,
+        pool_size: int = 4,
+        pool_timeout: float = 10.0,
+        receive_timeout: float | None = None,
+        client_strategy: str = SYNC,
+    ):
+        self.server = server
+        self.search_base = search_base
+        self.user_filter = user_filter
+        self.bind_dn = bind_dn
+        self.bind_password = bind_password
+        self.use_tls = use_tls
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
+        self.receive_timeout = receive_timeout
+        # SYNC in production, MOCK_SYNC for a local stand-in directory
+        self.client_strategy = client_strategy
+        # Bound connections not in use, and one slot per connection allowed
+        self._idle: list[Connection] = []
+        self._slots = asyncio.Semaphore(pool_size)
+
+    @classmethod
+    def from_settings(cls) -> "LDAPClient":
+        server = Server(
+            settings.LDAP_SERVER,
+            port=settings.LDAP_PORT,
+            use_ssl=settings.LDAP_USE_SSL,
+            get_info=ALL,
+            connect_timeout=settings.LDAP_CONNECT_TIMEOUT,
+        )
+        return cls(
+            server,
+            search_base=settings.LDAP_SEARCH_BASE or "",
+            user_filter=settings.LDAP_USER_FILTER,
+            bind_dn=settings.LDAP_BIND_DN,
+            bind_password=settings.LDAP_BIND_PASSWORD,
+            use_tls=settings.LDAP_USE_TLS,
+            pool_size=settings.LDAP_POOL_SIZE,
+            pool_timeout=settings.LDAP_POOL_TIMEOUT,
+            receive_timeout=settings.LDAP_RECEIVE_TIMEOUT,
+        )
+
+    def _open_connection(self, user: str | None, password: str | None) -> Connection:
+        """Open and bind a connection, blocking. Check `.bound` for the result."""
+        conn = Connection(
+            self.server,
+            user=user,
+            password=password,
+            client_strategy=self.client_strategy,
+            receive_timeout=self.receive_timeout,
+        )
+        conn.open(read_server_info=False)
+        if self.use_tls:
+            conn.start_tls(read_server_info=False)
+        conn.bind(read_server_info=False)
+        return conn
+
+    def _open_service_connection(self) -> Connection:
+        conn = self._open_connection(self.bind_dn, self.bind_password)
+        if not conn.bound:
+            conn.unbind()
+            raise LDAPBindError(f"LDAP service bind failed: {conn.last_error}")
+        if self.server.get_info != NONE and self.server.info is None:
+            # Once per process, every later connection reuses it
+            conn.refresh_server_info()
+        return conn
+
+    async def open(self) -> None:
+        """Pre-bind the pool. Failures are logged, connections are retried on use."""
+        try:
+            while len(self._idle) < self.pool_size:
+                conn = await run_in_threadpool(self._open_service_connection)
+                self._idle.append(conn)
+        except Exception as e:
+            logger.error(f"Could not pre-bind LDAP connections: {e}")
+
+    async def close(self) -> None:
+        while self._idle:
+            await run_in_threadpool(self._idle.pop().unbind)
+
+    @asynccontextmanager
+    async def _pooled_connection(self) -> AsyncIterator[Connection]:
+        await asyncio.wait_for(self._slots.acquire(), self.pool_timeout)
+        try:
+            if self._idle:
+                conn = self._idle.pop()
+            else:
+                conn = await run_in_threadpool(self._open_service_connection)
+            try:
+                yield conn
+            except BaseException:
+                # Unknown state, do not hand it to the next login
+                await run_in_threadpool(_unbind_quietly, conn)
+                raise
+            self._idle.append(conn)
+        finally:
+            self._slots.release()
+
+    async def _run_pooled(self, operation: Callable[[Connection], T]) -> T:
+        async with self._pooled_connection() as conn:
+            return await run_in_threadpool(operation, conn)
+
+    async def _with_service_connection(self, operation: Callable[[Connection], T]) -> T:
+        """
+        Run a blocking operation on a pooled connection. A connection the
+        server dropped while idle is replaced and the operation retried once.
+        """
+        try:
+            return await self._run_pooled(operation)
+        except LDAPCommunicationError as e:
+            logger.warning(f"LDAP connection lost ({e}), retrying once")
+            return await self._run_pooled(operation)
+
+    async def search_user(
+        self, username: str, attributes: list[str]
+    ) -> tuple[str, dict[str, Any]] | None:
+        """Find a user by LDAP_USER_FILTER, returns its (dn, attributes)."""
+        search_filter = self.user_filter.format(username=escape_filter_chars(username))
+
+        def search(conn: Connection) -> tuple[str, dict[str, Any]] | None:
+            conn.search(
+                search_base=self.search_base,
+                search_filter=search_filter,
+                search_scope=SUBTREE,
+                attributes=attributes,
+            )
+            for entry in conn.response or []:
+                if entry.get("type") == "searchResEntry":
+                    return entry["dn"], entry["attributes"]
+            return None
+
+        with observe_upstream("ldap", "search"):
+            return await self._with_service_connection(search)
+
+    async def paged_search(
+        self, search_filter: str, attributes: list[str], page_size: int
+    ) -> AsyncIterator[list[tuple[str, dict[str, Any]]]]:
+        """
+        Yield (dn, attributes) pages using the simple paged results control.
+        The pages share one pooled connection, held until the search ends.
+        """
+
+        def fetch_page(conn: Connection, cookie: bytes | None) -> bytes | None:
+            conn.search(
+                search_base=self.search_base,
+                search_filter=search_filter,
+                search_scope=SUBTREE,
+                attributes=attributes,
+                paged_size=page_size,
+                paged_cookie=cookie,
+            )
+            controls = conn.result.get("controls") or {}
+            paged = controls.get(PAGED_RESULTS_CONTROL, {}).get("value", {})
+            return paged.get("cookie") or None
+
+        async with self._pooled_connection() as conn:
+            cookie = None
+            while True:
+                with observe_upstream("ldap", "paged_search"):
+                    cookie = await run_in_threadpool(fetch_page, conn, cookie)
+                yield [
+                    (entry["dn"], entry["attributes"])
+                    for entry in conn.response or []
+                    if entry.get("type") == "searchResEntry"
+                ]
+                if not cookie:
+                    break
+
+    async def bind_user(self, user_dn: str, password: str) -> bool:
+        """Check the user's password with a simple bind on a short-lived connection."""
+        if not password:
+            # An empty password would be an unauthenticated bind, which succeeds
+            return False
+
+        def bind() -> bool:
+            conn = self._open_connection(user_dn, password)
+            try:
+                return conn.bound
+            finally:
+                conn.unbind()
+
+        with observe_upstream("ldap", "bind"):
+            return await run_in_threadpool(bind)
+
+
+class LDAPCredentialCache:
+    """
+    TTL-bounded cache of successful LDAP binds, local to this process.
+
+    Only a salted PBKDF2 hash of the password is kept per user DN. An entry
+    younger than `ttl` lets a repeat login skip the network bind; an entry up
+    to `ttl + stale_ttl` old is only accepted while the directory cannot be
+    reached. A password changed or an account disabled in the directory keeps
+    working from the cache until its entry expires.
+    """
+
+    def __init__(self, *, enabled: bool, ttl: float, stale_ttl: float, max_entries: int):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        # dn -> (stored at, salt, hash), oldest first
+        self._entries: dict[str, tuple[float, bytes, bytes]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+
+    @classmethod
+    def from_settings(cls) -> "LDAPCredentialCache":
+        return cls(
+            enabled=settings.LDAP_CREDENTIAL_CACHE_ENABLED,
+            ttl=settings.LDAP_CREDENTIAL_CACHE_TTL_SECONDS,
+            stale_ttl=settings.LDAP_CREDENTIAL_CACHE_STALE_SECONDS,
+            max_entries=settings.LDAP_CREDENTIAL_CACHE_MAX_ENTRIES,
+        )
+
+    @staticmethod
+    def _hash(password: str, salt: bytes) -> bytes:
+        return hashlib.pbkdf2_hmac(
+            "sha256", password.encode(), salt, CREDENTIAL_HASH_ITERATIONS
+        )
+
+    def _entry(self, user_dn: str, max_age: float) -> tuple[bytes, bytes] | None:
+        key = user_dn.lower()
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, salt, digest = entry
+        age = time.monotonic() - stored_at
+        if age > self.ttl + self.stale_ttl:
+            del self._entries[key]
+            return None
+        if age > max_age:
+            return None
+        return salt, digest
+
+    async def _matches(self, password: str, entry: tuple[bytes, bytes] | None) -> bool:
+        if entry is None:
+            return False
+        salt, digest = entry
+        candidate = await run_in_threadpool(self._hash, password, salt)
+        return hmac.compare_digest(candidate, digest)
+
+    def contains(self, user_dn: str) -> bool:
+        """Whether an entry, fresh or stale, exists for this DN."""
+        return self.enabled and self._entry(user_dn, self.ttl + self.stale_ttl) is not None
+
+    async def verify(self, user_dn: str, password: str) -> bool:
+        """True if a fresh entry matches the password."""
+        if not self.enabled:
+            return False
+        if await self._matches(password, self._entry(user_dn, self.ttl)):
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    async def verify_stale(self, user_dn: str, password: str) -> bool:
+        """Fallback while the directory is unreachable, accepts stale entries."""
+        if not self.enabled:
+            return False
+        if await self._matches(password, self._entry(user_dn, self.ttl + self.stale_ttl)):
+            self.stale_hits += 1
+            return True
+        return False
+
+    async def store(self, user_dn: str, password: str) -> None:
+        if not self.enabled:
+            return
+        salt = os.urandom(16)
+        digest = await run_in_threadpool(self._hash, password, salt)
+        key = user_dn.lower()
+        self._entries.pop(key, None)
+        while len(self._entries) >= self.max_entries:
+            del self._entries[next(iter(self._entries))]
+        self._entries[key] = (time.monotonic(), salt, digest)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+ldap_credential_cache = LDAPCredentialCache.from_settings()
+register_ldap_credential_cache(ldap_credential_cache)
+
+_client: LDAPClient | None = None
+
+
+def get_ldap_client() -> LDAPClient:
+    global _client
+    if _client is None:
+        _client = LDAPClient.from_settings()
+    return _client
+
+
+async def open_ldap_client() -> None:
+    """Called from the application lifespan."""
+    if settings.LDAP_ENABLED and settings.LDAP_SERVER:
+        await get_ldap_client().open()
+
+
+async def close_ldap_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
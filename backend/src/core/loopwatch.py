@@ -0,0 +1,194 @@
+"""
+Event loop watchdog, naming the code that blocks the loop.
+
+A heartbeat task wakes up every LOOP_WATCHDOG_INTERVAL_SECONDS and records how
+late it woke up (`event_loop_lag_seconds`). A thread checks the heartbeat; once
+it is LOOP_WATCHDOG_THRESHOLD_SECONDS overdue, something is running on the loop
+without yielding, and the thread captures the loop thread's stack right then.
+When the heartbeat runs again the block is logged with that stack and counted
+in `event_loop_blocks_total` by call site: the innermost frame of our own code
+(`src/`), else the innermost frame. The request being served, if any, is taken
+from the `scope` of the ASGI frames on the stack.
+
+Code holding the GIL the whole time (some C extensions) only lets the thread
+look once it is done, such blocks are reported with call site "unknown".
+
+With LOOP_WATCHDOG_FAIL_ON_BLOCK, for test runs, closing the watchdog (at the
+end of the lifespan) raises `LoopBlockedError` listing the blocks, failing the
+suite that ran the app.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from dataclasses import dataclass
+from pathlib import Path
+from types import FrameType
+
+from src.config import settings
+from src.core.metrics import EVENT_LOOP_BLOCKS, EVENT_LOOP_LAG
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+SRC_DIR = str(BASE_DIR / "src")
+MAX_STACK_FRAMES = 30
+
+
+class LoopBlockedError(RuntimeError):
+    pass
+
+
+@dataclass
+class Block:
+    seconds: float
+    call_site: str
+    request: str | None
+    stack: str
+
+
+def call_site(frame: FrameType | None) -> str:
+    innermost = None
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        location = f"{filename}:{frame.f_lineno} {frame.f_code.co_name}"
+        if innermost is None:
+            innermost = location
+        if filename.startswith(SRC_DIR) and filename != __file__:
+            relative = Path(filename).relative_to(BASE_DIR)
+            return f"{relative}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return innermost or "unknown"
+
+
+def current_request(frame: FrameType | None) -> str | None:
+    """The "METHOD /path" in the outermost ASGI frame on the stack, if any."""
+    request = None
+    while frame is not None:
+        scope = frame.f_locals.get("scope")
+        if isinstance(scope, dict) and scope.get("type") == "http":
+            request = f"{scope.get('method')} {scope.get('path')}"
+        frame = frame.f_back
+    return request
+
+
+class LoopWatchdog:
+    def __init__(self, loop: asyncio.AbstractEventLoop, interval: float, threshold: float):
+        self.loop = loop
+        self.interval = interval
+        self.threshold = threshold
+        self.blocks: list[Block] = []
+        # Lag of the heartbeats of about the last second
+        self.recent_lags: deque[float] = deque(maxlen=max(int(1 / interval), 1))
+        self.offenders: Counter[str] = Counter()
+        self._loop_thread_id = threading.get_ident()
+        self._beat = 0
+        self._expected_at = time.monotonic() + interval
+        # (beat, call site, request, stack) captured by the thread
+        self._captured: tuple[int, str, str | None, str] | None = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._heartbeat: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._heartbeat = self.loop.create_task(self._run_heartbeat())
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            await asyncio.gather(self._heartbeat, return_exceptions=True)
+        self._thread.join()
+
+    async def _run_heartbeat(self) -> None:
+        while True:
+            self._expected_at = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(time.monotonic() - self._expected_at, 0.0)
+            EVENT_LOOP_LAG.observe(lag)
+            self.recent_lags.append(lag)
+            captured, self._captured = self._captured, None
+            if lag >= self.threshold:
+                if captured is not None and captured[0] == self._beat:
+                    self._report(Block(lag, *captured[1:]))
+                else:
+                    self._report(Block(lag, "unknown", None, ""))
+            self._beat += 1
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.threshold / 2):
+            beat = self._beat
+            if time.monotonic() - self._expected_at < self.threshold:
+                continue
+            if self._captured is not None and self._captured[0] == beat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None or beat != self._beat:
+                continue
+            stack = "".join(traceback.format_stack(frame, limit=MAX_STACK_FRAMES))
+            self._captured = (beat, call_site(frame), current_request(frame), stack)
+            del frame
+
+    def _report(self, block: Block) -> None:
+        self.blocks.append(block)
+        self.offenders[block.call_site] += 1
+        EVENT_LOOP_BLOCKS.labels(block.call_site).inc()
+        request = f" serving {block.request}" if block.request else ""
+        logger.warning(
+            f"Event loop blocked for {block.seconds * 1000:.0f} ms at {block.call_site}"
+            f"{request}\n{block.stack}"
+        )
+
+    def recent_max_lag(self) -> float:
+        """Worst lag of about the last second, or how overdue the heartbeat is."""
+        overdue = time.monotonic() - self._expected_at
+        return max(max(self.recent_lags, default=0.0), overdue)
+
+    def summary(self, top: int = 10) -> str:
+        return ", ".join(f"{site} ({count}x)" for site, count in self.offenders.most_common(top))
+
+
+_watchdog: LoopWatchdog | None = None
+
+
+def get_loop_watchdog() -> LoopWatchdog | None:
+    return _watchdog
+
+
+def open_loop_watchdog() -> None:
+    """Called from the application lifespan."""
+    global _watchdog
+    _watchdog = LoopWatchdog(
+        asyncio.get_running_loop(),
+        settings.LOOP_WATCHDOG_INTERVAL_SECONDS,
+        settings.LOOP_WATCHDOG_THRESHOLD_SECONDS,
+    )
+    _watchdog.start()
+
+
+async def close_loop_watchdog() -> None:
+    global _watchdog
+    if _watchdog is None:
+        return
+    watchdog, _watchdog = _watchdog, None
+    await watchdog.stop()
+    if not watchdog.blocks:
+        return
+    logger.warning(
+        f"Event loop blocked {len(watchdog.blocks)} times, top call sites: {watchdog.summary()}"
+    )
+    if settings.LOOP_WATCHDOG_FAIL_ON_BLOCK:
+        raise LoopBlockedError(
+            "Event loop blocked past "
+            f"{settings.LOOP_WATCHDOG_THRESHOLD_SECONDS * 1000:.0f} ms: "
+            + "; ".join(
+                f"{block.call_site} for {block.seconds * 1000:.0f} ms"
+                + (f" serving {block.request}" if block.request else "")
+                for block in watchdog.blocks
+            )
+        )
@@ -0,0 +1,229 @@
+"""
+Prometheus metrics, served at /metrics.
+
+Label values only come from bounded sets: route ids from
+`custom_generate_unique_id` (or "unmatched"), standard HTTP methods, status codes,
+configured upstream hosts, fixed operation/outcome names and code locations. Never label by
+path, user or raw error message.
+
+With several worker processes, set PROMETHEUS_MULTIPROC_DIR so every process
+writes its samples there and /metrics aggregates them; the collectors reading
+live state (DB pool, LDAP credential cache) then report the serving process.
+"""
+
+import os
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config import settings
+from src.core.timing import add_timing
+from src.core.tracing import client_span
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests", ["route", "method", "status"]
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency, until the response is sent",
+    ["route", "method"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests being served", multiprocess_mode="livesum"
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_checkout_seconds",
+    "Time to get a database connection from the pool, including opening new ones",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+PASSWORD_HASH_QUEUE_DEPTH = Gauge(
+    "password_hash_queue_depth",
+    "Password hash operations waiting for a hashing thread",
+    multiprocess_mode="livesum",
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "Password hashing and verification time, excluding the queue",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.5),
+)
+UPSTREAM_DURATION = Histogram(
+    "upstream_request_duration_seconds",
+    "Calls to LDAP and OAuth2/OIDC providers",
+    ["upstream", "operation", "outcome"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+EMAILS = Counter("emails_total", "Outbox email send attempts", ["outcome"])
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop watchdog heartbeat woke up",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+EVENT_LOOP_BLOCKS = Counter(
+    "event_loop_blocks",
+    "Event loop blocked past LOOP_WATCHDOG_THRESHOLD_SECONDS, by call site",
+    ["call_site"],
+)
+
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+
+@contextmanager
+def observe_upstream(upstream: str, operation: str) -> Iterator[None]:
+    """Time and trace an upstream call, with outcome "error" if it raises."""
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        with client_span(f"{upstream} {operation}"):
+            yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        UPSTREAM_DURATION.labels(upstream, operation, outcome).observe(elapsed)
+        add_timing("upstream", elapsed)
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """The default asyncpg pool, timing every checkout."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - start)
+
+
+class PoolCollector(Collector):
+    def __init__(self, pool: Pool):
+        self.pool = pool
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        yield GaugeMetricFamily(
+            "db_pool_size", "Configured database pool size", value=self.pool.size()
+        )
+        yield GaugeMetricFamily(
+            "db_pool_checked_out",
+            "Database connections in use",
+            value=self.pool.checkedout(),
+        )
+        yield GaugeMetricFamily(
+            "db_pool_overflow",
+            "Database connections open beyond the pool size",
+            value=max(self.pool.overflow(), 0),
+        )
+
+
+class LDAPCredentialCacheCollector(Collector):
+    def __init__(self, cache: Any):
+        self.cache = cache
+
+    def collect(self) -> Iterator[GaugeMetricFamily | CounterMetricFamily]:
+        stats = self.cache.stats()
+        yield GaugeMetricFamily(
+            "ldap_credential_cache_entries",
+            "Entries in the LDAP credential cache",
+            value=stats["entries"],
+        )
+        lookups = CounterMetricFamily(
+            "ldap_credential_cache_lookups",
+            "LDAP credential cache lookups",
+            labels=["result"],
+        )
+        lookups.add_metric(["hit"], stats["hits"])
+        lookups.add_metric(["miss"], stats["misses"])
+        lookups.add_metric(["stale_hit"], stats["stale_hits"])
+        yield lookups
+
+
+def register_pool(pool: Pool) -> None:
+    REGISTRY.register(PoolCollector(pool))
+
+
+def register_ldap_credential_cache(cache: Any) -> None:
+    REGISTRY.register(LDAPCredentialCacheCollector(cache))
+
+
+def route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    return getattr(route, "unique_id", None) or route.name
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware, so no per-request task or body copy, recording the
+    HTTP metrics once the request is served.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        # Labelled children by (route, method, status), skips the registry lock
+        self._children: dict[tuple[str, str, int], tuple[Histogram, Counter]] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            method = scope["method"] if scope["method"] in HTTP_METHODS else "other"
+            key = (route_label(scope), method, status)
+            children = self._children.get(key)
+            if children is None:
+                children = self._children[key] = self._labelled(*key)
+            children[0].observe(time.perf_counter() - start)
+            children[1].inc()
+
+    @staticmethod
+    def _labelled(route: str, method: str, status: int) -> tuple[Histogram, Counter]:
+        return (
+            HTTP_REQUEST_DURATION.labels(route, method),
+            HTTP_REQUESTS.labels(route, method, str(status)),
+        )
+
+
+async def metrics(request: Request) -> Response:
+    if settings.METRICS_TOKEN and (
+        request.headers.get("authorization") != f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        return Response(status_code=401)
+    registry = REGISTRY
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
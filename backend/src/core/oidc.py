@@ -0,0 +1,163 @@
+"""
+OpenID Connect discovery and local ID token verification.
+
+Discovery documents and JWKS are fetched through the shared HTTP pool and
+cached for their Cache-Control max-age, or OIDC_CACHE_TTL_SECONDS without
+one. Once expired, the cached copy keeps being served while a background task
+refetches it. A token signed with an unknown key id triggers an immediate
+JWKS refetch, at most once per OIDC_MIN_REFRESH_INTERVAL_SECONDS, so rotated
+keys are picked up without letting made-up key ids hammer the provider.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from collections.abc import Container
+from typing import Any
+
+import jwt
+
+from src.config import settings
+from src.core.http import http_client
+
+logger = logging.getLogger(__name__)
+
+MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class CachedDocument:
+    """A JSON document fetched over HTTP, cached with stale-while-revalidate."""
+
+    def __init__(self, url: str, default_ttl: float):
+        self.url = url
+        self.default_ttl = default_ttl
+        self.value: dict[str, Any] | None = None
+        self.fetched_at = 0.0
+        self.expires_at = 0.0
+        self._lock = asyncio.Lock()
+        self._background: asyncio.Task | None = None
+
+    async def get(self) -> dict[str, Any]:
+        if self.value is None:
+            return await self.refresh()
+        if time.monotonic() >= self.expires_at and (
+            self._background is None or self._background.done()
+        ):
+            self._background = asyncio.create_task(self._refresh_in_background())
+        return self.value
+
+    async def refresh(self) -> dict[str, Any]:
+        """Fetch the document, unless a concurrent caller did in the meantime."""
+        requested_at = time.monotonic()
+        async with self._lock:
+            if self.value is not None and self.fetched_at >= requested_at:
+                return self.value
+            async with http_client() as client:
+                response = await client.get(self.url)
+                response.raise_for_status()
+            self.value = response.json()
+            self.fetched_at = time.monotonic()
+            max_age = MAX_AGE.search(response.headers.get("cache-control", ""))
+            ttl = float(max_age.group(1)) if max_age else self.default_ttl
+            self.expires_at = self.fetched_at + ttl
+            return self.value
+
+    async def _refresh_in_background(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.warning(f"Refreshing {self.url} failed, serving the cached copy: {e}")
+
+
+class OIDCProvider:
+    def __init__(self, discovery_url: str):
+        self.discovery = CachedDocument(discovery_url, settings.OIDC_CACHE_TTL_SECONDS)
+        self._jwks: CachedDocument | None = None
+        self._forced_refresh_at = 0.0
+
+    async def metadata(self) -> dict[str, Any]:
+        return await self.discovery.get()
+
+    async def jwks(self) -> CachedDocument:
+        jwks_uri = (await self.metadata())["jwks_uri"]
+        if self._jwks is None or self._jwks.url != jwks_uri:
+            self._jwks = CachedDocument(jwks_uri, settings.OIDC_CACHE_TTL_SECONDS)
+        return self._jwks
+
+    async def signing_key(self, kid: str | None) -> jwt.PyJWK:
+        jwks = await self.jwks()
+        key = _find_key(await jwks.get(), kid)
+        now = time.monotonic()
+        if (
+            key is None
+            and now - self._forced_refresh_at >= settings.OIDC_MIN_REFRESH_INTERVAL_SECONDS
+        ):
+            self._forced_refresh_at = now
+            logger.info(f"Unknown key id {kid}, refetching {jwks.url}")
+            key = _find_key(await jwks.refresh(), kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f"Unknown signing key id {kid}")
+        return jwt.PyJWK(key)
+
+    async def verify_id_token(
+        self, id_token: str, *, audience: str, issuer: str | Container[str] | None = None
+    ) -> dict[str, Any]:
+        """
+        Verify the signature and the standard claims of an ID token, returns
+        its claims. `issuer` defaults to the one in the discovery document.
+        """
+        metadata = await self.metadata()
+        key = await self.signing_key(jwt.get_unverified_header(id_token).get("kid"))
+        supported = metadata.get("id_token_signing_alg_values_supported", ["RS256"])
+        if key.algorithm_name not in supported:
+            raise jwt.InvalidAlgorithmError(f"Unexpected algorithm {key.algorithm_name}")
+        return jwt.decode(
+            id_token,
+            key=key,
+            algorithms=[key.algorithm_name],
+            audience=audience,
+            issuer=issuer or metadata["issuer"],
+            leeway=settings.OIDC_CLOCK_SKEW_SECONDS,
+            options={"require": ["exp", "iat", "iss", "aud", "sub"]},
+        )
+
+    async def warm_up(self) -> None:
+        try:
+            await (await self.jwks()).get()
+        except Exception as e:
+            logger.warning(f"Could not prefetch {self.discovery.url}: {e}")
+
+
+def _find_key(jwks: dict[str, Any], kid: str | None) -> dict[str, Any] | None:
+    keys = [key for key in jwks.get("keys", []) if key.get("use", "sig") == "sig"]
+    if kid is None and len(keys) == 1:
+        return keys[0]
+    return next((key for key in keys if key.get("kid") == kid), None)
+
+
+_providers: dict[str, OIDCProvider] = {}
+_warm_up: asyncio.Task | None = None
+
+
+def get_oidc_provider(discovery_url: str) -> OIDCProvider:
+    if discovery_url not in _providers:
+        _providers[discovery_url] = OIDCProvider(discovery_url)
+    return _providers[discovery_url]
+
+
+def open_oidc_providers() -> None:
+    """
+    Called from the application lifespan, prefetches discovery and JWKS of
+    the configured providers in the background.
+    """
+    global _warm_up
+    if settings.GOOGLE_CLIENT_ID and settings.GOOGLE_CLIENT_SECRET:
+        provider = get_oidc_provider(settings.GOOGLE_DISCOVERY_URL)
+        _warm_up = asyncio.create_task(provider.warm_up())
+
+
+async def close_oidc_providers() -> None:
+    if _warm_up is not None and not _warm_up.done():
+        _warm_up.cancel()
+    _providers.clear()
@@ -0,0 +1,155 @@
+"""
+Sampling CPU profiles of single requests, with pyinstrument.
+
+On demand: a superuser sends a request with `X-Profile: speedscope` (or
+`?profile=speedscope`) and gets its profile instead of the response, as
+speedscope JSON (open it at https://www.speedscope.app) or, with `html`,
+pyinstrument's interactive call tree and timeline. The original status is in
+`X-Profile-Status`. The token is checked with `get_current_user` and
+`get_current_active_superuser` before profiling starts; anyone else asking gets
+the regular response.
+
+In the background: PROFILING_SAMPLE_RATE of the requests are profiled and the
+slowest PROFILING_SLOWEST_PER_ROUTE of each route are kept as speedscope files
+in PROFILING_DIR/<route id>/. The ranking is per process, so with several
+workers each keeps its own slowest profiles.
+"""
+
+import asyncio
+import heapq
+import logging
+import os
+import random
+import time
+from pathlib import Path
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security.utils import get_authorization_scheme_param
+from pyinstrument import Profiler
+from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+from pyinstrument.session import Session
+from starlette.datastructures import Headers, QueryParams
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config import settings
+from src.core.metrics import route_label
+from src.database import async_session
+from src.routes.deps import get_current_active_superuser, get_current_user
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    "speedscope": ("application/json", SpeedscopeRenderer),
+    "html": ("text/html; charset=utf-8", HTMLRenderer),
+}
+
+
+def requested_format(scope: Scope) -> str | None:
+    """The profile format asked for with the header or the query flag, if any."""
+    value = Headers(scope=scope).get("x-profile")
+    if value is None and b"profile=" in scope["query_string"]:
+        value = QueryParams(scope["query_string"]).get("profile")
+    if value is None:
+        return None
+    return value.lower() if value.lower() in FORMATS else "speedscope"
+
+
+async def is_superuser(scope: Scope) -> bool:
+    scheme, token = get_authorization_scheme_param(Headers(scope=scope).get("authorization"))
+    if scheme.lower() != "bearer" or not token:
+        return False
+    async with async_session() as session:
+        try:
+            get_current_active_superuser(await get_current_user(session, token))
+        except HTTPException:
+            return False
+    return True
+
+
+class SlowestProfiles:
+    """Keeps the profiles of the slowest requests of each route on disk."""
+
+    def __init__(self, directory: str, keep: int):
+        self.directory = Path(directory)
+        self.keep = keep
+        # route -> min-heap of (duration, file)
+        self._slowest: dict[str, list[tuple[float, Path]]] = {}
+        self._writes: set[asyncio.Task] = set()
+
+    def offer(self, route: str, duration: float, session: Session) -> None:
+        """Write the profile in the background if it is among the slowest."""
+        slowest = self._slowest.setdefault(route, [])
+        if self.keep < 1 or (len(slowest) >= self.keep and duration <= slowest[0][0]):
+            return
+        path = self.directory / route / (
+            f"{duration * 1000:.0f}ms-{time.time_ns()}-{os.getpid()}.speedscope.json"
+        )
+        evicted = None
+        if len(slowest) < self.keep:
+            heapq.heappush(slowest, (duration, path))
+        else:
+            evicted = heapq.heapreplace(slowest, (duration, path))[1]
+        task = asyncio.create_task(run_in_threadpool(self._write, path, session, evicted))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    @staticmethod
+    def _write(path: Path, session: Session, evicted: Path | None) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(SpeedscopeRenderer().render(session))
+            if evicted is not None:
+                evicted.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Writing profile {path} failed: {e}")
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.slowest = SlowestProfiles(settings.PROFILING_DIR, settings.PROFILING_SLOWEST_PER_ROUTE)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        output = requested_format(scope)
+        if output is not None and await is_superuser(scope):
+            await self.profile_request(scope, receive, send, output)
+        elif settings.PROFILING_SAMPLE_RATE and random.random() < settings.PROFILING_SAMPLE_RATE:
+            await self.sample_request(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+    async def profile_request(self, scope: Scope, receive: Receive, send: Send, output: str) -> None:
+        status = 500
+
+        async def discard(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        profiler = Profiler(interval=settings.PROFILING_INTERVAL_SECONDS, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            profiler.stop()
+        media_type, renderer = FORMATS[output]
+        body = await run_in_threadpool(renderer().render, profiler.last_session)
+        response = Response(body, media_type=media_type, headers={"X-Profile-Status": str(status)})
+        await response(scope, receive, send)
+
+    async def sample_request(self, scope: Scope, receive: Receive, send: Send) -> None:
+        profiler = Profiler(interval=settings.PROFILING_INTERVAL_SECONDS, async_mode="enabled")
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.stop()
+        route = route_label(scope)
+        if route != "unmatched":
+            self.slowest.offer(route, time.perf_counter() - start, profiler.last_session)
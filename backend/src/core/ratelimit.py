@@ -0,0 +1,206 @@
+"""
+Sliding window rate limits for the unauthenticated endpoints.
+
+Each rule counts requests per key (client IP or a normalized login/email) in
+fixed windows and estimates the sliding window as the current count plus the
+previous window's count weighted by how much of it still overlaps, which needs
+two counters per key instead of a log of timestamps. Rejected requests are
+counted too, so a client that keeps hammering stays limited.
+
+The memory store is per process. The postgres store keeps the counters in the
+`ratelimitcounter` table, shared by every worker, at the cost of one round
+trip per rule.
+"""
+
+import asyncio
+import functools
+import logging
+import math
+import time
+from dataclasses import dataclass
+
+from fastapi import HTTPException, Request
+from sqlmodel import col, delete, text
+
+from src.config import settings
+from src.database import async_session, engine
+from src.routes.models import RateLimitCounter
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+# Counters of older windows no longer affect any rule
+POSTGRES_PRUNE_AGE_SECONDS = 2 * PERIODS["day"]
+POSTGRES_PRUNE_INTERVAL_SECONDS = 600.0
+# Count and read the previous window in one round trip; plain SQL as the ORM
+# does not cache the compilation of a CTE wrapping INSERT ... RETURNING
+POSTGRES_HIT = text(
+    """
+    WITH counted AS (
+        INSERT INTO ratelimitcounter (key, window_start, count)
+        VALUES (:key, :window_start, 1)
+        ON CONFLICT (key, window_start)
+        DO UPDATE SET count = ratelimitcounter.count + 1
+        RETURNING count
+    )
+    SELECT counted.count, coalesce(
+        (SELECT count FROM ratelimitcounter
+         WHERE key = :key AND window_start = :previous_start), 0
+    )
+    FROM counted
+    """
+)
+
+
+@dataclass(frozen=True)
+class Rate:
+    limit: int
+    window: int
+
+
+@functools.cache
+def parse_rate(value: str) -> Rate:
+    """Parse "<requests>/<period>", e.g. "10/minute"."""
+    limit, _, period = value.partition("/")
+    if period not in PERIODS or not limit.isdigit() or int(limit) < 1:
+        raise ValueError(f"Invalid rate limit {value!r}, expected e.g. '10/minute'")
+    return Rate(limit=int(limit), window=PERIODS[period])
+
+
+class MemoryRateLimitStore:
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        # key -> [window, window index, count in that window, count in the one before]
+        self._counters: dict[str, list[int]] = {}
+
+    async def hit(self, key: str, window: int) -> tuple[int, int, float]:
+        """
+        Count a request, returns the counts of the previous and the current
+        window and the seconds elapsed in the current one.
+        """
+        now = time.time()
+        index = int(now // window)
+        counter = self._counters.get(key)
+        if counter is None:
+            if len(self._counters) >= self.max_keys:
+                self._evict(now)
+            counter = self._counters[key] = [window, index, 0, 0]
+        elif counter[1] != index:
+            previous = counter[2] if counter[1] == index - 1 else 0
+            counter[1:] = [index, 0, previous]
+        counter[2] += 1
+        return counter[3], counter[2], now - index * window
+
+    def _evict(self, now: float) -> None:
+        """Drop the counters that no longer count, then the oldest keys."""
+        self._counters = {
+            key: counter
+            for key, counter in self._counters.items()
+            if counter[1] >= int(now // counter[0]) - 1
+        }
+        overflow = len(self._counters) - self.max_keys * 9 // 10
+        for key in list(self._counters)[: max(overflow, 0)]:
+            del self._counters[key]
+
+
+class PostgresRateLimitStore:
+    def __init__(self) -> None:
+        self._pruned_at = time.monotonic()
+        self._prune: asyncio.Task | None = None
+
+    async def hit(self, key: str, window: int) -> tuple[int, int, float]:
+        now = time.time()
+        window_start = int(now // window) * window
+        # A single statement, autocommit saves the BEGIN and COMMIT round trips
+        async with engine.connect() as conn:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            result = await conn.execute(
+                POSTGRES_HIT,
+                {"key": key, "window_start": window_start, "previous_start": window_start - window},
+            )
+            current, previous = result.one()
+        self._prune_periodically()
+        return previous, current, now - window_start
+
+    def _prune_periodically(self) -> None:
+        if time.monotonic() - self._pruned_at < POSTGRES_PRUNE_INTERVAL_SECONDS:
+            return
+        self._pruned_at = time.monotonic()
+        self._prune = asyncio.create_task(self._delete_expired())
+
+    async def _delete_expired(self) -> None:
+        cutoff = int(time.time()) - POSTGRES_PRUNE_AGE_SECONDS
+        try:
+            async with async_session() as session:
+                await session.exec(
+                    delete(RateLimitCounter).where(col(RateLimitCounter.window_start) < cutoff)
+                )
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Pruning rate limit counters failed: {e}")
+
+
+def seconds_until_allowed(rate: Rate, previous: int, current: int, elapsed: float) -> float:
+    """How long until one more request fits the sliding window estimate."""
+    if current < rate.limit:
+        # Wait for the previous window's weight to fade enough
+        overlap = (rate.limit - current - 1) / previous
+        return max((1 - overlap) * rate.window - elapsed, 0.0)
+    # Wait for the next window, and then for this one to fade enough
+    overlap = (rate.limit - 1) / current
+    return rate.window - elapsed + (1 - overlap) * rate.window
+
+
+async def hit(key: str, rate: Rate) -> float | None:
+    """Count a request against `rate`, returns the seconds to wait if exceeded."""
+    previous, current, elapsed = await get_rate_limit_store().hit(key, rate.window)
+    estimate = previous * (1 - elapsed / rate.window) + current
+    if estimate <= rate.limit:
+        return None
+    return seconds_until_allowed(rate, previous, current, elapsed)
+
+
+async def enforce_rate_limit(
+    request: Request,
+    scope: str,
+    *,
+    per_ip: str,
+    per_identifier: str | None = None,
+    identifier: str | None = None,
+) -> None:
+    """
+    Count the request against the client IP, and the identifier (a login or
+    email) when given, raising 429 with Retry-After once over either limit.
+    If the store fails, requests pass.
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    client = request.client.host if request.client else "unknown"
+    rules = [(f"{scope}:ip:{client}", parse_rate(per_ip))]
+    if per_identifier and identifier:
+        rules.append((f"{scope}:id:{identifier.strip().lower()}", parse_rate(per_identifier)))
+    for key, rate in rules:
+        try:
+            retry_after = await hit(key, rate)
+        except Exception as e:
+            logger.warning(f"Rate limit check for {scope} failed, allowing: {e}")
+            return
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, please try again later",
+                headers={"Retry-After": str(max(math.ceil(retry_after), 1))},
+            )
+
+
+_store: MemoryRateLimitStore | PostgresRateLimitStore | None = None
+
+
+def get_rate_limit_store() -> MemoryRateLimitStore | PostgresRateLimitStore:
+    global _store
+    if _store is None:
+        if settings.RATE_LIMIT_BACKEND == "postgres":
+            _store = PostgresRateLimitStore()
+        else:
+            _store = MemoryRateLimitStore(settings.RATE_LIMIT_MEMORY_MAX_KEYS)
+    return _store
@@ -0,0 +1,79 @@
+import asyncio
+import functools
+from typing import Any, Callable
+
+from fastapi import Response
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.dependencies.models import Dependant
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from src.config import settings
+from src.core.timing import TimedRoute, timed
+
+
+def _uses_response_param(dependant: Dependant) -> bool:
+    if dependant.response_param_name:
+        return True
+    return any(_uses_response_param(dep) for dep in dependant.dependencies)
+
+
+class FastJSONRoute(TimedRoute):
+    """
+    Route class with a single-pass serialization fast path.
+
+    FastAPI validates whatever an endpoint returns against `response_model`,
+    dumps it to python objects and then encodes those with the stdlib `json`
+    module. When the endpoint already returns an instance of exactly the
+    response model (e.g. `ItemsPublic(...)` built by the handler), it was
+    validated on construction, so it is serialized once with `model_dump_json`
+    and returned as is. Anything else, ORM rows included, takes the regular path.
+
+    Enable it per router with `APIRouter(route_class=FastJSONRoute)`.
+    """
+
+    def get_route_handler(self) -> Callable:
+        if self._fast_path_applicable():
+            self.dependant.call = self._wrap_endpoint(self.dependant.call)
+        return super().get_route_handler()
+
+    def _fast_path_applicable(self) -> bool:
+        response_class = self.response_class
+        if isinstance(response_class, DefaultPlaceholder):
+            response_class = response_class.value
+        return (
+            settings.FAST_JSON_RESPONSES
+            and isinstance(self.response_model, type)
+            and issubclass(self.response_model, BaseModel)
+            and response_class is JSONResponse
+            and asyncio.iscoroutinefunction(self.dependant.call)
+            # headers/status set on an injected Response would be lost
+            and not _uses_response_param(self.dependant)
+        )
+
+    def _wrap_endpoint(self, call: Callable) -> Callable:
+        response_model = self.response_model
+        status_code = self.status_code or 200
+        dump_options: dict[str, Any] = {
+            "include": self.response_model_include,
+            "exclude": self.response_model_exclude,
+            "by_alias": self.response_model_by_alias,
+            "exclude_unset": self.response_model_exclude_unset,
+            "exclude_defaults": self.response_model_exclude_defaults,
+            "exclude_none": self.response_model_exclude_none,
+        }
+
+        @functools.wraps(call)
+        async def endpoint(**values: Any) -> Any:
+            content = await call(**values)
+            if type(content) is response_model:
+                with timed("serialize"):
+                    body = content.model_dump_json(**dump_options)
+                return Response(
+                    content=body,
+                    status_code=status_code,
+                    media_type="application/json",
+                )
+            return content
+
+        return endpoint
@@ -1,3 +1,9 @@
+import asyncio
+import functools
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
@@ -5,6 +11,8 @@ import jwt
 from passlib.context import CryptContext
 
 from src.config import settings
+from src.core import timing
+from src.core.metrics import PASSWORD_HASH_DURATION, PASSWORD_HASH_QUEUE_DEPTH
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -25,3 +33,62 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+@functools.cache
+def get_password_hash_executor() -> ThreadPoolExecutor:
+    """
+    bcrypt releases the GIL, so hashing in a few dedicated threads keeps the
+    event loop responsive without competing with the default threadpool.
+    """
+    return ThreadPoolExecutor(
+        max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+    )
+
+
+async def _run_password_hashing(operation: str, fn: Any, *args: str) -> Any:
+    # Counted in the gauge itself, which also works with multiprocess metrics.
+    # Leaves the queue once: when a thread picks the job, or when it is
+    # cancelled before that.
+    queued = True
+    lock = threading.Lock()
+
+    def leave_queue() -> None:
+        nonlocal queued
+        with lock:
+            if queued:
+                queued = False
+                PASSWORD_HASH_QUEUE_DEPTH.dec()
+
+    def timed() -> Any:
+        leave_queue()
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            PASSWORD_HASH_DURATION.labels(operation).observe(time.perf_counter() - start)
+
+    loop = asyncio.get_running_loop()
+    PASSWORD_HASH_QUEUE_DEPTH.inc()
+    try:
+        with timing.timed("hash"):
+            return await loop.run_in_executor(get_password_hash_executor(), timed)
+    finally:
+        leave_queue()
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_password_hashing("verify", verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_password_hashing("hash", get_password_hash, password)
+
+
+@functools.cache
+def get_unusable_password_hash() -> str:
+    """
+    Hash of a random secret that is thrown away, for accounts that never log in
+    with a local password (LDAP, OAuth2). Computed once per process.
+    """
+    return get_password_hash(secrets.token_urlsafe(32))
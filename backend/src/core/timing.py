@@ -0,0 +1,154 @@
+"""
+Server-Timing header with a per-request breakdown.
+
+`ServerTimingMiddleware` starts a timings dict in a context variable for each
+request and, when the response starts, sends what the request accumulated:
+
+- auth: `get_current_user` (token decode and user lookup, its query included)
+- db: SQL statements, measured around the driver call
+- hash: password hashing and verification, queueing for a thread included
+- upstream: LDAP and OAuth2/OIDC provider calls
+- serialize: from the endpoint returning to the response starting, plus the
+  `FastJSONRoute` dump; the endpoint must be on a `TimedRoute` router
+- total: from the request reaching the middleware to the response starting
+
+Phases overlap (auth includes a query, concurrent upstream calls add up), they
+attribute time rather than partition it. Outside a request, or when
+SERVER_TIMING_ENABLED is off, the timers are a context variable lookup.
+"""
+
+import functools
+import inspect
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PHASES = ("auth", "db", "hash", "upstream", "serialize")
+# Key of the endpoint's return time in the timings dict, not a phase
+HANDLER_END = "handler_end"
+
+_timings: ContextVar[dict[str, float] | None] = ContextVar("server_timing", default=None)
+
+
+def add_timing(phase: str, seconds: float) -> None:
+    timings = _timings.get()
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    if _timings.get() is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_timing(phase, time.perf_counter() - start)
+
+
+def record_handler_end() -> None:
+    timings = _timings.get()
+    if timings is not None:
+        timings[HANDLER_END] = time.perf_counter()
+
+
+class TimedRoute(APIRoute):
+    """Route class recording when the endpoint returns, for the serialize phase."""
+
+    def get_route_handler(self) -> Callable:
+        self.dependant.call = _record_end(self.dependant.call)
+        return super().get_route_handler()
+
+
+def _record_end(call: Callable) -> Callable:
+    if inspect.iscoroutinefunction(call):
+
+        @functools.wraps(call)
+        async def endpoint(**values: Any) -> Any:
+            try:
+                return await call(**values)
+            finally:
+                record_handler_end()
+
+        return endpoint
+
+    @functools.wraps(call)
+    def sync_endpoint(**values: Any) -> Any:
+        try:
+            return call(**values)
+        finally:
+            record_handler_end()
+
+    return sync_endpoint
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement of `engine` into the db phase."""
+
+    # One entry per statement in flight, None outside of a timed request, so
+    # every statement pops its own start whether it succeeds or fails
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = time.perf_counter() if _timings.get() is not None else None
+        conn.info.setdefault("server_timing_starts", []).append(start)
+
+    def end_statement(conn: Any) -> None:
+        starts = conn.info.get("server_timing_starts") if conn is not None else None
+        start = starts.pop() if starts else None
+        if start is not None:
+            add_timing("db", time.perf_counter() - start)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        end_statement(conn)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        end_statement(context.connection)
+
+
+def server_timing_header(timings: dict[str, float], now: float, start: float) -> str:
+    if HANDLER_END in timings:
+        timings["serialize"] = timings.get("serialize", 0.0) + now - timings[HANDLER_END]
+    entries = [
+        f"{phase};dur={timings[phase] * 1000:.1f}" for phase in PHASES if phase in timings
+    ]
+    entries.append(f"total;dur={(now - start) * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class ServerTimingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        timings: dict[str, float] = {}
+        token = _timings.set(timings)
+
+        async def send_with_timings(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    server_timing_header(timings, time.perf_counter(), start),
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timings)
+        finally:
+            _timings.reset(token)
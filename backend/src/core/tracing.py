@@ -0,0 +1,315 @@
+"""
+OpenTelemetry tracing, exported over OTLP/HTTP.
+
+Spans are made by our own hooks rather than the contrib instrumentations:
+`TracingMiddleware` for each HTTP request (continuing an incoming
+`traceparent`), SQLAlchemy cursor events for every statement, `observe_upstream`
+for LDAP, `SharedTransport` for OAuth2/OIDC calls (propagating `traceparent`)
+and `smtp_span` for SMTP.
+
+Sampling is decided per trace in two steps:
+
+- head: TRACING_SAMPLE_RATE of the traces are kept, decided from the trace id
+  when the root span starts.
+- tail: with TRACING_TAIL_SAMPLING, every span is recorded and buffered until
+  the root span of its trace ends, then the trace is also kept if it took
+  TRACING_TAIL_SLOW_SECONDS or more or any of its spans failed. At most
+  TRACING_TAIL_MAX_TRACES traces are buffered, the oldest are dropped first.
+
+Without tail sampling, spans of traces not kept up front are not recorded at
+all, which is the cheapest setting below 100%. `open_tracing` takes an exporter,
+so tests and benchmarks can pass an `InMemorySpanExporter`.
+"""
+
+import threading
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from typing import Any
+
+from opentelemetry import propagate, trace
+from opentelemetry.context import Context
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter
+from opentelemetry.sdk.trace.sampling import (
+    Decision,
+    ParentBased,
+    Sampler,
+    SamplingResult,
+    TraceIdRatioBased,
+)
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from opentelemetry.util.types import Attributes
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config import settings
+
+# Root span attribute telling whether head sampling kept the trace
+HEAD_SAMPLED = "sampling.head"
+MAX_STATEMENT_LENGTH = 1000
+
+_provider: TracerProvider | None = None
+_tracer: trace.Tracer = trace.NoOpTracer()
+
+
+class HeadSampler(Sampler):
+    """
+    Ratio sampling by trace id. With tail sampling every span is sampled and
+    the root span only records the head decision, for `TailSamplingProcessor`.
+    """
+
+    def __init__(self, rate: float, tail: bool):
+        self.tail = tail
+        self._ratio = TraceIdRatioBased(rate)
+        self._head = ParentBased(self._ratio)
+
+    def should_sample(
+        self,
+        parent_context: Context | None,
+        trace_id: int,
+        name: str,
+        kind: SpanKind | None = None,
+        attributes: Attributes = None,
+        links: Sequence[trace.Link] | None = None,
+        trace_state: trace.TraceState | None = None,
+    ) -> SamplingResult:
+        if not self.tail:
+            return self._head.should_sample(
+                parent_context, trace_id, name, kind, attributes, links, trace_state
+            )
+        parent = trace.get_current_span(parent_context).get_span_context()
+        if parent.is_valid and not parent.is_remote:
+            return SamplingResult(Decision.RECORD_AND_SAMPLE, attributes, parent.trace_state)
+        if parent.is_valid:
+            # Continue the decision of the caller's trace
+            head = parent.trace_flags.sampled
+        else:
+            head = self._ratio.should_sample(parent_context, trace_id, name).decision.is_sampled()
+        return SamplingResult(
+            Decision.RECORD_AND_SAMPLE, {**(attributes or {}), HEAD_SAMPLED: head}, trace_state
+        )
+
+    def get_description(self) -> str:
+        return f"HeadSampler{{{self._ratio.get_description()}, tail={self.tail}}}"
+
+
+class TailSamplingProcessor(SpanProcessor):
+    """Buffers the spans of each trace, forwarding the kept traces to `processor`."""
+
+    def __init__(self, processor: SpanProcessor, slow_seconds: float, max_traces: int):
+        self.processor = processor
+        self.slow_ns = int(slow_seconds * 1e9)
+        self.max_traces = max_traces
+        # trace id -> spans ended so far, in trace start order
+        self._traces: dict[int, list[ReadableSpan]] = {}
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span, parent_context: Context | None = None) -> None:
+        pass
+
+    def on_end(self, span: ReadableSpan) -> None:
+        trace_id = span.context.trace_id
+        local_root = span.parent is None or span.parent.is_remote
+        with self._lock:
+            spans = self._traces.get(trace_id)
+            if spans is None:
+                if local_root:
+                    spans = []
+                else:
+                    if len(self._traces) >= self.max_traces:
+                        del self._traces[next(iter(self._traces))]
+                    spans = self._traces[trace_id] = []
+            spans.append(span)
+            if not local_root:
+                return
+            self._traces.pop(trace_id, None)
+        if self._keep(span, spans):
+            for kept in spans:
+                self.processor.on_end(kept)
+
+    def _keep(self, root: ReadableSpan, spans: list[ReadableSpan]) -> bool:
+        if root.attributes and root.attributes.get(HEAD_SAMPLED):
+            return True
+        if (root.end_time or 0) - (root.start_time or 0) >= self.slow_ns:
+            return True
+        return any(span.status.status_code is StatusCode.ERROR for span in spans)
+
+    def shutdown(self) -> None:
+        self.processor.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.processor.force_flush(timeout_millis)
+
+
+def get_tracer() -> trace.Tracer:
+    return _tracer
+
+
+def open_tracing(exporter: SpanExporter | None = None) -> None:
+    """
+    Called from the application lifespan. Exports with OTLP/HTTP, configured
+    by the standard OTEL_EXPORTER_OTLP_* variables, unless given an exporter.
+    """
+    global _provider, _tracer
+    if exporter is None:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        exporter = OTLPSpanExporter()
+    processor: SpanProcessor = BatchSpanProcessor(exporter)
+    if settings.TRACING_TAIL_SAMPLING:
+        processor = TailSamplingProcessor(
+            processor, settings.TRACING_TAIL_SLOW_SECONDS, settings.TRACING_TAIL_MAX_TRACES
+        )
+    _provider = TracerProvider(
+        sampler=HeadSampler(settings.TRACING_SAMPLE_RATE, settings.TRACING_TAIL_SAMPLING),
+        resource=Resource.create(
+            {
+                "service.name": settings.PROJECT_NAME,
+                "deployment.environment": settings.ENVIRONMENT,
+            }
+        ),
+    )
+    _provider.add_span_processor(processor)
+    _tracer = _provider.get_tracer("src")
+
+
+def close_tracing() -> None:
+    """Export the remaining spans."""
+    global _provider, _tracer
+    if _provider is None:
+        return
+    provider, _provider, _tracer = _provider, None, trace.NoOpTracer()
+    provider.shutdown()
+
+
+def _skip_span() -> bool:
+    """Whether a span would not be recorded: tracing is off or the trace sampled out."""
+    if _provider is None:
+        return True
+    parent = trace.get_current_span()
+    return parent.get_span_context().is_valid and not parent.is_recording()
+
+
+def _end_span(span: trace.Span, error: BaseException | None) -> None:
+    if error is not None:
+        span.record_exception(error)
+        span.set_status(Status(StatusCode.ERROR, type(error).__name__))
+    span.end()
+
+
+@contextmanager
+def client_span(name: str, attributes: dict[str, Any] | None = None) -> Iterator[trace.Span]:
+    """A span around a call to another system, ended with an error status if it raises."""
+    if _skip_span():
+        # Saves creating and entering a span that records nothing
+        yield trace.get_current_span()
+        return
+    with _tracer.start_as_current_span(
+        name,
+        kind=SpanKind.CLIENT,
+        attributes=attributes,
+        record_exception=False,
+        set_status_on_exception=False,
+    ) as span:
+        try:
+            yield span
+        except BaseException as e:
+            if span.is_recording():
+                span.record_exception(e)
+                span.set_status(Status(StatusCode.ERROR, type(e).__name__))
+            raise
+
+
+def smtp_span(operation: str) -> Any:
+    return client_span(
+        f"smtp {operation}",
+        {"server.address": settings.SMTP_HOST or "", "server.port": settings.SMTP_PORT},
+    )
+
+
+def inject_trace_context(headers: Any) -> None:
+    """Add `traceparent` for the current span to outgoing request headers."""
+    propagate.inject(headers)
+
+
+def trace_engine(engine: Engine) -> None:
+    """A client span for every statement of `engine`."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        span = None
+        if not _skip_span():
+            span = _tracer.start_span(
+                statement.split(None, 1)[0].upper() if statement else "SQL",
+                kind=SpanKind.CLIENT,
+            )
+            span.set_attribute("db.system.name", "postgresql")
+            span.set_attribute("db.query.text", statement[:MAX_STATEMENT_LENGTH])
+        conn.info.setdefault("tracing_spans", []).append(span)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("tracing_spans")
+        span = spans.pop() if spans else None
+        if span is not None:
+            _end_span(span, None)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        spans = context.connection.info.get("tracing_spans") if context.connection else None
+        span = spans.pop() if spans else None
+        if span is not None:
+            _end_span(span, context.original_exception)
+
+
+class TracingMiddleware:
+    """A server span per HTTP request, named after the matched route template."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        carrier = {
+            key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]
+        }
+        method = scope["method"]
+        span = _tracer.start_span(
+            method, context=propagate.extract(carrier), kind=SpanKind.SERVER
+        )
+        if not span.is_recording():
+            with trace.use_span(span, end_on_exit=True):
+                await self.app(scope, receive, send)
+            return
+        span.set_attribute("http.request.method", method)
+        span.set_attribute("url.path", scope["path"])
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        error: BaseException | None = None
+        try:
+            with trace.use_span(
+                span, record_exception=False, set_status_on_exception=False
+            ):
+                await self.app(scope, receive, send_with_status)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            route = scope.get("route")
+            if route is not None:
+                span.update_name(f"{method} {route.path}")
+                span.set_attribute("http.route", route.path)
+            span.set_attribute("http.response.status_code", status)
+            if status >= 500 and error is None:
+                span.set_status(Status(StatusCode.ERROR))
+            _end_span(span, error)
@@ -1,22 +1,36 @@
+from sqlalchemy import text
 from sqlmodel import SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.ext.asyncio import create_async_engine
 from typing import AsyncGenerator
 from sqlalchemy.orm import sessionmaker
 from src.config import settings
+from src.core.metrics import InstrumentedAsyncPool, register_pool
+from src.core.timing import instrument_engine
+from src.core.tracing import trace_engine
 
 engine = create_async_engine(
-    str(settings.SQLALCHEMY_DATABASE_URI), echo=True, future=True
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    echo=True,
+    future=True,
+    poolclass=InstrumentedAsyncPool,
 )
+register_pool(engine.sync_engine.pool)
+instrument_engine(engine.sync_engine)
+if settings.TRACING_ENABLED:
+    trace_engine(engine.sync_engine)
+
+async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
 async def init_db():
     async with engine.begin() as conn:
         # await conn.run_sync(SQLModel.metadata.drop_all)
+        # Needed by the trigram indexes of the user table
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(SQLModel.metadata.create_all)
 
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
-    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
     async with async_session() as session:
         yield session
@@ -6,7 +6,18 @@ from starlette.middleware.cors import CORSMiddleware
 
 from src.routes.root import router as root_router
 from src.config import settings
+from src.core.health import mark_started, mark_stopping
+from src.core.http import close_http_transport, open_http_transport
+from src.core.metrics import MetricsMiddleware, metrics
+from src.core.ldap import close_ldap_client, open_ldap_client
+from src.core.loopwatch import close_loop_watchdog, open_loop_watchdog
+from src.core.oidc import close_oidc_providers, open_oidc_providers
+from src.core.profiling import ProfilingMiddleware
+from src.core.timing import ServerTimingMiddleware
+from src.core.tracing import TracingMiddleware, close_tracing, open_tracing
 from src.database import init_db
+from src.utils.auth import get_email_templates
+from src.workers import start_workers, stop_workers
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -14,13 +25,36 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 
 
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
-    sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
+    sentry_sdk.init(
+        dsn=str(settings.SENTRY_DSN),
+        traces_sample_rate=settings.SENTRY_TRACES_SAMPLE_RATE,
+    )
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    if settings.TRACING_ENABLED:
+        open_tracing()
+    get_email_templates()
     await init_db()
+    await open_ldap_client()
+    open_http_transport()
+    open_oidc_providers()
+    start_workers()
+    if settings.LOOP_WATCHDOG_ENABLED:
+        open_loop_watchdog()
+    mark_started()
     yield
+    mark_stopping()
+    try:
+        # Raises with LOOP_WATCHDOG_FAIL_ON_BLOCK, after the rest shut down
+        await close_loop_watchdog()
+    finally:
+        await stop_workers()
+        await close_oidc_providers()
+        await close_http_transport()
+        await close_ldap_client()
+        close_tracing()
 
 
 app = FastAPI(
@@ -31,6 +65,10 @@ app = FastAPI(
 )
 
 
+# Innermost, so profile responses still get the CORS headers
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 # Set all CORS enabled origins
 if settings.all_cors_origins:
     app.add_middleware(
@@ -41,4 +79,14 @@ if settings.all_cors_origins:
         allow_headers=["*"],
     )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    app.add_route("/metrics", metrics, include_in_schema=False)
+
+if settings.SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
+
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+
 app.include_router(root_router, prefix=settings.API_V1_STR)
@@ -0,0 +1,62 @@
+"""Add auth_source to users
+
+Revision ID: 4b7f2a9e6c13
+Revises: d5e8a3f41c97
+Create Date: 2026-10-19 14:03:27.518204
+
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Sequence, Union
+
+from alembic import op
+import bcrypt
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7f2a9e6c13'
+down_revision: Union[str, Sequence[str], None] = 'd5e8a3f41c97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Baseline LDAP accounts were given a salted bcrypt hash of this string
+LDAP_PLACEHOLDER_PASSWORD = b'ldap-user-no-password'
+
+
+def _is_ldap_placeholder(hashed_password: str) -> bool:
+    try:
+        return bcrypt.checkpw(LDAP_PLACEHOLDER_PASSWORD, hashed_password.encode())
+    except ValueError:
+        return False
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    auth_source = sa.Enum('local', 'ldap', 'oauth2', name='userauthsource')
+    auth_source.create(op.get_bind(), checkfirst=True)
+    # Existing rows stay NULL and are resolved on their next login, except
+    # LDAP accounts, recognized by their placeholder hash. The hashes are
+    # salted, so each one is verified here, in threads as bcrypt releases the GIL
+    op.add_column('user', sa.Column('auth_source', auth_source, nullable=True))
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.text("""SELECT id, hashed_password FROM "user" WHERE hashed_password LIKE '$2%'""")
+    ).all()
+    with ThreadPoolExecutor() as executor:
+        matches = executor.map(_is_ldap_placeholder, [row.hashed_password for row in rows])
+        ldap_ids = [row.id for row, match in zip(rows, matches) if match]
+    if ldap_ids:
+        bind.execute(
+            sa.text("""UPDATE "user" SET auth_source = 'ldap' WHERE id IN :ids""").bindparams(
+                sa.bindparam('ids', expanding=True)
+            ),
+            {'ids': ldap_ids},
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('user', 'auth_source')
+    sa.Enum(name='userauthsource').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,56 @@
+"""Case-insensitive unique indexes on email and username
+
+Revision ID: 9c4d1e7b2f80
+Revises: 62a7e3e16d2c
+Create Date: 2026-10-19 10:03:18.551027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4d1e7b2f80'
+down_revision: Union[str, Sequence[str], None] = '62a7e3e16d2c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def find_collisions(column: str) -> list[tuple[str, list[str]]]:
+    """Values of `column` that only differ by case, which the new unique index rejects."""
+    rows = op.get_bind().execute(
+        sa.text(
+            f'SELECT lower({column}), array_agg({column} ORDER BY {column}) '
+            f'FROM "user" WHERE {column} IS NOT NULL '
+            f'GROUP BY lower({column}) HAVING count(*) > 1'
+        )
+    )
+    return [(key, values) for key, values in rows]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    collisions = {
+        column: find_collisions(column) for column in ("email", "username")
+    }
+    if any(collisions.values()):
+        report = "\n".join(
+            f"  {column}: {', '.join(values)}"
+            for column, found in collisions.items()
+            for _, values in found
+        )
+        raise RuntimeError(
+            "Cannot add case-insensitive unique indexes, these users only differ "
+            f"by case:\n{report}\nMerge or rename them and run the migration again."
+        )
+    op.create_index('ix_user_email_lower', 'user', [sa.text('lower(email)')], unique=True)
+    op.create_index('ix_user_username_lower', 'user', [sa.text('lower(username)')], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_username_lower', table_name='user')
+    op.drop_index('ix_user_email_lower', table_name='user')
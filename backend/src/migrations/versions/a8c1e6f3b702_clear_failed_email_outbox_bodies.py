@@ -0,0 +1,32 @@
+"""Clear failed email outbox bodies
+
+Revision ID: a8c1e6f3b702
+Revises: e2b7d4f9a613
+Create Date: 2026-10-21 10:27:15.804369
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8c1e6f3b702'
+down_revision: Union[str, Sequence[str], None] = 'e2b7d4f9a613'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The worker now clears the body when it gives up, do the same for the
+    # emails that failed before, they can hold reset links and passwords
+    op.execute("UPDATE emailoutbox SET html_content = '' WHERE status = 'failed'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The bodies are gone for good
+    pass
@@ -0,0 +1,34 @@
+"""Add trigram indexes for user search
+
+Revision ID: d5e8a3f41c97
+Revises: 9c4d1e7b2f80
+Create Date: 2026-10-19 11:26:02.918344
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e8a3f41c97'
+down_revision: Union[str, Sequence[str], None] = '9c4d1e7b2f80'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_user_email_trgm', 'user', ['email'], unique=False, postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'})
+    op.create_index('ix_user_username_trgm', 'user', ['username'], unique=False, postgresql_using='gin', postgresql_ops={'username': 'gin_trgm_ops'})
+    op.create_index('ix_user_full_name_trgm', 'user', ['full_name'], unique=False, postgresql_using='gin', postgresql_ops={'full_name': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_full_name_trgm', table_name='user', postgresql_using='gin')
+    op.drop_index('ix_user_username_trgm', table_name='user', postgresql_using='gin')
+    op.drop_index('ix_user_email_trgm', table_name='user', postgresql_using='gin')
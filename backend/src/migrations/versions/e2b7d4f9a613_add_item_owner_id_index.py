@@ -0,0 +1,32 @@
+"""Add item owner_id index
+
+Revision ID: e2b7d4f9a613
+Revises: d7a2c5e9f311
+Create Date: 2026-10-20 09:12:41.530217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b7d4f9a613'
+down_revision: Union[str, Sequence[str], None] = 'd7a2c5e9f311'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built without blocking writes to item, which CONCURRENTLY cannot do in a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_item_owner_id'), 'item', ['owner_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_item_owner_id'), table_name='item', postgresql_concurrently=True, if_exists=True)
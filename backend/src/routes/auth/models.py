@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from sqlmodel import Field, SQLModel
 
 
@@ -15,3 +17,30 @@ class TokenPayload(SQLModel):
 class NewPassword(SQLModel):
     token: str
     new_password: str = Field(min_length=8, max_length=40)
+
+
+# A user entry read from the LDAP directory
+class LDAPDirectoryUser(SQLModel):
+    dn: str
+    username: str
+    email: str
+    full_name: str
+
+
+class LDAPCredentialCacheStats(SQLModel):
+    enabled: bool
+    entries: int
+    hits: int
+    misses: int
+    stale_hits: int
+    hit_rate: float
+
+
+# Progress of the LDAP directory sync (see src/workers/ldap_sync.py), one row
+# per synced search; modify_timestamp is the LDAP GeneralizedTime watermark
+class LDAPSyncState(SQLModel, table=True):
+    name: str = Field(primary_key=True, max_length=64)
+    modify_timestamp: str | None = Field(default=None, max_length=32)
+    lease_expires_at: datetime | None = None
+    last_synced_at: datetime | None = None
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -1,36 +1,48 @@
 from datetime import timedelta
 from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import HTMLResponse
 from fastapi.security import OAuth2PasswordRequestForm
 
 from src.routes.deps import CurrentUser, AsyncSessionDep, get_current_active_superuser
 from src.core import security
 from src.config import settings
-from src.core.security import get_password_hash
 from src.routes.models import Message
-from src.routes.auth.models import NewPassword, Token
-from src.routes.users.models import UserPublic
+from src.core.ldap import ldap_credential_cache
+from src.core.ratelimit import enforce_rate_limit
+from src.core.timing import TimedRoute
+from src.routes.auth.models import LDAPCredentialCacheStats, NewPassword, Token
+from src.routes.users.models import UserAuthSource, UserPublic
+from src.routes.users import service as user_service
 from src.utils.auth import (
     generate_password_reset_token,
     generate_reset_password_email,
-    send_email,
+    queue_email,
     verify_password_reset_token,
 )
 from src.routes.auth import service as auth_service
 
-router = APIRouter(tags=["auth"])
+router = APIRouter(tags=["auth"], route_class=TimedRoute)
 
 
 @router.post("/auth/access-token")
 async def login_access_token(
-    session: AsyncSessionDep, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
+    request: Request,
+    session: AsyncSessionDep,
+    form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
 ) -> Token:
     """
     OAuth2 compatible token login, get an access token for future requests.
     Supports both local and LDAP authentication.
     """
+    await enforce_rate_limit(
+        request,
+        "login",
+        per_ip=settings.RATE_LIMIT_LOGIN_PER_IP,
+        per_identifier=settings.RATE_LIMIT_LOGIN_PER_IDENTIFIER,
+        identifier=form_data.username,
+    )
     # Try hybrid authentication (LDAP first, then local)
     user = await auth_service.authenticate_hybrid(
         session=session, username=form_data.username, password=form_data.password
@@ -49,13 +61,22 @@ async def login_access_token(
 
 @router.post("/auth/ldap-login")
 async def ldap_login(
-    session: AsyncSessionDep, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
+    request: Request,
+    session: AsyncSessionDep,
+    form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
 ) -> Token:
     """
     LDAP-only authentication endpoint
     """
     if not settings.LDAP_ENABLED:
         raise HTTPException(status_code=400, detail="LDAP authentication is not enabled")
+    await enforce_rate_limit(
+        request,
+        "login",
+        per_ip=settings.RATE_LIMIT_LOGIN_PER_IP,
+        per_identifier=settings.RATE_LIMIT_LOGIN_PER_IDENTIFIER,
+        identifier=form_data.username,
+    )
     
     user = await auth_service.authenticate_ldap(
         session=session, username=form_data.username, password=form_data.password
@@ -89,6 +110,18 @@ async def ldap_status() -> dict[str, Any]:
     }
 
 
+@router.get(
+    "/auth/ldap-credential-cache",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=LDAPCredentialCacheStats,
+)
+async def ldap_credential_cache_stats() -> Any:
+    """
+    LDAP credential cache counters for this process (hit rate, stale serves)
+    """
+    return ldap_credential_cache.stats()
+
+
 @router.post("/auth/test-token", response_model=UserPublic)
 async def test_token(current_user: CurrentUser) -> Any:
     """
@@ -98,10 +131,19 @@ async def test_token(current_user: CurrentUser) -> Any:
 
 
 @router.post("/password-recovery/{email}")
-async def recover_password(email: str, session: AsyncSessionDep) -> Message:
+async def recover_password(
+    request: Request, email: str, session: AsyncSessionDep
+) -> Message:
     """
     Password Recovery
     """
+    await enforce_rate_limit(
+        request,
+        "password_recovery",
+        per_ip=settings.RATE_LIMIT_PASSWORD_RECOVERY_PER_IP,
+        per_identifier=settings.RATE_LIMIT_PASSWORD_RECOVERY_PER_IDENTIFIER,
+        identifier=email,
+    )
     user = await auth_service.get_user_by_email(session=session, email=email)
 
     if not user:
@@ -109,15 +151,12 @@ async def recover_password(email: str, session: AsyncSessionDep) -> Message:
             status_code=404,
             detail="The user with this email does not exist in the system.",
         )
-    password_reset_token = await generate_password_reset_token(email=email)
-    email_data = await generate_reset_password_email(
+    password_reset_token = generate_password_reset_token(email=email)
+    email_data = generate_reset_password_email(
         email_to=user.email, email=email, token=password_reset_token
     )
-    await send_email(
-        email_to=user.email,
-        subject=email_data.subject,
-        html_content=email_data.html_content,
-    )
+    queue_email(session=session, email_to=user.email, email_data=email_data)
+    await session.commit()
     return Message(message="Password recovery email sent")
 
 
@@ -126,7 +165,7 @@ async def reset_password(session: AsyncSessionDep, body: NewPassword) -> Message
     """
     Reset password
     """
-    email = await verify_password_reset_token(token=body.token)
+    email = verify_password_reset_token(token=body.token)
     if not email:
         raise HTTPException(status_code=400, detail="Invalid token")
     user = await auth_service.get_user_by_email(session=session, email=email)
@@ -137,8 +176,11 @@ async def reset_password(session: AsyncSessionDep, body: NewPassword) -> Message
         )
     elif not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    hashed_password = await get_password_hash(password=body.new_password)
-    user.hashed_password = hashed_password
+    elif user.auth_source == UserAuthSource.ldap:
+        raise HTTPException(
+            status_code=400, detail="The password of LDAP users is managed in the directory"
+        )
+    await user_service.set_password(db_user=user, password=body.new_password)
     session.add(user)
     await session.commit()
     return Message(message="Password updated successfully")
@@ -160,8 +202,8 @@ async def recover_password_html_content(email: str, session: AsyncSessionDep) ->
             status_code=404,
             detail="The user with this username does not exist in the system.",
         )
-    password_reset_token = await generate_password_reset_token(email=email)
-    email_data = await generate_reset_password_email(
+    password_reset_token = generate_password_reset_token(email=email)
+    email_data = generate_reset_password_email(
         email_to=user.email, email=email, token=password_reset_token
     )
 
@@ -1,13 +1,31 @@
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import col, func, or_, select, update
 from sqlmodel.ext.asyncio.session import AsyncSession
 import ldap3
-from ldap3 import Server, Connection, ALL, SUBTREE
 import logging
+import uuid
 
-from src.core.security import verify_password, get_password_hash
-from src.routes.users.models import User
-from src.routes.users.service import get_user_by_email, get_user_by_username
+from src.core.ldap import (
+    LDAP_OUTAGE_ERRORS,
+    get_ldap_client,
+    ldap_credential_cache,
+)
+from src.core.security import verify_password_async, get_unusable_password_hash
+from src.routes.auth.models import LDAPDirectoryUser
+from src.routes.users.models import User, UserAuthSource
+from src.routes.users.service import (
+    get_user_by_email,
+    get_user_by_login,
+    get_user_by_username,
+)
 from src.config import settings
 
+# Password whose hash LDAP accounts got before auth_source existed
+LEGACY_LDAP_PLACEHOLDER_PASSWORD = "ldap-user-no-password"
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,7 +35,7 @@ async def authenticate(
     db_user = await get_user_by_email(session=session, email=email)
     if not db_user:
         return None
-    if not verify_password(password, db_user.hashed_password):
+    if not await verify_password_async(password, db_user.hashed_password):
         return None
     return db_user
 
@@ -28,11 +46,176 @@ async def authenticate_by_username(
     db_user = await get_user_by_username(session=session, username=username)
     if not db_user:
         return None
-    if not verify_password(password, db_user.hashed_password):
+    if not await verify_password_async(password, db_user.hashed_password):
         return None
     return db_user
 
 
+def ldap_user_attributes() -> list[str]:
+    return [
+        settings.LDAP_USERNAME_ATTRIBUTE,
+        settings.LDAP_EMAIL_ATTRIBUTE,
+        settings.LDAP_FIRST_NAME_ATTRIBUTE,
+        settings.LDAP_LAST_NAME_ATTRIBUTE,
+        'cn',
+    ]
+
+
+def directory_user_from_entry(
+    dn: str, attributes: dict[str, Any], username: str | None = None
+) -> LDAPDirectoryUser | None:
+    """
+    Map a directory entry to a LDAPDirectoryUser, None if it has no email.
+    `username` is used when the entry lacks LDAP_USERNAME_ATTRIBUTE.
+    """
+    def first(name: str) -> str:
+        value = attributes.get(name)
+        if isinstance(value, (list, tuple)):
+            value = value[0] if value else None
+        return str(value) if value else ""
+
+    email = first(settings.LDAP_EMAIL_ATTRIBUTE)
+    username = first(settings.LDAP_USERNAME_ATTRIBUTE) or username
+    if not email or not username:
+        logger.error(f"Email or username attribute not found or empty for {dn}")
+        return None
+    full_name = first('cn') or (
+        f"{first(settings.LDAP_FIRST_NAME_ATTRIBUTE)} "
+        f"{first(settings.LDAP_LAST_NAME_ATTRIBUTE)}"
+    ).strip()
+    return LDAPDirectoryUser(dn=dn, username=username, email=email, full_name=full_name)
+
+
+def resolve_ldap_conflict(
+    directory_user: LDAPDirectoryUser,
+    by_email: User | None,
+    by_username: User | None,
+) -> tuple[User | None, str, str] | None:
+    """
+    Apply LDAP_CONFLICT_STRATEGY to a directory user, given the local users
+    already holding its email and its username.
+
+    Returns the user to update (None to create one) with the username and
+    email to create it with, or None when the entry must be skipped.
+    """
+    username, email = directory_user.username, directory_user.email
+    if by_email:
+        if by_email.username and by_email.username.lower() != username.lower():
+            if settings.LDAP_CONFLICT_STRATEGY == "fail":
+                logger.warning(f"Email conflict: LDAP user {username} maps to email {email} which is already associated with existing user {by_email.username}")
+                return None
+            elif settings.LDAP_CONFLICT_STRATEGY == "create_new":
+                # Generate a unique email for this LDAP user
+                return None, username, f"{username}@ldap.local"
+        # Merge into the existing account
+        return by_email, username, email
+    if by_username:
+        if settings.LDAP_CONFLICT_STRATEGY == "create_new":
+            # Generate a unique username for this LDAP user
+            return None, f"{username}_ldap", email
+        # Merging on the username alone could take over an unrelated account
+        logger.warning(f"Username conflict: LDAP username {username} is already associated with existing user {by_username.email}")
+        return None
+    return None, username, email
+
+
+async def upsert_directory_users(
+    *, session: AsyncSession, directory_users: list[LDAPDirectoryUser]
+) -> dict[str, uuid.UUID]:
+    """
+    Create or update the users of a batch of directory entries.
+
+    Users already linked to an entry (by ldap_dn) are updated, the others go
+    through resolve_ldap_conflict. One lookup, one multi-row INSERT ... ON
+    CONFLICT DO NOTHING and one bulk UPDATE per batch. Returns the user id of
+    every dn that was applied, and commits.
+    """
+    if not directory_users:
+        return {}
+    emails = {u.email.lower() for u in directory_users}
+    usernames = {u.username.lower() for u in directory_users}
+    dns = {u.dn for u in directory_users}
+    result = await session.exec(
+        select(User).where(
+            or_(
+                func.lower(User.email).in_(emails),
+                func.lower(User.username).in_(usernames),
+                col(User.ldap_dn).in_(dns),
+            )
+        )
+    )
+    by_email: dict[str, User] = {}
+    by_username: dict[str, User] = {}
+    by_dn: dict[str, User] = {}
+    for db_user in result.all():
+        by_email[db_user.email.lower()] = db_user
+        if db_user.username:
+            by_username[db_user.username.lower()] = db_user
+        if db_user.ldap_dn:
+            by_dn[db_user.ldap_dn] = db_user
+
+    applied: dict[str, uuid.UUID] = {}
+    creates: list[dict[str, Any]] = []
+    updates: dict[uuid.UUID, dict[str, Any]] = {}
+    for directory_user in directory_users:
+        db_user = by_dn.get(directory_user.dn)
+        if db_user is None:
+            resolved = resolve_ldap_conflict(
+                directory_user,
+                by_email.get(directory_user.email.lower()),
+                by_username.get(directory_user.username.lower()),
+            )
+            if resolved is None:
+                continue
+            db_user, username, email = resolved
+            if db_user is None:
+                creates.append({
+                    "id": uuid.uuid4(),
+                    "email": email,
+                    "username": username,
+                    "full_name": directory_user.full_name,
+                    "hashed_password": get_unusable_password_hash(),
+                    "auth_source": UserAuthSource.ldap,
+                    "ldap_dn": directory_user.dn,
+                    "is_active": True,
+                    "is_superuser": False,
+                })
+                continue
+        username = db_user.username
+        if not username and directory_user.username.lower() not in by_username:
+            username = directory_user.username
+        applied[directory_user.dn] = db_user.id
+        if (
+            db_user.auth_source != UserAuthSource.ldap
+            or db_user.ldap_dn != directory_user.dn
+            or db_user.full_name != directory_user.full_name
+            or db_user.username != username
+        ):
+            updates[db_user.id] = {
+                "id": db_user.id,
+                "username": username,
+                "full_name": directory_user.full_name,
+                "auth_source": UserAuthSource.ldap,
+                "ldap_dn": directory_user.dn,
+                "updated_at": datetime.utcnow(),
+            }
+
+    if creates:
+        result = await session.exec(
+            insert(User)
+            .values(creates)
+            .on_conflict_do_nothing()
+            .returning(col(User.id), col(User.ldap_dn))
+        )
+        for user_id, dn in result.all():
+            applied[dn] = user_id
+            logger.info(f"Created new LDAP user for {dn}")
+    if updates:
+        await session.exec(update(User), params=list(updates.values()))
+    await session.commit()
+    return applied
+
+
 async def authenticate_ldap(
     *, session: AsyncSession, username: str, password: str
 ) -> User | None:
@@ -44,140 +227,30 @@ async def authenticate_ldap(
         return None
     
     try:
-        # Create LDAP server connection
-        server = Server(
-            settings.LDAP_SERVER,
-            port=settings.LDAP_PORT,
-            use_ssl=settings.LDAP_USE_SSL,
-            get_info=ALL
-        )
-        
-        # First, bind with service account if configured
-        if settings.LDAP_BIND_DN and settings.LDAP_BIND_PASSWORD:
-            conn = Connection(
-                server,
-                user=settings.LDAP_BIND_DN,
-                password=settings.LDAP_BIND_PASSWORD,
-                auto_bind=True
-            )
-        else:
-            conn = Connection(server)
-            conn.bind()
-        
-        # Search for user
-        search_filter = settings.LDAP_USER_FILTER.format(username=username)
-        conn.search(
-            search_base=settings.LDAP_SEARCH_BASE,
-            search_filter=search_filter,
-            search_scope=SUBTREE,
-            attributes=[
-                settings.LDAP_EMAIL_ATTRIBUTE,
-                settings.LDAP_FIRST_NAME_ATTRIBUTE,
-                settings.LDAP_LAST_NAME_ATTRIBUTE,
-                'cn'
-            ]
-        )
-        
-        if not conn.entries:
+        client = get_ldap_client()
+        found = await client.search_user(username, attributes=ldap_user_attributes())
+        if found is None:
             logger.warning(f"User {username} not found in LDAP")
             return None
-        
-        user_entry = conn.entries[0]
-        user_dn = user_entry.entry_dn
+        user_dn, attributes = found
         
         # Try to authenticate with user credentials
-        auth_conn = Connection(server, user=user_dn, password=password)
-        if not auth_conn.bind():
+        if not await verify_ldap_password(user_dn, password):
             logger.warning(f"LDAP authentication failed for user {username}")
             return None
         
-        # Get user attributes
-        email_attr = getattr(user_entry, settings.LDAP_EMAIL_ATTRIBUTE, None)
-        if email_attr and hasattr(email_attr, 'value') and email_attr.value:
-            email = email_attr.value
-        elif email_attr and hasattr(email_attr, 'values') and email_attr.values:
-            email = email_attr.values[0]
-        else:
-            logger.error(f"Email attribute not found or empty for user {username}")
+        directory_user = directory_user_from_entry(user_dn, attributes, username)
+        if directory_user is None:
             return None
-            
-        first_name_attr = getattr(user_entry, settings.LDAP_FIRST_NAME_ATTRIBUTE, None)
-        first_name = ""
-        if first_name_attr and hasattr(first_name_attr, 'value') and first_name_attr.value:
-            first_name = first_name_attr.value
-        elif first_name_attr and hasattr(first_name_attr, 'values') and first_name_attr.values:
-            first_name = first_name_attr.values[0]
-            
-        last_name_attr = getattr(user_entry, settings.LDAP_LAST_NAME_ATTRIBUTE, None)
-        last_name = ""
-        if last_name_attr and hasattr(last_name_attr, 'value') and last_name_attr.value:
-            last_name = last_name_attr.value
-        elif last_name_attr and hasattr(last_name_attr, 'values') and last_name_attr.values:
-            last_name = last_name_attr.values[0]
-            
-        cn_attr = getattr(user_entry, 'cn', None)
-        if cn_attr and hasattr(cn_attr, 'value') and cn_attr.value:
-            full_name = cn_attr.value
-        elif cn_attr and hasattr(cn_attr, 'values') and cn_attr.values:
-            full_name = cn_attr.values[0]
-        else:
-            full_name = f"{first_name} {last_name}".strip()
-        
-        # Ensure email is a string
-        if isinstance(email, list):
-            email = email[0] if email else ""
-        email = str(email) if email else ""
-        
-        logger.info(f"LDAP user {username} mapped to email: {email}")
-        
-        auth_conn.unbind()
-        conn.unbind()
-        
-        # Check if user exists in database
-        db_user = await get_user_by_email(session=session, email=email)
+        logger.info(f"LDAP user {username} mapped to email: {directory_user.email}")
         
-        if db_user:
-            # Handle email conflict based on strategy
-            if db_user.username and db_user.username != username:
-                if settings.LDAP_CONFLICT_STRATEGY == "fail":
-                    logger.warning(f"Email conflict: LDAP user {username} maps to email {email} which is already associated with existing user {db_user.username}")
-                    return None
-                elif settings.LDAP_CONFLICT_STRATEGY == "create_new":
-                    # Generate a unique email for this LDAP user
-                    unique_email = f"{username}@ldap.local"
-                    logger.info(f"Creating new user with unique email: {unique_email}")
-                    return await create_ldap_user(session, username, unique_email, full_name)
-            
-            # Update existing user if needed (merge strategy)
-            updated = False
-            if db_user.full_name != full_name:
-                db_user.full_name = full_name
-                updated = True
-            if not db_user.username:
-                db_user.username = username
-                updated = True
-            
-            if updated:
-                session.add(db_user)
-                await session.commit()
-                await session.refresh(db_user)
-            
-            return db_user
-        else:
-            # Check for username conflict
-            existing_user_by_username = await get_user_by_username(session=session, username=username)
-            if existing_user_by_username:
-                if settings.LDAP_CONFLICT_STRATEGY == "fail":
-                    logger.warning(f"Username conflict: LDAP username {username} is already associated with existing user {existing_user_by_username.email}")
-                    return None
-                elif settings.LDAP_CONFLICT_STRATEGY == "create_new":
-                    # Generate a unique username for this LDAP user
-                    unique_username = f"{username}_ldap"
-                    logger.info(f"Creating new user with unique username: {unique_username}")
-                    return await create_ldap_user(session, unique_username, email, full_name)
-            
-            # Create new user with username directly in database
-            return await create_ldap_user(session, username, email, full_name)
+        applied = await upsert_directory_users(
+            session=session, directory_users=[directory_user]
+        )
+        if user_dn not in applied:
+            return None
+        # The bulk update bypasses the identity map
+        return await session.get(User, applied[user_dn], populate_existing=True)
             
     except ldap3.core.exceptions.LDAPException as e:
         logger.error(f"LDAP error during authentication for user {username}: {e}")
@@ -187,49 +260,99 @@ async def authenticate_ldap(
         return None
 
 
-async def create_ldap_user(
-    session: AsyncSession, 
-    username: str, 
-    email: str, 
-    full_name: str
-) -> User:
-    """Helper function to create LDAP user"""
-    hashed_password = get_password_hash("ldap-user-no-password")
-    new_user = User(
-        email=email,
-        username=username,
-        hashed_password=hashed_password,
-        full_name=full_name,
-        is_active=True,
-        is_superuser=False
-    )
-    session.add(new_user)
-    await session.commit()
-    await session.refresh(new_user)
-    logger.info(f"Created new LDAP user: {username} with email {email}")
-    return new_user
+async def verify_ldap_password(user_dn: str, password: str) -> bool:
+    """
+    Bind as the user, through the credential cache when it is enabled.
+    Directory errors are raised unless a cached entry vouches for the password.
+    """
+    if await ldap_credential_cache.verify(user_dn, password):
+        return True
+    try:
+        bound = await get_ldap_client().bind_user(user_dn, password)
+    except LDAP_OUTAGE_ERRORS as e:
+        if await ldap_credential_cache.verify_stale(user_dn, password):
+            logger.warning(f"LDAP unreachable ({e}), accepted cached credentials for {user_dn}")
+            return True
+        raise
+    # A failed bind leaves the entry alone, the cached password may still be
+    # the right one and anybody can send a wrong password
+    if bound:
+        await ldap_credential_cache.store(user_dn, password)
+    return bound
+
+
+async def authenticate_ldap_bind(*, db_user: User, password: str) -> User | None:
+    """
+    Bind as an LDAP user already linked to its entry, without a search or a
+    database write; the profile is kept current by the directory sync or was
+    refreshed by the login that filled the credential cache.
+    """
+    try:
+        if await verify_ldap_password(db_user.ldap_dn, password):
+            return db_user
+        logger.warning(f"LDAP authentication failed for {db_user.ldap_dn}")
+    except (ldap3.core.exceptions.LDAPException, TimeoutError) as e:
+        logger.error(f"LDAP error during authentication for {db_user.ldap_dn}: {e}")
+    return None
 
 
 async def authenticate_hybrid(
     *, session: AsyncSession, username: str, password: str
 ) -> User | None:
     """
-    Try LDAP authentication first, fall back to local authentication
+    Route the login to the backend recorded in the user's auth_source.
+
+    The principal is resolved with a single username-or-email lookup. Local
+    accounts cost one hash verification and never reach LDAP; LDAP is only
+    contacted for LDAP accounts and for principals unknown to the database
+    (first login of a directory user).
     """
-    # Try LDAP authentication first if enabled
+    db_user = await get_user_by_login(session=session, login=username)
+    if not db_user:
+        if not settings.LDAP_ENABLED:
+            return None
+        return await authenticate_ldap(
+            session=session, username=username, password=password
+        )
+
+    if db_user.auth_source == UserAuthSource.local:
+        if not await verify_password_async(password, db_user.hashed_password):
+            return None
+        return db_user
+
+    if db_user.auth_source == UserAuthSource.ldap:
+        if not settings.LDAP_ENABLED:
+            return None
+        if db_user.ldap_dn and (
+            settings.LDAP_SYNC_ENABLED
+            or ldap_credential_cache.contains(db_user.ldap_dn)
+        ):
+            return await authenticate_ldap_bind(db_user=db_user, password=password)
+        return await authenticate_ldap(
+            session=session, username=username, password=password
+        )
+
+    if db_user.auth_source == UserAuthSource.oauth2:
+        # Provider accounts have no password to check
+        return None
+
+    # Account predating auth_source: try its hash, then LDAP, and record
+    # whichever succeeded so this is the last time both are attempted. LDAP
+    # accounts of that time hold a hash of a well-known placeholder, which must
+    # neither log in nor mark the account local
+    if password != LEGACY_LDAP_PLACEHOLDER_PASSWORD and await verify_password_async(
+        password, db_user.hashed_password
+    ):
+        db_user.auth_source = UserAuthSource.local
+        session.add(db_user)
+        await session.commit()
+        await session.refresh(db_user)
+        return db_user
     if settings.LDAP_ENABLED:
-        ldap_user = await authenticate_ldap(session=session, username=username, password=password)
-        if ldap_user:
-            return ldap_user
-    
-    # Fall back to local authentication
-    # Try username lookup first (for regular users with username)
-    user_by_username = await authenticate_by_username(session=session, username=username, password=password)
-    if user_by_username:
-        return user_by_username
-    
-    # Fall back to email lookup (for regular users with email)
-    return await authenticate(session=session, email=username, password=password)
+        return await authenticate_ldap(
+            session=session, username=username, password=password
+        )
+    return None
 
 
 async def create_or_update_oauth2_user(
@@ -242,43 +365,27 @@ async def create_or_update_oauth2_user(
     picture: str = ""
 ) -> User:
     """
-    Create or update user from OAuth2 provider
+    Create or update user from OAuth2 provider, in a single upsert on the email
     """
-    from src.routes.users.service import get_user_by_email
-    import uuid
-    
-    # Check if user exists by email
-    db_user = await get_user_by_email(session=session, email=email)
-    
-    if db_user:
-        # Update existing user
-        updated = False
-        if db_user.full_name != name:
-            db_user.full_name = name
-            updated = True
-        if not db_user.username:
-            db_user.username = f"{provider}_{provider_user_id}"
-            updated = True
-        
-        if updated:
-            session.add(db_user)
-            await session.commit()
-            await session.refresh(db_user)
-        
-        return db_user
-    else:
-        # Create new user
-        hashed_password = get_password_hash(f"oauth2_{uuid.uuid4()}")
-        new_user = User(
-            email=email,
-            username=f"{provider}_{provider_user_id}",
-            hashed_password=hashed_password,
-            full_name=name,
-            is_active=True,
-            is_superuser=False
-        )
-        session.add(new_user)
-        await session.commit()
-        await session.refresh(new_user)
-        
-        return new_user
\ No newline at end of file
+    statement = insert(User).values(
+        id=uuid.uuid4(),
+        email=email,
+        username=f"{provider}_{provider_user_id}",
+        hashed_password=get_unusable_password_hash(),
+        auth_source=UserAuthSource.oauth2,
+        full_name=name,
+        is_active=True,
+        is_superuser=False,
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[func.lower(User.email)],
+        set_={
+            "full_name": statement.excluded.full_name,
+            "username": func.coalesce(User.username, statement.excluded.username),
+            "updated_at": func.now(),
+        },
+    ).returning(User)
+    result = await session.exec(statement)
+    user = result.scalars().one()
+    await session.commit()
+    return user
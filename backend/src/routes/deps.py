@@ -7,6 +7,7 @@ from fastapi.security import OAuth2PasswordBearer
 from pydantic import ValidationError
 from sqlmodel.ext.asyncio.session import AsyncSession
 from src.core import security
+from src.core.timing import timed
 from src.routes.auth.models import TokenPayload
 from src.routes.users.models import User
 from src.database import get_session
@@ -21,16 +22,25 @@ TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
 async def get_current_user(session: AsyncSessionDep, token: TokenDep) -> User:
+    with timed("auth"):
+        return await _get_current_user(session, token)
+
+
+def decode_access_token(token: str) -> TokenPayload:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
         )
-        token_data = TokenPayload(**payload)
+        return TokenPayload(**payload)
     except (jwt.InvalidTokenError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
+
+
+async def _get_current_user(session: AsyncSession, token: str) -> User:
+    token_data = decode_access_token(token)
     user = await session.get(User, token_data.sub)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -0,0 +1,49 @@
+from typing import Literal
+
+from sqlmodel import Field, SQLModel
+
+# How tracemalloc statistics are grouped, see tracemalloc.Snapshot.statistics
+MemoryGroupBy = Literal["lineno", "filename", "traceback"]
+
+
+class MemoryTracingStart(SQLModel):
+    # Frames stored per allocation, more than 1 is needed to group by traceback
+    frames: int = Field(default=1, ge=1, le=100)
+
+
+class MemoryStatus(SQLModel):
+    tracing: bool
+    frames: int
+    traced_bytes: int
+    traced_peak_bytes: int
+    # Memory used by tracemalloc itself to store the traces
+    tracemalloc_bytes: int
+    rss_bytes: int | None
+    snapshots: list[str]
+
+
+class MemoryAllocationDiff(SQLModel):
+    location: str
+    traceback: list[str]
+    size: int
+    size_diff: int
+    count: int
+    count_diff: int
+
+
+class MemoryDiff(SQLModel):
+    base: str
+    target: str
+    group_by: MemoryGroupBy
+    total_size_diff: int
+    stats: list[MemoryAllocationDiff]
+
+
+class ObjectCount(SQLModel):
+    type: str
+    count: int
+
+
+class ObjectCensus(SQLModel):
+    total: int
+    types: list[ObjectCount]
@@ -0,0 +1,100 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+
+from src.core.timing import TimedRoute
+from src.routes.deps import get_current_active_superuser
+from src.routes.diagnostics import service as diagnostics_service
+from src.routes.diagnostics.models import (
+    MemoryDiff,
+    MemoryGroupBy,
+    MemoryStatus,
+    MemoryTracingStart,
+    ObjectCensus,
+)
+from src.routes.models import Message
+
+router = APIRouter(
+    prefix="/diagnostics",
+    tags=["diagnostics"],
+    dependencies=[Depends(get_current_active_superuser)],
+    route_class=TimedRoute,
+)
+
+
+@router.get("/memory", response_model=MemoryStatus)
+async def memory_status() -> Any:
+    """
+    Memory tracing status and snapshots of the process serving the request
+    """
+    return diagnostics_service.memory_status()
+
+
+@router.post("/memory/tracing", response_model=MemoryStatus)
+async def start_memory_tracing(body: MemoryTracingStart) -> Any:
+    """
+    Start tracing allocations, which slows the process down until stopped
+    """
+    return diagnostics_service.start_tracing(body.frames)
+
+
+@router.delete("/memory/tracing", response_model=MemoryStatus)
+async def stop_memory_tracing() -> Any:
+    """
+    Stop tracing allocations and drop the snapshots
+    """
+    return diagnostics_service.stop_tracing()
+
+
+@router.put("/memory/snapshots/{name}", response_model=MemoryStatus)
+async def take_memory_snapshot(name: str) -> Any:
+    """
+    Take a named snapshot of the traced allocations, replacing one of the same name
+    """
+    try:
+        return await run_in_threadpool(diagnostics_service.take_snapshot, name)
+    except diagnostics_service.SnapshotError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.delete("/memory/snapshots/{name}", response_model=Message)
+async def delete_memory_snapshot(name: str) -> Any:
+    """
+    Delete a snapshot
+    """
+    if not diagnostics_service.delete_snapshot(name):
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return Message(message="Snapshot deleted successfully")
+
+
+@router.get("/memory/diff", response_model=MemoryDiff)
+async def diff_memory_snapshots(
+    base: str,
+    target: str = diagnostics_service.NOW,
+    group_by: MemoryGroupBy = "lineno",
+    limit: int = Query(default=25, ge=1, le=500),
+) -> Any:
+    """
+    Top allocation changes between two snapshots, by default from `base` to now
+    """
+    try:
+        return await run_in_threadpool(
+            diagnostics_service.diff_snapshots, base, target, group_by=group_by, limit=limit
+        )
+    except diagnostics_service.SnapshotError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/memory/objects", response_model=ObjectCensus)
+async def count_objects(
+    module: str | None = None,
+    limit: int = Query(default=50, ge=1, le=1000),
+    collect: bool = False,
+) -> Any:
+    """
+    Live objects by type, e.g. `module=src.` for the ORM instances in memory
+    """
+    return await run_in_threadpool(
+        diagnostics_service.object_census, module=module, limit=limit, collect=collect
+    )
@@ -0,0 +1,148 @@
+"""
+Memory diagnostics of the serving process: tracemalloc snapshots and diffs,
+and a census of the live objects by type.
+
+The snapshots are kept in this process only; with several workers, each
+request may land on a different one, so run a single worker while diagnosing
+or compare the `rss_bytes` of the status of each.
+"""
+
+import gc
+import os
+import tracemalloc
+from collections import Counter
+
+from src.routes.diagnostics.models import (
+    MemoryAllocationDiff,
+    MemoryDiff,
+    MemoryGroupBy,
+    MemoryStatus,
+    ObjectCensus,
+    ObjectCount,
+)
+
+MAX_SNAPSHOTS = 10
+# Name of the snapshot taken on the fly when diffing against the current state
+NOW = "now"
+SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+_snapshots: dict[str, tracemalloc.Snapshot] = {}
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def rss_bytes() -> int | None:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def memory_status() -> MemoryStatus:
+    traced, peak = tracemalloc.get_traced_memory()
+    return MemoryStatus(
+        tracing=tracemalloc.is_tracing(),
+        frames=tracemalloc.get_traceback_limit(),
+        traced_bytes=traced,
+        traced_peak_bytes=peak,
+        tracemalloc_bytes=tracemalloc.get_tracemalloc_memory(),
+        rss_bytes=rss_bytes(),
+        snapshots=list(_snapshots),
+    )
+
+
+def start_tracing(frames: int) -> MemoryStatus:
+    if tracemalloc.is_tracing() and tracemalloc.get_traceback_limit() != frames:
+        # Traces stored with another depth cannot be compared
+        stop_tracing()
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    return memory_status()
+
+
+def stop_tracing() -> MemoryStatus:
+    tracemalloc.stop()
+    _snapshots.clear()
+    return memory_status()
+
+
+def _take_snapshot() -> tracemalloc.Snapshot:
+    if not tracemalloc.is_tracing():
+        raise SnapshotError("Memory tracing is not started")
+    return tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+
+
+def take_snapshot(name: str) -> MemoryStatus:
+    if name == NOW:
+        raise SnapshotError(f"The snapshot name {NOW!r} is reserved")
+    if name not in _snapshots and len(_snapshots) >= MAX_SNAPSHOTS:
+        raise SnapshotError(f"At most {MAX_SNAPSHOTS} snapshots are kept, delete one first")
+    _snapshots[name] = _take_snapshot()
+    return memory_status()
+
+
+def delete_snapshot(name: str) -> bool:
+    return _snapshots.pop(name, None) is not None
+
+
+def diff_snapshots(
+    base: str, target: str, *, group_by: MemoryGroupBy, limit: int
+) -> MemoryDiff:
+    """Top allocation changes from `base` to `target` ("now" for the current state)."""
+    for name in (base, target):
+        if name != NOW and name not in _snapshots:
+            raise SnapshotError(f"Unknown snapshot {name!r}")
+    base_snapshot = _take_snapshot() if base == NOW else _snapshots[base]
+    target_snapshot = _take_snapshot() if target == NOW else _snapshots[target]
+    stats = target_snapshot.compare_to(base_snapshot, group_by)
+    return MemoryDiff(
+        base=base,
+        target=target,
+        group_by=group_by,
+        total_size_diff=sum(stat.size_diff for stat in stats),
+        stats=[
+            MemoryAllocationDiff(
+                location=_location(stat.traceback[0]) if stat.traceback else "<unknown>",
+                traceback=[_location(frame) for frame in stat.traceback]
+                if group_by == "traceback"
+                else [],
+                size=stat.size,
+                size_diff=stat.size_diff,
+                count=stat.count,
+                count_diff=stat.count_diff,
+            )
+            for stat in stats[:limit]
+        ],
+    )
+
+
+def _location(frame: tracemalloc.Frame) -> str:
+    return f"{frame.filename}:{frame.lineno}"
+
+
+def object_census(*, module: str | None, limit: int, collect: bool) -> ObjectCensus:
+    """
+    Live objects tracked by the garbage collector, counted by type. ORM
+    instances (e.g. `src.routes.users.models.User`) show up by their class,
+    filter with `module="src."` to only see our own types.
+    """
+    if collect:
+        gc.collect()
+    counts: Counter[str] = Counter()
+    for obj in gc.get_objects():
+        cls = type(obj)
+        counts[f"{cls.__module__}.{cls.__qualname__}"] += 1
+    if module:
+        counts = Counter({name: count for name, count in counts.items() if name.startswith(module)})
+    return ObjectCensus(
+        total=sum(counts.values()),
+        types=[ObjectCount(type=name, count=count) for name, count in counts.most_common(limit)],
+    )
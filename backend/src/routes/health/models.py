@@ -0,0 +1,18 @@
+from sqlmodel import SQLModel
+
+
+class HealthCheck(SQLModel):
+    name: str
+    ok: bool
+    detail: str
+
+
+class Liveness(SQLModel):
+    status: str = "alive"
+
+
+class Readiness(SQLModel):
+    ready: bool
+    # starting, serving or shutting down
+    status: str
+    checks: list[HealthCheck]
@@ -0,0 +1,36 @@
+from typing import Any
+
+from fastapi import APIRouter, Response
+
+from src.core.health import readiness
+from src.core.timing import TimedRoute
+from src.routes.health.models import HealthCheck, Liveness, Readiness
+
+router = APIRouter(prefix="/health", tags=["system"], route_class=TimedRoute)
+
+
+@router.get("/live", response_model=Liveness)
+async def liveness() -> Any:
+    """
+    Liveness probe, answers as long as the event loop runs
+    """
+    return Liveness()
+
+
+@router.get(
+    "/ready",
+    response_model=Readiness,
+    responses={503: {"model": Readiness, "description": "Not ready"}},
+)
+async def ready(response: Response) -> Any:
+    """
+    Readiness probe, 503 while starting, shutting down or with a failed dependency check
+    """
+    is_ready, status, checks = await readiness.status()
+    if not is_ready:
+        response.status_code = 503
+    return Readiness(
+        ready=is_ready,
+        status=status,
+        checks=[HealthCheck(name=c.name, ok=c.ok, detail=c.detail) for c in checks],
+    )
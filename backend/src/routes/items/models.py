@@ -17,6 +17,12 @@ class ItemSortField(str, Enum):
     updated_at = "updated_at"
 
 
+class ItemBatchStatus(str, Enum):
+    found = "found"
+    not_found = "not_found"
+    forbidden = "forbidden"
+
+
 # Shared properties
 class ItemBase(SQLModel):
     title: str = Field(min_length=1, max_length=255)
@@ -26,8 +32,9 @@ class ItemBase(SQLModel):
 # Database model, database table inferred from class name
 class Item(ItemBase, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    # Indexed for the per-owner listings, the purge batches and the cascade
     owner_id: uuid.UUID = Field(
-        foreign_key="user.id", nullable=False, ondelete="CASCADE"
+        foreign_key="user.id", nullable=False, ondelete="CASCADE", index=True
     )
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow, sa_column_kwargs={"onupdate": datetime.utcnow})
@@ -58,3 +65,18 @@ class ItemsPublic(SQLModel):
     size: int
     total: int
     pages: int
+
+
+class ItemsBatchRequest(SQLModel):
+    ids: list[uuid.UUID]
+
+
+# One entry per requested id, in request order
+class ItemBatchResult(SQLModel):
+    id: uuid.UUID
+    status: ItemBatchStatus
+    item: ItemPublic | None = None
+
+
+class ItemsBatchPublic(SQLModel):
+    data: list[ItemBatchResult]
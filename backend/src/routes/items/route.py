@@ -3,23 +3,27 @@ import math
 from typing import Any, Optional
 
 from fastapi import APIRouter, HTTPException, Query
-from sqlmodel import func, select, or_, desc, asc
 
+from src.config import settings
 from src.routes.deps import AsyncSessionDep
 from src.routes.items.models import (
     Item,
     ItemCreate,
     ItemPublic,
+    ItemsBatchPublic,
+    ItemsBatchRequest,
     ItemsPublic,
     ItemUpdate,
     SortOrder,
     ItemSortField,
 )
+from src.routes.items import service as item_service
 from src.routes.deps import CurrentUser
 from src.routes.models import Message
+from src.core.responses import FastJSONRoute
 
 
-router = APIRouter(prefix="/items", tags=["items"])
+router = APIRouter(prefix="/items", tags=["items"], route_class=FastJSONRoute)
 
 
 @router.get("/", response_model=ItemsPublic)
@@ -45,47 +49,17 @@ async def read_items(
     Returns:
         Paginated list of items with metadata
     """
-    # Calculate offset
-    offset = (page - 1) * size
-
-    # Build base query
-    base_filters = []
-    
-    # Add ownership filter
-    if not current_user.is_superuser:
-        base_filters.append(Item.owner_id == current_user.id)
-    
-    # Add search filter
-    if search:
-        search_filter = or_(
-            Item.title.icontains(search),
-            Item.description.icontains(search)
-        )
-        base_filters.append(search_filter)
-
-    # Build count query
-    count_statement = select(func.count()).select_from(Item)
-    if base_filters:
-        count_statement = count_statement.where(*base_filters)
-    
+    count_statement, statement = item_service.read_items_statements(
+        owner_id=None if current_user.is_superuser else current_user.id,
+        search=search,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        offset=(page - 1) * size,
+        limit=size,
+    )
     count_result = await session.exec(count_statement)
     total = count_result.one()
 
-    # Build data query with sorting
-    statement = select(Item)
-    if base_filters:
-        statement = statement.where(*base_filters)
-    
-    # Add sorting
-    sort_column = getattr(Item, sort_by.value)
-    if sort_order == SortOrder.desc:
-        statement = statement.order_by(desc(sort_column))
-    else:
-        statement = statement.order_by(asc(sort_column))
-    
-    # Add pagination
-    statement = statement.offset(offset).limit(size)
-    
     items_result = await session.exec(statement)
     items = items_result.all()
 
@@ -101,6 +75,49 @@ async def read_items(
     )
 
 
+async def _read_items_batch(
+    session: AsyncSessionDep, current_user: CurrentUser, ids: list[uuid.UUID]
+) -> ItemsBatchPublic:
+    if not ids:
+        raise HTTPException(status_code=400, detail="No item ids given")
+    if len(ids) > settings.ITEMS_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.ITEMS_BATCH_MAX_IDS} item ids can be requested at once",
+        )
+    results = await item_service.get_items_by_ids(
+        session=session, ids=ids, current_user=current_user
+    )
+    return ItemsBatchPublic(data=results)
+
+
+@router.get("/batch", response_model=ItemsBatchPublic)
+async def read_items_batch(
+    session: AsyncSessionDep,
+    current_user: CurrentUser,
+    ids: list[uuid.UUID] = Query(description="Item ids, repeat the parameter for each id"),
+) -> Any:
+    """
+    Get several items by ID in one request.
+
+    Each requested id is reported in request order with a status of
+    `found`, `not_found` or `forbidden`; only found items carry the item.
+    """
+    return await _read_items_batch(session, current_user, ids)
+
+
+@router.post("/batch", response_model=ItemsBatchPublic)
+async def read_items_batch_post(
+    session: AsyncSessionDep, current_user: CurrentUser, body: ItemsBatchRequest
+) -> Any:
+    """
+    Get several items by ID, with the ids in the request body.
+
+    Same as `GET /items/batch`, for id lists too long for a query string.
+    """
+    return await _read_items_batch(session, current_user, body.ids)
+
+
 @router.get("/{id}", response_model=ItemPublic)
 async def read_item(
     session: AsyncSessionDep, current_user: CurrentUser, id: uuid.UUID
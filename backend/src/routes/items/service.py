@@ -1,7 +1,19 @@
 import uuid
+from sqlalchemy import ARRAY, Uuid, any_, bindparam, true
+from sqlmodel import asc, col, desc, func, or_, select
 from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
 
-from src.routes.items.models import Item, ItemCreate
+from src.routes.items.models import (
+    Item,
+    ItemBatchResult,
+    ItemBatchStatus,
+    ItemCreate,
+    ItemPublic,
+    ItemSortField,
+    SortOrder,
+)
+from src.routes.users.models import User
 
 
 async def create_item(
@@ -12,3 +24,76 @@ async def create_item(
     await session.commit()
     await session.refresh(db_item)
     return db_item
+
+
+def read_items_statements(
+    *,
+    owner_id: uuid.UUID | None,
+    search: str | None,
+    sort_by: ItemSortField,
+    sort_order: SortOrder,
+    offset: int,
+    limit: int,
+) -> tuple[SelectOfScalar[int], SelectOfScalar[Item]]:
+    """
+    The count and page statements of an item listing, of the items of
+    `owner_id` or of everyone's when None.
+    """
+    filters = []
+    if owner_id is not None:
+        filters.append(Item.owner_id == owner_id)
+    if search:
+        filters.append(or_(Item.title.icontains(search), Item.description.icontains(search)))
+
+    count_statement = select(func.count()).select_from(Item)
+    statement = select(Item)
+    if filters:
+        count_statement = count_statement.where(*filters)
+        statement = statement.where(*filters)
+
+    sort_column = getattr(Item, sort_by.value)
+    if sort_order == SortOrder.desc:
+        statement = statement.order_by(desc(sort_column))
+    else:
+        statement = statement.order_by(asc(sort_column))
+    return count_statement, statement.offset(offset).limit(limit)
+
+
+async def get_items_by_ids(
+    *, session: AsyncSession, ids: list[uuid.UUID], current_user: User
+) -> list[ItemBatchResult]:
+    """
+    Fetch several items in one query, reporting each requested id in order.
+
+    The ids are sent as a single array parameter (`id = ANY(:ids)`), so the
+    statement text is the same whatever the number of ids. Ownership is
+    evaluated in SQL next to each row to tell forbidden ids from missing ones.
+    """
+    unique_ids = list(dict.fromkeys(ids))
+    if current_user.is_superuser:
+        allowed = true()
+    else:
+        allowed = col(Item.owner_id) == current_user.id
+    statement = select(Item, allowed.label("allowed")).where(
+        col(Item.id) == any_(bindparam("ids", unique_ids, type_=ARRAY(Uuid)))
+    )
+    result = await session.exec(statement)
+    rows = {item.id: (item, is_allowed) for item, is_allowed in result.all()}
+
+    results = []
+    for id in ids:
+        if id not in rows:
+            results.append(ItemBatchResult(id=id, status=ItemBatchStatus.not_found))
+            continue
+        item, is_allowed = rows[id]
+        if not is_allowed:
+            results.append(ItemBatchResult(id=id, status=ItemBatchStatus.forbidden))
+            continue
+        results.append(
+            ItemBatchResult(
+                id=id,
+                status=ItemBatchStatus.found,
+                item=ItemPublic.model_validate(item),
+            )
+        )
+    return results
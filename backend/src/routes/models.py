@@ -1,6 +1,51 @@
 # Generic message
-from sqlmodel import SQLModel
+import uuid
+from datetime import datetime
+from enum import Enum
+
+from sqlalchemy import BigInteger, Index, text
+from sqlmodel import Field, SQLModel
 
 
 class Message(SQLModel):
     message: str
+
+
+class EmailOutboxStatus(str, Enum):
+    pending = "pending"
+    # Rejected by the SMTP server or out of attempts, kept for inspection
+    failed = "failed"
+
+
+# Transactional email queued with the change that triggers it and delivered by
+# the email_outbox worker (src/workers/email_outbox.py). Rows are deleted once
+# sent and the body of failed ones is cleared, the bodies carry reset links and
+# initial passwords.
+class EmailOutbox(SQLModel, table=True):
+    # The worker polls for due pending emails
+    __table_args__ = (
+        Index(
+            "ix_emailoutbox_pending_next_attempt_at",
+            "next_attempt_at",
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    email_to: str = Field(max_length=255)
+    subject: str
+    html_content: str
+    status: EmailOutboxStatus = Field(default=EmailOutboxStatus.pending)
+    attempts: int = 0
+    last_error: str | None = None
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# Requests counted per fixed window by the Postgres rate limit store
+# (src/core/ratelimit.py); rows of past windows are pruned periodically
+class RateLimitCounter(SQLModel, table=True):
+    key: str = Field(primary_key=True, max_length=512)
+    # Epoch seconds
+    window_start: int = Field(primary_key=True, sa_type=BigInteger)
+    count: int = 0
@@ -0,0 +1,10 @@
+from sqlmodel import SQLModel
+
+
+# Profile returned by an OAuth2 provider after the code exchange
+class OAuth2UserInfo(SQLModel):
+    provider: str
+    provider_user_id: str
+    email: str
+    name: str = ""
+    picture: str = ""
@@ -1,18 +1,28 @@
+from datetime import timedelta
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import RedirectResponse
 from src.config import settings
+from src.core import security
+from src.core.timing import TimedRoute
 from src.routes.deps import AsyncSessionDep
 from src.routes.auth import service as auth_service
+from src.routes.auth.models import Token
+from src.routes.oauth2 import service as oauth2_service
 from typing import Any
+from urllib.parse import urlencode
 import secrets
 import string
 
-router = APIRouter(tags=["oauth2"])
+router = APIRouter(tags=["oauth2"], route_class=TimedRoute)
 
 def generate_state() -> str:
     """Generate a random state string for OAuth2 CSRF protection"""
     return ''.join(secrets.choice(string.ascii_letters + string.digits) for _ in range(32))
 
+def authorize_url(base_url: str, **params: Any) -> str:
+    """Provider authorization URL, with the query parameters encoded"""
+    return f"{base_url}?{urlencode({'response_type': 'code', **params})}"
+
 @router.get("/auth/oauth2/status")
 async def get_oauth2_status() -> dict[str, Any]:
     """
@@ -48,13 +58,12 @@ async def oauth2_login(provider: str) -> RedirectResponse:
         # Store state in session or database for CSRF protection
         # For now, we'll use a simple approach
         
-        auth_url = (
-            f"https://accounts.google.com/o/oauth2/v2/auth?"
-            f"client_id={settings.GOOGLE_CLIENT_ID}&"
-            f"redirect_uri={settings.GOOGLE_REDIRECT_URI}&"
-            f"response_type=code&"
-            f"scope=openid email profile&"
-            f"state={state}"
+        auth_url = authorize_url(
+            settings.GOOGLE_AUTHORIZE_URL,
+            client_id=settings.GOOGLE_CLIENT_ID,
+            redirect_uri=settings.GOOGLE_REDIRECT_URI,
+            scope="openid email profile",
+            state=state,
         )
         return RedirectResponse(url=auth_url)
     
@@ -65,13 +74,12 @@ async def oauth2_login(provider: str) -> RedirectResponse:
         state = generate_state()
         # Store state in session or database for CSRF protection
         
-        auth_url = (
-            f"https://appleid.apple.com/auth/authorize?"
-            f"client_id={settings.APPLE_CLIENT_ID}&"
-            f"redirect_uri={settings.APPLE_REDIRECT_URI}&"
-            f"response_type=code&"
-            f"scope=openid email name&"
-            f"state={state}"
+        auth_url = authorize_url(
+            settings.APPLE_AUTHORIZE_URL,
+            client_id=settings.APPLE_CLIENT_ID,
+            redirect_uri=settings.APPLE_REDIRECT_URI,
+            scope="openid email name",
+            state=state,
         )
         return RedirectResponse(url=auth_url)
     
@@ -82,13 +90,12 @@ async def oauth2_login(provider: str) -> RedirectResponse:
         state = generate_state()
         # Store state in session or database for CSRF protection
         
-        auth_url = (
-            f"https://github.com/login/oauth/authorize?"
-            f"client_id={settings.GITHUB_CLIENT_ID}&"
-            f"redirect_uri={settings.GITHUB_REDIRECT_URI}&"
-            f"response_type=code&"
-            f"scope=user:email&"
-            f"state={state}"
+        auth_url = authorize_url(
+            settings.GITHUB_AUTHORIZE_URL,
+            client_id=settings.GITHUB_CLIENT_ID,
+            redirect_uri=settings.GITHUB_REDIRECT_URI,
+            scope="user:email",
+            state=state,
         )
         return RedirectResponse(url=auth_url)
     
@@ -111,60 +118,8 @@ async def oauth2_callback(
     if provider == "google":
         if not settings.GOOGLE_CLIENT_ID or not settings.GOOGLE_CLIENT_SECRET:
             raise HTTPException(status_code=400, detail="Google OAuth2 is not configured")
-        
-        # Exchange authorization code for access token
-        from authlib.integrations.requests_client import OAuth2Session
-        import requests
-        
-        client = OAuth2Session(
-            client_id=settings.GOOGLE_CLIENT_ID,
-            redirect_uri=settings.GOOGLE_REDIRECT_URI,
-            scope="openid email profile"
-        )
-        
-        try:
-            token = client.fetch_token(
-                "https://oauth2.googleapis.com/token",
-                code=code,
-                client_secret=settings.GOOGLE_CLIENT_SECRET,
-            )
-            
-            # Get user info from Google
-            response = requests.get(
-                "https://www.googleapis.com/oauth2/v2/userinfo",
-                headers={"Authorization": f"Bearer {token['access_token']}"}
-            )
-            user_info = response.json()
-            
-            # Create or update user
-            user = await auth_service.create_or_update_oauth2_user(
-                session=session,
-                provider="google",
-                provider_user_id=user_info["id"],
-                email=user_info["email"],
-                name=user_info.get("name", ""),
-                picture=user_info.get("picture", "")
-            )
-            
-            # Generate JWT token
-            from src.core import security
-            from datetime import timedelta
-            
-            access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-            from src.routes.auth.models import Token
-            jwt_token = Token(
-                access_token=security.create_access_token(
-                    user.id, expires_delta=access_token_expires
-                )
-            )
-            
-            # Redirect to frontend with token
-            return RedirectResponse(
-                url=f"{settings.FRONTEND_URL}/oauth2/callback?access_token={jwt_token.access_token}"
-            )
-            
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Google OAuth2 authentication failed: {str(e)}")
+        fetch_user = oauth2_service.fetch_google_user
+        provider_name = "Google"
     
     elif provider == "apple":
         if not settings.APPLE_CLIENT_ID or not settings.APPLE_CLIENT_SECRET:
@@ -177,78 +132,36 @@ async def oauth2_callback(
     elif provider == "github":
         if not settings.GITHUB_CLIENT_ID or not settings.GITHUB_CLIENT_SECRET:
             raise HTTPException(status_code=400, detail="GitHub OAuth2 is not configured")
+        fetch_user = oauth2_service.fetch_github_user
+        provider_name = "GitHub"
+    
+    else:
+        raise HTTPException(status_code=400, detail=f"Unsupported OAuth2 provider: {provider}")
+    
+    try:
+        user_info = await fetch_user(code)
         
-        # Exchange authorization code for access token
-        from authlib.integrations.requests_client import OAuth2Session
-        import requests
-        
-        client = OAuth2Session(
-            client_id=settings.GITHUB_CLIENT_ID,
-            redirect_uri=settings.GITHUB_REDIRECT_URI,
-            scope="user:email"
+        # Create or update user
+        user = await auth_service.create_or_update_oauth2_user(
+            session=session,
+            provider=user_info.provider,
+            provider_user_id=user_info.provider_user_id,
+            email=user_info.email,
+            name=user_info.name,
+            picture=user_info.picture
         )
-        
-        try:
-            token = client.fetch_token(
-                "https://github.com/login/oauth/access_token",
-                code=code,
-                client_secret=settings.GITHUB_CLIENT_SECRET,
-            )
-            
-            # Get user info from GitHub
-            response = requests.get(
-                "https://api.github.com/user",
-                headers={"Authorization": f"token {token['access_token']}"}
-            )
-            user_info = response.json()
-            
-            # Get user email (GitHub may not provide email in user info)
-            email = user_info.get("email")
-            if not email:
-                # Get user email from GitHub API
-                email_response = requests.get(
-                    "https://api.github.com/user/emails",
-                    headers={"Authorization": f"token {token['access_token']}"}
-                )
-                emails = email_response.json()
-                primary_email = next((e for e in emails if e.get("primary") and e.get("verified")), None)
-                if primary_email:
-                    email = primary_email.get("email")
-                elif emails:
-                    email = emails[0].get("email")
-            
-            if not email:
-                raise HTTPException(status_code=400, detail="Could not retrieve email from GitHub")
-            
-            # Create or update user
-            user = await auth_service.create_or_update_oauth2_user(
-                session=session,
-                provider="github",
-                provider_user_id=str(user_info["id"]),
-                email=email,
-                name=user_info.get("name", user_info.get("login", "")),
-                picture=user_info.get("avatar_url", "")
-            )
-            
-            # Generate JWT token
-            from src.core import security
-            from datetime import timedelta
-            
-            access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-            from src.routes.auth.models import Token
-            jwt_token = Token(
-                access_token=security.create_access_token(
-                    user.id, expires_delta=access_token_expires
-                )
-            )
-            
-            # Redirect to frontend with token
-            return RedirectResponse(
-                url=f"{settings.FRONTEND_URL}/oauth2/callback?access_token={jwt_token.access_token}"
-            )
-            
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"GitHub OAuth2 authentication failed: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"{provider_name} OAuth2 authentication failed: {str(e)}")
     
-    else:
-        raise HTTPException(status_code=400, detail=f"Unsupported OAuth2 provider: {provider}")
\ No newline at end of file
+    # Generate JWT token
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    jwt_token = Token(
+        access_token=security.create_access_token(
+            user.id, expires_delta=access_token_expires
+        )
+    )
+    
+    # Redirect to frontend with token
+    return RedirectResponse(
+        url=f"{settings.FRONTEND_URL}/oauth2/callback?access_token={jwt_token.access_token}"
+    )
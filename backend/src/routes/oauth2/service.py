@@ -0,0 +1,98 @@
+import asyncio
+
+from src.config import settings
+from src.core.http import oauth2_client
+from src.core.oidc import get_oidc_provider
+from src.routes.oauth2.models import OAuth2UserInfo
+
+# Google signs ID tokens with either form of its issuer
+GOOGLE_ISSUERS = ["https://accounts.google.com", "accounts.google.com"]
+
+
+class OAuth2ProviderError(Exception):
+    pass
+
+
+async def fetch_google_user(code: str) -> OAuth2UserInfo:
+    """
+    Exchange the authorization code and read the Google profile from the
+    ID token of the token response, verified locally against Google's cached
+    JWKS. The userinfo endpoint is only called if no ID token came back.
+    """
+    async with oauth2_client(
+        client_id=settings.GOOGLE_CLIENT_ID,
+        client_secret=settings.GOOGLE_CLIENT_SECRET,
+        token_endpoint_auth_method="client_secret_post",
+        redirect_uri=settings.GOOGLE_REDIRECT_URI,
+        scope="openid email profile",
+    ) as client:
+        token = await client.fetch_token(settings.GOOGLE_TOKEN_URL, code=code)
+        if not token.get("id_token"):
+            response = await client.get(settings.GOOGLE_USERINFO_URL)
+            response.raise_for_status()
+            user_info = response.json()
+            return OAuth2UserInfo(
+                provider="google",
+                provider_user_id=str(user_info["id"]),
+                email=user_info["email"],
+                name=user_info.get("name", ""),
+                picture=user_info.get("picture", ""),
+            )
+
+    claims = await get_oidc_provider(settings.GOOGLE_DISCOVERY_URL).verify_id_token(
+        token["id_token"], audience=settings.GOOGLE_CLIENT_ID, issuer=GOOGLE_ISSUERS
+    )
+    if not claims.get("email") or not claims.get("email_verified", False):
+        raise OAuth2ProviderError("Google account has no verified email")
+    return OAuth2UserInfo(
+        provider="google",
+        provider_user_id=str(claims["sub"]),
+        email=claims["email"],
+        name=claims.get("name", ""),
+        picture=claims.get("picture", ""),
+    )
+
+
+async def fetch_github_user(code: str) -> OAuth2UserInfo:
+    """
+    Exchange the authorization code and read the GitHub profile. The profile
+    and the email list are fetched concurrently, the profile email is only
+    set when the user made it public.
+    """
+    async with oauth2_client(
+        client_id=settings.GITHUB_CLIENT_ID,
+        client_secret=settings.GITHUB_CLIENT_SECRET,
+        token_endpoint_auth_method="client_secret_post",
+        redirect_uri=settings.GITHUB_REDIRECT_URI,
+        scope="user:email",
+        base_url=settings.GITHUB_API_URL,
+        headers={"Accept": "application/vnd.github+json"},
+    ) as client:
+        # GitHub answers the token request form-encoded unless asked for JSON
+        await client.fetch_token(
+            settings.GITHUB_TOKEN_URL, code=code, headers={"Accept": "application/json"}
+        )
+        user_response, emails_response = await asyncio.gather(
+            client.get("/user"), client.get("/user/emails")
+        )
+        user_response.raise_for_status()
+        user_info = user_response.json()
+
+    email = user_info.get("email")
+    if not email and emails_response.is_success:
+        emails = emails_response.json()
+        primary_email = next((e for e in emails if e.get("primary") and e.get("verified")), None)
+        if primary_email:
+            email = primary_email.get("email")
+        elif emails:
+            email = emails[0].get("email")
+    if not email:
+        raise OAuth2ProviderError("Could not retrieve email from GitHub")
+
+    return OAuth2UserInfo(
+        provider="github",
+        provider_user_id=str(user_info["id"]),
+        email=email,
+        name=user_info.get("name") or user_info.get("login", ""),
+        picture=user_info.get("avatar_url", ""),
+    )
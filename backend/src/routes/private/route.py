@@ -4,13 +4,14 @@ from fastapi import APIRouter
 from pydantic import BaseModel
 
 from src.routes.deps import AsyncSessionDep
-from src.core.security import get_password_hash
+from src.core.security import get_password_hash_async
+from src.core.timing import TimedRoute
 from src.routes.users.models import (
     User,
     UserPublic,
 )
 
-router = APIRouter(tags=["private"], prefix="/private")
+router = APIRouter(tags=["private"], prefix="/private", route_class=TimedRoute)
 
 
 class PrivateUserCreate(BaseModel):
@@ -29,7 +30,7 @@ async def create_user(user_in: PrivateUserCreate, session: AsyncSessionDep) -> A
     user = User(
         email=user_in.email,
         full_name=user_in.full_name,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=await get_password_hash_async(user_in.password),
     )
 
     session.add(user)
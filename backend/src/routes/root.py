@@ -4,14 +4,21 @@ from src.routes.users import route as users
 from src.routes.items import route as items
 from src.routes.private import route as private
 from src.routes.oauth2 import route as oauth2
+from src.routes.diagnostics import route as diagnostics
+from src.routes.health import route as health
 from src.config import settings
+from src.core.timing import TimedRoute
 
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 router.include_router(auth.router)
 router.include_router(users.router)
 router.include_router(items.router)
 router.include_router(oauth2.router)
+router.include_router(health.router)
+
+if settings.DIAGNOSTICS_ENABLED:
+    router.include_router(diagnostics.router)
 
 if settings.ENVIRONMENT == "local":
     router.include_router(private.router)
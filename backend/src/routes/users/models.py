@@ -4,7 +4,7 @@ from enum import Enum
 
 from pydantic import EmailStr
 from sqlmodel import Field, Relationship, SQLModel, Column, DateTime
-from sqlalchemy import func
+from sqlalchemy import Index, func, text
 
 
 # Enum for sorting users
@@ -21,6 +21,28 @@ class SortOrder(str, Enum):
     desc = "desc"
 
 
+class UserSearchMode(str, Enum):
+    # Substring match (ILIKE), sorted by sort_by
+    contains = "contains"
+    # Trigram similarity (pg_trgm %), ranked by best similarity
+    similar = "similar"
+
+
+class UserAuthSource(str, Enum):
+    # Password hash stored in the database
+    local = "local"
+    # Bind against the LDAP directory
+    ldap = "ldap"
+    # Provider login only, no password
+    oauth2 = "oauth2"
+
+
+class UserPurgeStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    completed = "completed"
+
+
 # Shared properties
 class UserBase(SQLModel):
     email: EmailStr = Field(unique=True, index=True, max_length=255)
@@ -32,8 +54,38 @@ class UserBase(SQLModel):
 
 # Database model, database table inferred from class name
 class User(UserBase, table=True):
+    # Case-insensitive uniqueness, also what the email/username lookups probe
+    # Trigram GIN indexes back the admin search (ILIKE and similarity)
+    __table_args__ = (
+        Index("ix_user_email_lower", text("lower(email)"), unique=True),
+        Index("ix_user_username_lower", text("lower(username)"), unique=True),
+        Index(
+            "ix_user_email_trgm",
+            "email",
+            postgresql_using="gin",
+            postgresql_ops={"email": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_user_username_trgm",
+            "username",
+            postgresql_using="gin",
+            postgresql_ops={"username": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_user_full_name_trgm",
+            "full_name",
+            postgresql_using="gin",
+            postgresql_ops={"full_name": "gin_trgm_ops"},
+        ),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     hashed_password: str
+    # Where logins are verified; NULL for accounts created before the column
+    # existed, resolved on their next successful login
+    auth_source: UserAuthSource | None = Field(default=UserAuthSource.local)
+    # Directory entry of LDAP accounts, lets logins go straight to the bind
+    ldap_dn: str | None = Field(default=None, index=True, max_length=1024)
     created_at: datetime = Field(
         sa_column=Column(DateTime, nullable=False, server_default=func.now())
     )
@@ -84,3 +136,25 @@ class UsersPublic(SQLModel):
     size: int
     total: int
     pages: int
+
+
+# Background deletion of a user's items; the user row is removed once the
+# purge completes, so user_id deliberately carries no foreign key
+class UserPurge(SQLModel, table=True):
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    user_id: uuid.UUID = Field(unique=True, index=True)
+    status: UserPurgeStatus = Field(default=UserPurgeStatus.pending)
+    items_deleted: int = 0
+    lease_expires_at: datetime | None = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    completed_at: datetime | None = None
+
+
+class UserPurgePublic(SQLModel):
+    user_id: uuid.UUID
+    status: UserPurgeStatus
+    items_deleted: int
+    created_at: datetime
+    updated_at: datetime
+    completed_at: datetime | None
@@ -2,36 +2,41 @@ import uuid
 import math
 from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import col, delete, func, select, or_, desc, asc
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlmodel import func, select, desc, asc
 
-from src.routes.items.models import Item
 from src.routes.users.models import (
     UpdatePassword,
     User,
+    UserAuthSource,
     UserCreate,
     UserPublic,
+    UserPurgePublic,
     UserUpdate,
     UserUpdateMe,
     UsersPublic,
     UserRegister,
+    UserSearchMode,
     UserSortField,
     SortOrder,
 )
 from src.routes.users import service as user_service
+from src.routes.auth.service import LEGACY_LDAP_PLACEHOLDER_PASSWORD
 from src.routes.deps import (
     CurrentUser,
     AsyncSessionDep,
     get_current_active_superuser,
 )
 from src.config import settings
-from src.core.security import get_password_hash, verify_password
+from src.core.security import verify_password_async
+from src.core.ratelimit import enforce_rate_limit
 
-from src.utils.auth import generate_new_account_email, send_email
+from src.utils.auth import generate_new_account_email, queue_email
 from src.routes.models import Message
+from src.core.responses import FastJSONRoute
 
 
-router = APIRouter(prefix="/users", tags=["users"])
+router = APIRouter(prefix="/users", tags=["users"], route_class=FastJSONRoute)
 
 
 @router.get(
@@ -43,7 +48,8 @@ async def read_users(
     session: AsyncSessionDep,
     page: int = Query(default=1, ge=1, description="Page number (starts from 1)"),
     size: int = Query(default=10, ge=1, le=100, description="Number of users per page"),
-    search: Optional[str] = Query(default=None, description="Search in email and full name"),
+    search: Optional[str] = Query(default=None, description="Search in email, username and full name"),
+    search_mode: UserSearchMode = Query(default=UserSearchMode.contains, description="Substring match or ranked trigram similarity"),
     sort_by: UserSortField = Query(default=UserSortField.email, description="Field to sort by"),
     sort_order: SortOrder = Query(default=SortOrder.asc, description="Sort order (asc/desc)"),
 ) -> Any:
@@ -53,12 +59,14 @@ async def read_users(
     Args:
         page: Page number (1-based)
         size: Number of users per page (1-100)
-        search: Search term for email and full name
+        search: Search term for email, username and full name
+        search_mode: contains (substring) or similar (ranked by trigram similarity)
         sort_by: Field to sort by (email, full_name)
         sort_order: Sort order (asc/desc)
     
     Returns:
-        Paginated list of users with metadata
+        Paginated list of users with metadata. When searching, `total` is
+        capped at USER_SEARCH_MAX_RESULTS so the count stops early.
     """
     # Calculate offset
     offset = (page - 1) * size
@@ -68,16 +76,19 @@ async def read_users(
     
     # Add search filter
     if search:
-        search_filter = or_(
-            User.email.icontains(search),
-            User.full_name.icontains(search) if User.full_name is not None else False
-        )
-        base_filters.append(search_filter)
+        base_filters.append(user_service.user_search_filter(search, search_mode))
 
-    # Build count query
-    count_statement = select(func.count()).select_from(User)
-    if base_filters:
-        count_statement = count_statement.where(*base_filters)
+    # Build count query, bounded when searching
+    if search:
+        matches = (
+            select(User.id)
+            .where(*base_filters)
+            .limit(settings.USER_SEARCH_MAX_RESULTS)
+            .subquery()
+        )
+        count_statement = select(func.count()).select_from(matches)
+    else:
+        count_statement = select(func.count()).select_from(User)
     
     count_result = await session.exec(count_statement)
     total = count_result.one()
@@ -87,7 +98,9 @@ async def read_users(
     if base_filters:
         statement = statement.where(*base_filters)
     
-    # Add sorting
+    # Add sorting, similarity matches are ranked first
+    if search and search_mode == UserSearchMode.similar:
+        statement = statement.order_by(desc(user_service.user_search_rank(search)))
     sort_column = getattr(User, sort_by.value)
     if sort_order == SortOrder.desc:
         statement = statement.order_by(desc(sort_column))
@@ -119,23 +132,21 @@ async def create_user(*, session: AsyncSessionDep, user_in: UserCreate) -> Any:
     """
     Create new user.
     """
-    user = await user_service.get_user_by_email(session=session, email=user_in.email)
-    if user:
+    user = await user_service.create_user(
+        session=session, user_create=user_in, commit=False
+    )
+    if not user:
+        field = await user_service.conflicting_field(session=session, user_create=user_in)
         raise HTTPException(
             status_code=400,
-            detail="The user with this email already exists in the system.",
+            detail=f"The user with this {field} already exists in the system.",
         )
-
-    user = await user_service.create_user(session=session, user_create=user_in)
     if settings.emails_enabled and user_in.email:
-        email_data = await generate_new_account_email(
+        email_data = generate_new_account_email(
             email_to=user_in.email, username=user_in.email, password=user_in.password
         )
-        await send_email(
-            email_to=user_in.email,
-            subject=email_data.subject,
-            html_content=email_data.html_content,
-        )
+        queue_email(session=session, email_to=user_in.email, email_data=email_data)
+    await session.commit()
     return user
 
 
@@ -170,14 +181,25 @@ async def update_password_me(
     """
     Update own password.
     """
-    if not verify_password(body.current_password, current_user.hashed_password):
+    if current_user.auth_source == UserAuthSource.ldap:
+        raise HTTPException(
+            status_code=400, detail="The password of LDAP users is managed in the directory"
+        )
+    # Accounts predating auth_source may be LDAP accounts holding the hash of
+    # the placeholder, which proves nothing
+    if current_user.auth_source is None and (
+        body.current_password == LEGACY_LDAP_PLACEHOLDER_PASSWORD
+    ):
+        raise HTTPException(status_code=400, detail="Incorrect password")
+    if not await verify_password_async(
+        body.current_password, current_user.hashed_password
+    ):
         raise HTTPException(status_code=400, detail="Incorrect password")
     if body.current_password == body.new_password:
         raise HTTPException(
             status_code=400, detail="New password cannot be the same as the current one"
         )
-    hashed_password = get_password_hash(body.new_password)
-    current_user.hashed_password = hashed_password
+    await user_service.set_password(db_user=current_user, password=body.new_password)
     session.add(current_user)
     await session.commit()
     return Message(message="Password updated successfully")
@@ -195,29 +217,35 @@ async def read_user_me(current_user: CurrentUser) -> Any:
 async def delete_user_me(session: AsyncSessionDep, current_user: CurrentUser) -> Any:
     """
     Delete own user.
+
+    The account is deactivated immediately, its items are purged in the background.
     """
     if current_user.is_superuser:
         raise HTTPException(
             status_code=403, detail="Super users are not allowed to delete themselves"
         )
-    await session.delete(current_user)
-    await session.commit()
+    await user_service.schedule_user_purge(session=session, db_user=current_user)
     return Message(message="User deleted successfully")
 
 
 @router.post("/signup", response_model=UserPublic)
-async def register_user(session: AsyncSessionDep, user_in: UserRegister) -> Any:
+async def register_user(
+    request: Request, session: AsyncSessionDep, user_in: UserRegister
+) -> Any:
     """
     Create new user without the need to be logged in.
     """
-    user = await user_service.get_user_by_email(session=session, email=user_in.email)
-    if user:
+    await enforce_rate_limit(request, "signup", per_ip=settings.RATE_LIMIT_SIGNUP_PER_IP)
+    user_create = UserCreate.model_validate(user_in)
+    user = await user_service.create_user(session=session, user_create=user_create)
+    if not user:
+        field = await user_service.conflicting_field(
+            session=session, user_create=user_create
+        )
         raise HTTPException(
             status_code=400,
-            detail="The user with this email already exists in the system",
+            detail=f"The user with this {field} already exists in the system",
         )
-    user_create = UserCreate.model_validate(user_in)
-    user = await user_service.create_user(session=session, user_create=user_create)
     return user
 
 
@@ -268,6 +296,10 @@ async def update_user(
             raise HTTPException(
                 status_code=409, detail="User with this email already exists"
             )
+    if user_in.password and db_user.auth_source == UserAuthSource.ldap:
+        raise HTTPException(
+            status_code=400, detail="The password of LDAP users is managed in the directory"
+        )
 
     db_user = await user_service.update_user(
         session=session, db_user=db_user, user_in=user_in
@@ -281,6 +313,9 @@ async def delete_user(
 ) -> Message:
     """
     Delete a user.
+
+    The account is deactivated immediately, its items are purged in the background.
+    Use `GET /users/{user_id}/purge` to follow the progress.
     """
     user = await session.get(User, user_id)
     if not user:
@@ -289,8 +324,20 @@ async def delete_user(
         raise HTTPException(
             status_code=403, detail="Super users are not allowed to delete themselves"
         )
-    statement = delete(Item).where(col(Item.owner_id) == user_id)
-    await session.exec(statement)
-    await session.delete(user)
-    await session.commit()
+    await user_service.schedule_user_purge(session=session, db_user=user)
     return Message(message="User deleted successfully")
+
+
+@router.get(
+    "/{user_id}/purge",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=UserPurgePublic,
+)
+async def read_user_purge(session: AsyncSessionDep, user_id: uuid.UUID) -> Any:
+    """
+    Get the progress of a user's background purge.
+    """
+    purge = await user_service.get_user_purge(session=session, user_id=user_id)
+    if not purge:
+        raise HTTPException(status_code=404, detail="No purge scheduled for this user")
+    return purge
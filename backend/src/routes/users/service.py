@@ -1,29 +1,74 @@
+import uuid
 from datetime import datetime, timezone
 from typing import Any
-from sqlmodel import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql.elements import ColumnElement
+from sqlmodel import col, func, or_, select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from src.core.security import get_password_hash
-from src.routes.users.models import User, UserCreate, UserUpdate
+from src.core.security import get_password_hash_async
+from src.routes.users.models import (
+    User,
+    UserAuthSource,
+    UserCreate,
+    UserPurge,
+    UserSearchMode,
+    UserUpdate,
+)
 
+SEARCH_COLUMNS = (User.email, User.username, User.full_name)
 
-async def create_user(*, session: AsyncSession, user_create: UserCreate) -> User:
-    db_obj = User.model_validate(
-        user_create,
-        update={
-            "hashed_password": get_password_hash(user_create.password),
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow(),
-        },
+
+async def insert_user(
+    *, session: AsyncSession, db_user: User, commit: bool = True
+) -> User | None:
+    """
+    Insert a user in a single INSERT ... ON CONFLICT DO NOTHING RETURNING.
+
+    Returns None when the email or username is already taken, including by
+    a concurrent insert, instead of raising an IntegrityError. With
+    commit=False the caller commits, e.g. together with a queued email.
+    """
+    statement = (
+        insert(User)
+        .values(**db_user.model_dump())
+        .on_conflict_do_nothing()
+        .returning(User)
+    )
+    result = await session.exec(statement)
+    user = result.scalars().first()
+    if commit:
+        await session.commit()
+    return user
+
+
+async def conflicting_field(*, session: AsyncSession, user_create: UserCreate) -> str:
+    """Which of the email and username made `insert_user` skip the user."""
+    if user_create.username and not await get_user_by_email(
+        session=session, email=user_create.email
+    ):
+        if await get_user_by_username(session=session, username=user_create.username):
+            return "username"
+    return "email"
+
+
+async def create_user(
+    *, session: AsyncSession, user_create: UserCreate, commit: bool = True
+) -> User | None:
+    return await create_user_with_hashed_password(
+        session=session,
+        user_create=user_create,
+        hashed_password=await get_password_hash_async(user_create.password),
+        commit=commit,
     )
-    session.add(db_obj)
-    await session.commit()
-    await session.refresh(db_obj)
-    return db_obj
 
 
 async def create_user_with_hashed_password(
-    *, session: AsyncSession, user_create: UserCreate, hashed_password: str
-) -> User:
+    *,
+    session: AsyncSession,
+    user_create: UserCreate,
+    hashed_password: str,
+    commit: bool = True,
+) -> User | None:
     db_obj = User.model_validate(
         user_create,
         update={
@@ -32,10 +77,22 @@ async def create_user_with_hashed_password(
             "updated_at": datetime.utcnow(),
         },
     )
-    session.add(db_obj)
-    await session.commit()
-    await session.refresh(db_obj)
-    return db_obj
+    return await insert_user(session=session, db_user=db_obj, commit=commit)
+
+
+async def set_password(*, db_user: User, password: str) -> None:
+    """
+    Store the hash of a new password, for the caller to commit.
+
+    Logins are routed by auth_source, so provider accounts and accounts
+    predating the column become local ones, or the password could never be
+    used. LDAP accounts are the caller's to refuse, the directory owns their
+    password and the sync would make them LDAP accounts again.
+    """
+    db_user.hashed_password = await get_password_hash_async(password)
+    if db_user.auth_source != UserAuthSource.local:
+        db_user.auth_source = UserAuthSource.local
+        db_user.ldap_dn = None
 
 
 async def update_user(
@@ -44,9 +101,7 @@ async def update_user(
     user_data = user_in.model_dump(exclude_unset=True)
     extra_data = {}
     if "password" in user_data:
-        password = user_data["password"]
-        hashed_password = get_password_hash(password)
-        extra_data["hashed_password"] = hashed_password
+        await set_password(db_user=db_user, password=user_data["password"])
     db_user.sqlmodel_update(user_data, update=extra_data)
     session.add(db_user)
     await session.commit()
@@ -54,15 +109,70 @@ async def update_user(
     return db_user
 
 
+# Lookups are case-insensitive and served by the lower() unique indexes
 async def get_user_by_email(*, session: AsyncSession, email: str) -> User | None:
-    statement = select(User).where(User.email == email)
+    statement = select(User).where(func.lower(User.email) == func.lower(email))
     result = await session.exec(statement)
     session_user = result.first()
     return session_user
 
 
 async def get_user_by_username(*, session: AsyncSession, username: str) -> User | None:
-    statement = select(User).where(User.username == username)
+    statement = select(User).where(
+        func.lower(User.username) == func.lower(username)
+    )
     result = await session.exec(statement)
     session_user = result.first()
     return session_user
+
+
+async def get_user_by_login(*, session: AsyncSession, login: str) -> User | None:
+    """
+    Resolve a login name in one query, as a username or as an email.
+    A username match wins over an email match (both indexes are probed).
+    """
+    username_match = func.lower(User.username) == func.lower(login)
+    statement = (
+        select(User)
+        .where(or_(username_match, func.lower(User.email) == func.lower(login)))
+        .order_by(username_match.desc().nulls_last())
+        .limit(1)
+    )
+    result = await session.exec(statement)
+    return result.first()
+
+
+async def schedule_user_purge(*, session: AsyncSession, db_user: User) -> None:
+    """
+    Deactivate the user right away and queue its items for background deletion.
+    Scheduling twice is a no-op, the existing purge job keeps its progress.
+    """
+    db_user.is_active = False
+    session.add(db_user)
+    statement = (
+        insert(UserPurge)
+        .values(user_id=db_user.id)
+        .on_conflict_do_nothing(index_elements=[UserPurge.user_id])
+    )
+    await session.exec(statement)
+    await session.commit()
+
+
+async def get_user_purge(
+    *, session: AsyncSession, user_id: uuid.UUID
+) -> UserPurge | None:
+    statement = select(UserPurge).where(UserPurge.user_id == user_id)
+    result = await session.exec(statement)
+    return result.first()
+
+
+def user_search_filter(search: str, mode: UserSearchMode) -> ColumnElement[bool]:
+    """Admin search predicate, both modes can use the trigram GIN indexes."""
+    if mode == UserSearchMode.similar:
+        return or_(*(col(column).op("%")(search) for column in SEARCH_COLUMNS))
+    return or_(*(col(column).icontains(search) for column in SEARCH_COLUMNS))
+
+
+def user_search_rank(search: str) -> ColumnElement[float]:
+    """Best trigram similarity of the search term across the searched columns."""
+    return func.greatest(*(func.similarity(column, search) for column in SEARCH_COLUMNS))
@@ -1,4 +1,6 @@
+import functools
 import logging
+import smtplib
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
@@ -6,11 +8,14 @@ from typing import Any
 
 import emails
 import jwt
-from jinja2 import Template
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, StrictUndefined
 from jwt.exceptions import InvalidTokenError
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.core import security
+from src.core.tracing import smtp_span
 from src.config import settings
+from src.routes.models import EmailOutbox
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,12 +27,65 @@ class EmailData:
     subject: str
 
 
+EMAIL_TEMPLATES_DIR = Path(__file__).parent / "email-templates"
+EMAIL_TEMPLATES = ("test_email.html", "reset_password.html", "new_account.html")
+
+
+@functools.cache
+def get_email_templates() -> Environment:
+    """
+    Compile every email template once. Called from the application lifespan,
+    so a missing or broken template fails startup instead of the first email.
+    """
+    bytecode_cache = None
+    if settings.EMAIL_TEMPLATES_BYTECODE_CACHE_DIR:
+        Path(settings.EMAIL_TEMPLATES_BYTECODE_CACHE_DIR).mkdir(parents=True, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(settings.EMAIL_TEMPLATES_BYTECODE_CACHE_DIR)
+    environment = Environment(
+        loader=FileSystemLoader(EMAIL_TEMPLATES_DIR),
+        autoescape=True,
+        undefined=StrictUndefined,
+        auto_reload=False,
+        bytecode_cache=bytecode_cache,
+    )
+    # Every file, layouts only reached through extends included, and the
+    # rendered templates, which must exist
+    for template_name in sorted({*environment.list_templates(), *EMAIL_TEMPLATES}):
+        environment.get_template(template_name)
+    return environment
+
+
 def render_email_template(*, template_name: str, context: dict[str, Any]) -> str:
-    template_str = (
-        Path(__file__).parent / "email-templates" / "build" / template_name
-    ).read_text()
-    html_content = Template(template_str).render(context)
-    return html_content
+    return get_email_templates().get_template(template_name).render(context)
+
+
+def build_email_message(*, email_to: str, subject: str, html_content: str) -> str:
+    message = emails.Message(
+        subject=subject,
+        html=html_content,
+        mail_from=(settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL),
+        mail_to=email_to,
+    )
+    return message.as_string()
+
+
+def open_smtp_connection() -> smtplib.SMTP:
+    """A connected and logged in SMTP client, blocking."""
+    assert settings.emails_enabled, "no provided configuration for email variables"
+    timeout = settings.SMTP_TIMEOUT_SECONDS
+    if settings.SMTP_SSL and not settings.SMTP_TLS:
+        conn = smtplib.SMTP_SSL(settings.SMTP_HOST, settings.SMTP_PORT, timeout=timeout)
+    else:
+        conn = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=timeout)
+    try:
+        if settings.SMTP_TLS:
+            conn.starttls()
+        if settings.SMTP_USER:
+            conn.login(settings.SMTP_USER, settings.SMTP_PASSWORD or "")
+    except Exception:
+        conn.close()
+        raise
+    return conn
 
 
 def send_email(
@@ -36,23 +94,31 @@ def send_email(
     subject: str = "",
     html_content: str = "",
 ) -> None:
+    """
+    Send a single email on its own connection, blocking. Requests queue
+    their emails with `queue_email` instead.
+    """
+    message = build_email_message(
+        email_to=email_to, subject=subject, html_content=html_content
+    )
+    with smtp_span("send"), open_smtp_connection() as conn:
+        conn.sendmail(str(settings.EMAILS_FROM_EMAIL), [email_to], message)
+    logger.info(f"send email to {email_to}: {subject}")
+
+
+def queue_email(*, session: AsyncSession, email_to: str, email_data: EmailData) -> None:
+    """
+    Add an email to the outbox, it is sent by the email_outbox worker once the
+    session's transaction commits.
+    """
     assert settings.emails_enabled, "no provided configuration for email variables"
-    message = emails.Message(
-        subject=subject,
-        html=html_content,
-        mail_from=(settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL),
+    session.add(
+        EmailOutbox(
+            email_to=email_to,
+            subject=email_data.subject,
+            html_content=email_data.html_content,
+        )
     )
-    smtp_options = {"host": settings.SMTP_HOST, "port": settings.SMTP_PORT}
-    if settings.SMTP_TLS:
-        smtp_options["tls"] = True
-    elif settings.SMTP_SSL:
-        smtp_options["ssl"] = True
-    if settings.SMTP_USER:
-        smtp_options["user"] = settings.SMTP_USER
-    if settings.SMTP_PASSWORD:
-        smtp_options["password"] = settings.SMTP_PASSWORD
-    response = message.send(to=email_to, smtp=smtp_options)
-    logger.info(f"send email result: {response}")
 
 
 def generate_test_email(email_to: str) -> EmailData:
@@ -0,0 +1,41 @@
+import asyncio
+import logging
+
+from src.config import settings
+from src.workers import email_outbox, ldap_sync, user_purge
+from src.workers.base import WorkerFn
+
+logger = logging.getLogger(__name__)
+
+_stop_event: asyncio.Event | None = None
+_tasks: list[asyncio.Task] = []
+
+
+def _enabled_workers() -> list[tuple[str, WorkerFn]]:
+    workers: list[tuple[str, WorkerFn]] = []
+    if settings.USER_PURGE_ENABLED:
+        workers.append(("user_purge", user_purge.run))
+    if settings.LDAP_ENABLED and settings.LDAP_SYNC_ENABLED:
+        workers.append(("ldap_sync", ldap_sync.run))
+    if settings.EMAIL_OUTBOX_ENABLED and settings.emails_enabled:
+        workers.append(("email_outbox", email_outbox.run))
+    return workers
+
+
+def start_workers() -> None:
+    """Start the background workers, called from the application lifespan."""
+    global _stop_event
+    _stop_event = asyncio.Event()
+    for name, worker in _enabled_workers():
+        logger.info(f"Starting background worker {name}")
+        _tasks.append(asyncio.create_task(worker(_stop_event), name=name))
+
+
+async def stop_workers() -> None:
+    """Signal the workers to stop and wait for the current batch to finish."""
+    if _stop_event is None:
+        return
+    _stop_event.set()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
+
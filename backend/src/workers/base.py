@@ -0,0 +1,14 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+
+# A worker runs until the stop event is set and then returns
+WorkerFn = Callable[[asyncio.Event], Awaitable[None]]
+
+
+async def sleep_until_stopped(stop: asyncio.Event, seconds: float) -> bool:
+    """Sleep for `seconds` unless stopped earlier, returns True when stopped."""
+    try:
+        await asyncio.wait_for(stop.wait(), timeout=seconds)
+    except asyncio.TimeoutError:
+        return False
+    return True
@@ -0,0 +1,205 @@
+"""
+Delivery of the transactional email outbox.
+
+Requests only insert an `EmailOutbox` row in the transaction of the change that
+triggers the email. This worker leases due emails in batches and sends them
+over one SMTP connection, kept open between batches and closed after
+EMAIL_OUTBOX_SMTP_IDLE_SECONDS without mail. Sent emails are deleted. A failed
+email is retried with exponential backoff until EMAIL_OUTBOX_MAX_ATTEMPTS, or
+marked failed right away when the server rejects it permanently (5xx); failed
+emails are kept for inspection without their body, which can hold a reset link
+or an initial password. If a worker dies mid-batch its lease expires and the
+emails are sent again.
+"""
+
+import asyncio
+import logging
+import smtplib
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import col, delete, select, update
+
+from src.config import settings
+from src.core.metrics import EMAILS
+from src.core.tracing import get_tracer, smtp_span
+from src.database import async_session
+from src.routes.models import EmailOutbox, EmailOutboxStatus
+from src.utils.auth import build_email_message, open_smtp_connection
+from src.workers.base import sleep_until_stopped
+
+logger = logging.getLogger(__name__)
+
+# Errors answering a single message, other errors are about the connection
+MESSAGE_ERRORS = (
+    smtplib.SMTPRecipientsRefused,
+    smtplib.SMTPSenderRefused,
+    smtplib.SMTPDataError,
+)
+
+
+class SMTPSender:
+    """A persistent SMTP connection, only used from one thread at a time."""
+
+    def __init__(self) -> None:
+        self._conn: smtplib.SMTP | None = None
+        self._last_used = 0.0
+
+    def send_batch(self, emails: list[EmailOutbox]) -> dict[uuid.UUID, Exception | None]:
+        """Send the emails in order, returns the error of each, None if sent."""
+        results: dict[uuid.UUID, Exception | None] = {}
+        for email in emails:
+            try:
+                self._send(email)
+                results[email.id] = None
+            except MESSAGE_ERRORS as e:
+                results[email.id] = e
+            except Exception as e:
+                # The server is unreachable, the rest of the batch would
+                # only wait for the same timeout
+                self.close()
+                for unsent in emails[len(results) :]:
+                    results[unsent.id] = e
+                break
+        self._last_used = time.monotonic()
+        return results
+
+    def _send(self, email: EmailOutbox) -> None:
+        message = build_email_message(
+            email_to=email.email_to,
+            subject=email.subject,
+            html_content=email.html_content,
+        )
+        from_addr = str(settings.EMAILS_FROM_EMAIL)
+        with smtp_span("send"):
+            self._sendmail(from_addr, email.email_to, message)
+
+    def _sendmail(self, from_addr: str, email_to: str, message: str) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.sendmail(from_addr, [email_to], message)
+                return
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                # Dropped by the server while idle, reconnect once
+                self.close()
+        self._conn = open_smtp_connection()
+        self._conn.sendmail(from_addr, [email_to], message)
+
+    def close_if_idle(self) -> None:
+        if (
+            self._conn is not None
+            and time.monotonic() - self._last_used >= settings.EMAIL_OUTBOX_SMTP_IDLE_SECONDS
+        ):
+            self.close()
+
+    def close(self) -> None:
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        try:
+            conn.quit()
+        except Exception:
+            conn.close()
+
+
+def is_permanent(error: Exception) -> bool:
+    """Whether the SMTP server rejected the message for good (5xx)."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return isinstance(error, MESSAGE_ERRORS) and error.smtp_code >= 500
+
+
+def retry_delay(attempts: int) -> timedelta:
+    seconds = settings.EMAIL_OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+    return timedelta(seconds=min(seconds, settings.EMAIL_OUTBOX_RETRY_MAX_SECONDS))
+
+
+async def claim_batch() -> list[EmailOutbox]:
+    """Lease up to EMAIL_OUTBOX_BATCH_SIZE due emails, counting the attempt."""
+    now = datetime.utcnow()
+    due = (
+        select(EmailOutbox.id)
+        .where(EmailOutbox.status == EmailOutboxStatus.pending)
+        .where(EmailOutbox.next_attempt_at <= now)
+        .order_by(EmailOutbox.next_attempt_at)
+        .limit(settings.EMAIL_OUTBOX_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+    )
+    statement = (
+        update(EmailOutbox)
+        .where(col(EmailOutbox.id).in_(due))
+        .values(
+            attempts=EmailOutbox.attempts + 1,
+            next_attempt_at=now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS),
+        )
+        .returning(EmailOutbox)
+        .execution_options(synchronize_session=False)
+    )
+    async with async_session() as session:
+        result = await session.exec(statement)
+        emails = list(result.scalars().all())
+        await session.commit()
+    emails.sort(key=lambda email: email.created_at)
+    return emails
+
+
+async def record_results(
+    emails: list[EmailOutbox], results: dict[uuid.UUID, Exception | None]
+) -> None:
+    """Delete the sent emails and schedule or give up the failed ones."""
+    now = datetime.utcnow()
+    sent = [email_id for email_id, error in results.items() if error is None]
+    failed = []
+    for email in emails:
+        error = results[email.id]
+        if error is None:
+            continue
+        give_up = is_permanent(error) or email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+        logger.warning(
+            f"Sending email {email.id} failed (attempt {email.attempts})"
+            f"{', giving up' if give_up else ''}: {error!r}"
+        )
+        failed.append(
+            {
+                "id": email.id,
+                "status": EmailOutboxStatus.failed if give_up else EmailOutboxStatus.pending,
+                "html_content": "" if give_up else email.html_content,
+                "last_error": f"{type(error).__name__}: {error}",
+                "next_attempt_at": now + retry_delay(email.attempts),
+            }
+        )
+        EMAILS.labels("failed" if give_up else "retry").inc()
+    EMAILS.labels("sent").inc(len(sent))
+    async with async_session() as session:
+        if sent:
+            await session.exec(
+                delete(EmailOutbox)
+                .where(col(EmailOutbox.id).in_(sent))
+                .execution_options(synchronize_session=False)
+            )
+        if failed:
+            await session.exec(update(EmailOutbox), params=failed)
+        await session.commit()
+
+
+async def run(stop: asyncio.Event) -> None:
+    sender = SMTPSender()
+    try:
+        while not stop.is_set():
+            try:
+                emails = await claim_batch()
+                if emails:
+                    with get_tracer().start_as_current_span("email_outbox send_batch"):
+                        results = await run_in_threadpool(sender.send_batch, emails)
+                        await record_results(emails, results)
+                    sent = sum(error is None for error in results.values())
+                    logger.info(f"Sent {sent} of {len(emails)} queued emails")
+                    continue
+                await run_in_threadpool(sender.close_if_idle)
+            except Exception as e:
+                logger.error(f"Email outbox worker error: {e}")
+            await sleep_until_stopped(stop, settings.EMAIL_OUTBOX_POLL_INTERVAL_SECONDS)
+    finally:
+        await run_in_threadpool(sender.close)
@@ -0,0 +1,167 @@
+"""
+Scheduled import of the LDAP directory into the user table.
+
+The worker holding the lease on the `LDAPSyncState` row runs a paged search
+(simple paged results control) for the entries matching LDAP_USER_FILTER that
+were modified since the last sync, and applies each page with
+`upsert_directory_users`, the same conflict handling LDAP logins use. The
+first run imports the whole directory. The modifyTimestamp watermark only
+advances once the whole search went through; entries at the watermark are
+applied again on the next run, which is harmless. Entries removed from the
+directory are not detected.
+
+With the sync enabled, LDAP accounts linked to their entry log in with a
+single bind (see `authenticate_hybrid`).
+"""
+
+import asyncio
+import logging
+from contextlib import aclosing
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import col, or_, update
+
+from src.config import settings
+from src.core.ldap import get_ldap_client
+from src.database import async_session
+from src.routes.auth.models import LDAPSyncState
+from src.routes.auth.service import (
+    directory_user_from_entry,
+    ldap_user_attributes,
+    upsert_directory_users,
+)
+from src.workers.base import sleep_until_stopped
+
+logger = logging.getLogger(__name__)
+
+SYNC_NAME = "users"
+# How often replicas check whether a sync is due
+POLL_INTERVAL_SECONDS = 60.0
+
+
+def directory_timestamp(value: Any) -> str:
+    """Normalize a modifyTimestamp value to GeneralizedTime (YYYYmmddHHMMSSZ)."""
+    if isinstance(value, (list, tuple)):
+        value = value[0]
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc).strftime("%Y%m%d%H%M%SZ")
+    # Drops fractions and offsets, e.g. Active Directory's "20240101120000.0Z"
+    return str(value)[:14] + "Z"
+
+
+def lease_deadline() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=settings.LDAP_SYNC_LEASE_SECONDS)
+
+
+async def claim_sync() -> LDAPSyncState | None:
+    """Lease the sync state if a sync is due and no other worker runs one."""
+    now = datetime.utcnow()
+    due_before = now - timedelta(seconds=settings.LDAP_SYNC_INTERVAL_SECONDS)
+    async with async_session() as session:
+        await session.exec(
+            insert(LDAPSyncState)
+            .values(name=SYNC_NAME, updated_at=now)
+            .on_conflict_do_nothing(index_elements=[LDAPSyncState.name])
+        )
+        result = await session.exec(
+            update(LDAPSyncState)
+            .where(col(LDAPSyncState.name) == SYNC_NAME)
+            .where(
+                or_(
+                    col(LDAPSyncState.lease_expires_at).is_(None),
+                    col(LDAPSyncState.lease_expires_at) < now,
+                )
+            )
+            .where(
+                or_(
+                    col(LDAPSyncState.last_synced_at).is_(None),
+                    col(LDAPSyncState.last_synced_at) < due_before,
+                )
+            )
+            .values(lease_expires_at=lease_deadline(), updated_at=now)
+            .returning(LDAPSyncState)
+            .execution_options(synchronize_session=False)
+        )
+        state = result.scalars().first()
+        await session.commit()
+    return state
+
+
+async def save_sync_state(**values: Any) -> None:
+    async with async_session() as session:
+        await session.exec(
+            update(LDAPSyncState)
+            .where(col(LDAPSyncState.name) == SYNC_NAME)
+            .values(updated_at=datetime.utcnow(), **values)
+        )
+        await session.commit()
+
+
+async def sync_directory(state: LDAPSyncState, stop: asyncio.Event) -> bool:
+    """
+    Run a claimed sync, returns False if interrupted by stop (the watermark is
+    then left unchanged and the next run starts over from it).
+    """
+    base_filter = settings.LDAP_USER_FILTER.format(username="*")
+    if state.modify_timestamp:
+        search_filter = f"(&{base_filter}(modifyTimestamp>={state.modify_timestamp}))"
+    else:
+        search_filter = base_filter
+    logger.info(f"LDAP sync started, modified since {state.modify_timestamp or 'ever'}")
+
+    watermark = state.modify_timestamp
+    entries = applied = 0
+    pages = get_ldap_client().paged_search(
+        search_filter,
+        attributes=ldap_user_attributes() + ["modifyTimestamp"],
+        page_size=settings.LDAP_SYNC_PAGE_SIZE,
+    )
+    async with aclosing(pages):
+        async for page in pages:
+            directory_users = []
+            for dn, attributes in page:
+                if attributes.get("modifyTimestamp"):
+                    stamp = directory_timestamp(attributes["modifyTimestamp"])
+                    watermark = max(watermark or stamp, stamp)
+                directory_user = directory_user_from_entry(dn, attributes)
+                if directory_user is not None:
+                    directory_users.append(directory_user)
+            async with async_session() as session:
+                applied += len(
+                    await upsert_directory_users(
+                        session=session, directory_users=directory_users
+                    )
+                )
+            entries += len(page)
+            await save_sync_state(lease_expires_at=lease_deadline())
+            if stop.is_set():
+                logger.info(f"LDAP sync interrupted after {entries} entries")
+                await save_sync_state(lease_expires_at=None)
+                return False
+
+    await save_sync_state(
+        modify_timestamp=watermark,
+        last_synced_at=datetime.utcnow(),
+        lease_expires_at=None,
+    )
+    logger.info(f"LDAP sync completed, {entries} entries read, {applied} users applied")
+    return True
+
+
+async def run(stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        try:
+            state = await claim_sync()
+            if state is not None:
+                try:
+                    await sync_directory(state, stop)
+                except BaseException:
+                    await save_sync_state(lease_expires_at=None)
+                    raise
+        except Exception as e:
+            logger.error(f"LDAP sync worker error: {e}")
+        await sleep_until_stopped(
+            stop, min(POLL_INTERVAL_SECONDS, settings.LDAP_SYNC_INTERVAL_SECONDS)
+        )
@@ -0,0 +1,157 @@
+"""
+Background purge of deleted users.
+
+Deleting a user only deactivates the account and inserts a `UserPurge` row.
+This worker leases pending purges, deletes the user's items in bounded batches
+(one short transaction each, throttled) and finally removes the user row.
+Progress is saved after every batch; if a worker dies its lease expires and
+the purge is resumed by whichever worker polls next.
+"""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+
+from sqlmodel import col, delete, or_, select, update
+
+from src.config import settings
+from src.database import async_session
+from src.routes.items.models import Item
+from src.routes.users.models import User, UserPurge, UserPurgeStatus
+from src.workers.base import sleep_until_stopped
+
+logger = logging.getLogger(__name__)
+
+
+async def claim_next_purge() -> UserPurge | None:
+    """Lease the oldest unfinished purge whose lease is free or expired."""
+    now = datetime.utcnow()
+    claimable = (
+        select(UserPurge.id)
+        .where(UserPurge.status != UserPurgeStatus.completed)
+        .where(
+            or_(
+                col(UserPurge.lease_expires_at).is_(None),
+                col(UserPurge.lease_expires_at) < now,
+            )
+        )
+        .order_by(UserPurge.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    statement = (
+        update(UserPurge)
+        .where(col(UserPurge.id) == claimable)
+        .values(
+            status=UserPurgeStatus.running,
+            lease_expires_at=now + timedelta(seconds=settings.USER_PURGE_LEASE_SECONDS),
+            updated_at=now,
+        )
+        .returning(UserPurge)
+        .execution_options(synchronize_session=False)
+    )
+    async with async_session() as session:
+        result = await session.exec(statement)
+        purge = result.scalars().first()
+        await session.commit()
+    return purge
+
+
+async def delete_item_batch(purge_id: uuid.UUID, user_id: uuid.UUID) -> int:
+    """Delete up to USER_PURGE_BATCH_SIZE items and record the progress."""
+    batch = (
+        select(Item.id)
+        .where(Item.owner_id == user_id)
+        .limit(settings.USER_PURGE_BATCH_SIZE)
+        .scalar_subquery()
+    )
+    now = datetime.utcnow()
+    async with async_session() as session:
+        result = await session.exec(
+            delete(Item)
+            .where(col(Item.id).in_(batch))
+            .execution_options(synchronize_session=False)
+        )
+        deleted = result.rowcount
+        await session.exec(
+            update(UserPurge)
+            .where(col(UserPurge.id) == purge_id)
+            .values(
+                items_deleted=UserPurge.items_deleted + deleted,
+                lease_expires_at=now
+                + timedelta(seconds=settings.USER_PURGE_LEASE_SECONDS),
+                updated_at=now,
+            )
+        )
+        await session.commit()
+    return deleted
+
+
+async def finish_purge(purge_id: uuid.UUID, user_id: uuid.UUID) -> None:
+    """Remove the (now item-less) user row and mark the purge completed."""
+    now = datetime.utcnow()
+    async with async_session() as session:
+        await session.exec(
+            delete(User)
+            .where(col(User.id) == user_id)
+            .execution_options(synchronize_session=False)
+        )
+        await session.exec(
+            update(UserPurge)
+            .where(col(UserPurge.id) == purge_id)
+            .values(
+                status=UserPurgeStatus.completed,
+                lease_expires_at=None,
+                updated_at=now,
+                completed_at=now,
+            )
+        )
+        await session.commit()
+
+
+async def release_purge(purge_id: uuid.UUID) -> None:
+    """Give the lease back so another worker can resume the purge right away."""
+    async with async_session() as session:
+        await session.exec(
+            update(UserPurge)
+            .where(col(UserPurge.id) == purge_id)
+            .values(lease_expires_at=None, updated_at=datetime.utcnow())
+        )
+        await session.commit()
+
+
+async def purge_user(purge: UserPurge, stop: asyncio.Event) -> bool:
+    """
+    Run a claimed purge to completion, returns False if interrupted by stop.
+    """
+    logger.info(
+        f"Purging user {purge.user_id}, {purge.items_deleted} items deleted so far"
+    )
+    items_deleted = purge.items_deleted
+    while True:
+        deleted = await delete_item_batch(purge.id, purge.user_id)
+        items_deleted += deleted
+        if deleted < settings.USER_PURGE_BATCH_SIZE:
+            break
+        logger.info(f"Purge of user {purge.user_id}: {items_deleted} items deleted")
+        if await sleep_until_stopped(stop, settings.USER_PURGE_BATCH_DELAY_SECONDS):
+            logger.info(f"Purge of user {purge.user_id} interrupted, will resume")
+            await release_purge(purge.id)
+            return False
+    await finish_purge(purge.id, purge.user_id)
+    logger.info(f"Purge of user {purge.user_id} completed, {items_deleted} items deleted")
+    return True
+
+
+async def run(stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        try:
+            purge = await claim_next_purge()
+            if purge is not None:
+                await purge_user(purge, stop)
+                continue
+        except Exception as e:
+            logger.error(f"User purge worker error: {e}")
+        await sleep_until_stopped(stop, settings.USER_PURGE_POLL_INTERVAL_SECONDS)